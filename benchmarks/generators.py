@@ -0,0 +1,119 @@
+import os
+import os.path
+
+
+def make_tree(depth: int, width: int, prefix: str = "k", value: int = 0) -> dict:
+    """
+    Generates a dictionary with `width` keys on each level. The leaves are integers.
+    The total number of leaves is width ** depth.
+    """
+    if depth == 0:
+        return value
+    return {f"{prefix}{i}": make_tree(depth - 1, width, prefix, value + i) for i in range(width)}
+
+
+def tree_to_yaml(tree: dict, indent: int = 0) -> str:
+    lines = []
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            lines.append(f"{' ' * indent}{key}:")
+            lines.append(tree_to_yaml(value, indent + 2))
+        else:
+            lines.append(f"{' ' * indent}{key}: {value}")
+    return "\n".join(lines)
+
+
+def write_file(dir: str, name: str, contents: str) -> str:
+    path = os.path.join(dir, name)
+    with open(path, "w") as f:
+        f.write(contents)
+    return path
+
+
+def make_deep_tree(dir: str, depth: int = 6, width: int = 4) -> list[str]:
+    """
+    A single file with a deep tree
+    """
+    return [write_file(dir, "deep.cfg", tree_to_yaml(make_tree(depth, width)))]
+
+
+def make_wide_tree(dir: str, keys: int = 10000) -> list[str]:
+    """
+    A single file with many top-level keys
+    """
+    return [write_file(dir, "wide.cfg", "\n".join(f"key{i}: value{i}" for i in range(keys)))]
+
+
+def make_layers(dir: str, layers: int = 30, depth: int = 3, width: int = 10) -> list[str]:
+    """
+    Many files which override a part of the same tree. Each file reads a value defined by the previous one
+    """
+    paths = [write_file(dir, "layer_000.cfg", tree_to_yaml(make_tree(depth, width)) + "\nlayer: 0")]
+    for i in range(1, layers):
+        section = f"k{i % width}"
+        contents = "\n".join([
+            f"layer: {i}",
+            "previous: '{{ layer }}'",
+            f"{section}:",
+            tree_to_yaml(make_tree(depth - 1, width, value=i), indent=2),
+        ])
+        paths.append(write_file(dir, f"layer_{i:03d}.cfg", contents))
+    return paths
+
+
+def make_includes(dir: str, includes: int = 100, keys: int = 20) -> list[str]:
+    """
+    A file which includes many templates
+    """
+    for i in range(includes):
+        write_file(dir, f"part_{i:03d}.cfg", "\n".join(f"part{i}_key{j}: '{{{{ name }}}}-{j}'" for j in range(keys)))
+    contents = "{% set name = 'app' %}\n" + "\n".join(f"{{% include 'part_{i:03d}.cfg' %}}" for i in range(includes))
+    return [write_file(dir, "includes.cfg", contents)]
+
+
+def make_filters(dir: str, keys: int = 1000) -> list[str]:
+    """
+    A file which calls filters on each line
+    """
+    lines = [f"key{i}: \"{{{{ 'value{i}' | upper | sha256 | base64 | md5 }}}}\"" for i in range(keys)]
+    return [write_file(dir, "filters.cfg", "\n".join(lines))]
+
+
+def make_routes(dir: str, routes: int = 10000) -> list[str]:
+    """
+    A file which renders a large routing table in a loop, i.e. the rendered text is much larger than the template
+    """
+    contents = "\n".join([
+        "routes:",
+        f"{{% for i in range({routes}) %}}",
+        "  - name: route{{ i }}",
+        '    prefix: "/api/v{{ i % 7 }}/r{{ i }}"',
+        '    upstream: {host: "10.0.{{ i % 250 }}.{{ i % 200 }}", port: {{ 8000 + i % 100 }}}',
+        "{% endfor %}",
+    ])
+    return [write_file(dir, "routes.cfg", contents)]
+
+
+GENERATORS = {
+    "deep_tree": make_deep_tree,
+    "wide_tree": make_wide_tree,
+    "layers": make_layers,
+    "includes": make_includes,
+    "filters": make_filters,
+    "routes": make_routes,
+}
+
+
+def generate_all(root_dir: str) -> dict[str, list[str]]:
+    """
+    Generates all configurations. Each configuration is placed into its own directory
+
+    Returns:
+        dict[str, list[str]]: configuration names mapped to the paths of files to build
+    """
+    configs = {}
+    for name, generator in GENERATORS.items():
+        dir = os.path.join(root_dir, name)
+        os.makedirs(dir, exist_ok=True)
+        configs[name] = generator(dir)
+    return configs
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+
+import argparse
+from dataclasses import asdict, dataclass
+import json
+import os.path
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+import jinja2
+import yaml
+
+from configtpl.config_builder import ConfigBuilder
+from configtpl.jinja.env_factory import JinjaEnvFactory
+from configtpl.utils.dicts import dict_deep_merge
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from generators import generate_all, make_tree  # noqa: E402
+
+
+@dataclass
+class Benchmark:
+    """
+    A benchmark. `setup` is called before each run and is not measured. Its result is passed to `run`
+    """
+    name: str
+    run: Callable
+    setup: Callable = lambda: None
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    runs: int
+    min: float
+    mean: float
+    stdev: float
+    peak_memory: int  # peak memory allocated during a run, in bytes
+
+
+def make_benchmarks(configs: dict[str, list[str]]) -> list[Benchmark]:
+    benchmarks = []
+    for name, paths in configs.items():
+        # Cold: a new builder, so Jinja environments are created and templates are compiled during the run
+        benchmarks.append(Benchmark(f"build_from_files.{name}.cold", run=lambda b, p=paths: b.build_from_files(p),
+                                    setup=ConfigBuilder))
+        # Warm: the builder has already compiled the templates
+        warm_builder = ConfigBuilder()
+        warm_builder.build_from_files(paths)
+        benchmarks.append(Benchmark(f"build_from_files.{name}.warm",
+                                    run=lambda p=paths, b=warm_builder: b.build_from_files(p)))
+
+    # Low-memory mode renders and parses the files incrementally
+    low_memory_builder = ConfigBuilder(low_memory=True)
+    low_memory_builder.build_from_files(configs["routes"])
+    benchmarks.append(Benchmark("build_from_files.routes.low_memory.warm",
+                                run=lambda: low_memory_builder.build_from_files(configs["routes"])))
+
+    with open(configs["filters"][0]) as f:
+        filters_tpl = f.read()
+    benchmarks.append(Benchmark("build_from_str.filters.cold", run=lambda b: b.build_from_str(filters_tpl),
+                                setup=ConfigBuilder))
+    str_builder = ConfigBuilder()
+    str_builder.build_from_str(filters_tpl)
+    benchmarks.append(Benchmark("build_from_str.filters.warm", run=lambda: str_builder.build_from_str(filters_tpl)))
+
+    base = make_tree(4, 10)
+    patches = [make_tree(2, 10, value=i) for i in range(10)]
+    layers = [{f"k{i}": {f"k{i}": patch}} for i, patch in enumerate(patches)]
+    benchmarks.append(Benchmark("dict_deep_merge.full_layers", run=lambda: dict_deep_merge(*[base] * 10)))
+    benchmarks.append(Benchmark("dict_deep_merge.patches", run=lambda: dict_deep_merge(base, *layers)))
+
+    benchmarks.append(Benchmark("jinja_env_factory.cold", run=lambda f: f.get_fs_jinja_environment("/tmp"),
+                                setup=JinjaEnvFactory))
+    factory = JinjaEnvFactory()
+    benchmarks.append(Benchmark("jinja_env_factory.warm", run=lambda: factory.get_fs_jinja_environment("/tmp")))
+    return benchmarks
+
+
+def run_benchmark(benchmark: Benchmark, min_time: float, max_runs: int) -> BenchmarkResult:
+    """
+    Runs a benchmark until its total measured time exceeds `min_time` seconds or `max_runs` runs are done.
+    Then the peak memory is measured in a separate run, as tracing the allocations slows the code down
+    """
+    timings = []
+    while len(timings) < max_runs and (len(timings) < 3 or sum(timings) < min_time):
+        arg = benchmark.setup()
+        args = () if arg is None else (arg,)
+        started = time.perf_counter()
+        benchmark.run(*args)
+        timings.append(time.perf_counter() - started)
+    return BenchmarkResult(name=benchmark.name, runs=len(timings), min=min(timings), mean=statistics.mean(timings),
+                           stdev=statistics.stdev(timings), peak_memory=measure_peak_memory(benchmark))
+
+
+def measure_peak_memory(benchmark: Benchmark) -> int:
+    arg = benchmark.setup()
+    args = () if arg is None else (arg,)
+    tracemalloc.start()
+    try:
+        benchmark.run(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """
+    Compares the results with a baseline by minimum time and peak memory. Returns the names of regressed benchmarks
+    """
+    regressions = []
+    print(f"\n{'benchmark':<40} {'baseline':>12} {'current':>12} {'ratio':>8} {'memory ratio':>13}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        # The baselines saved before the memory was measured have no peak memory
+        memory_ratio = result["peak_memory"] / baseline[name]["peak_memory"] \
+            if baseline[name].get("peak_memory") else None
+        mark = ""
+        if ratio > threshold or (memory_ratio is not None and memory_ratio > threshold):
+            regressions.append(name)
+            mark = "  REGRESSION"
+        memory = "" if memory_ratio is None else f"{memory_ratio:.2f}x"
+        print(f"{name:<40} {baseline[name]['min'] * 1000:>10.3f}ms {result['min'] * 1000:>10.3f}ms "
+              f"{ratio:>7.2f}x {memory:>13}{mark}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks for configtpl")
+    parser.add_argument("--output", help="a path to JSON file to save the results to")
+    parser.add_argument("--baseline", help="a path to JSON file with results to compare with")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="a benchmark regresses if it is slower than baseline by this factor")
+    parser.add_argument("--filter", default="", help="run only the benchmarks whose names contain this string")
+    parser.add_argument("--min-time", type=float, default=1.0, help="minimum measured time per benchmark, seconds")
+    parser.add_argument("--max-runs", type=int, default=100, help="maximum number of runs per benchmark")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="configtpl-bench-") as tmp_dir:
+        benchmarks = make_benchmarks(generate_all(tmp_dir))
+        for benchmark in benchmarks:
+            if args.filter not in benchmark.name:
+                continue
+            result = run_benchmark(benchmark, args.min_time, args.max_runs)
+            results[result.name] = asdict(result)
+            print(f"{result.name:<40} min {result.min * 1000:>10.3f}ms  mean {result.mean * 1000:>10.3f}ms  "
+                  f"peak {result.peak_memory / 1024 / 1024:>8.2f}MiB  runs {result.runs}")
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "jinja2": jinja2.__version__,
+        "pyyaml": yaml.__version__,
+        "libyaml": yaml.__with_libyaml__,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
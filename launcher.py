@@ -11,7 +11,8 @@ parser = argparse.ArgumentParser(prog="configtpl_cli", description="CLI for Conf
 parser.add_argument("command")
 
 
-args = parser.parse_args()
+# Unknown arguments are passed to the command, e.g. 'benchmarks --baseline baseline.json'
+args, command_args = parser.parse_known_args()
 if args.command == "tests:functional":
     print("Functional testing started.")
     root_dir = os.path.join(os.getcwd(), "tests", "functional")
@@ -32,5 +33,8 @@ if args.command == "tests:functional":
             exit(-1)
 
     print("Testing complete.")
+elif args.command == "benchmarks":
+    result = subprocess.run([sys.executable, os.path.join(os.getcwd(), "benchmarks", "run.py"), *command_args])
+    exit(result.returncode)
 else:
     raise ValueError(f"Invalid command: {args.command}")
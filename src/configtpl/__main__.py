@@ -0,0 +1,5 @@
+import sys
+
+from configtpl.cli import main
+
+sys.exit(main())
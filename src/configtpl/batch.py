@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+import itertools
+import os
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+    from configtpl.config_builder import ConfigBuilder
+    from configtpl.frozen import FrozenConfig
+
+
+@dataclass
+class BuildResult:
+    """
+    A result of a single build in batch. If the build has failed, `config` is None and `error` is set
+    """
+    index: int
+    ctx: dict
+    config: "dict | FrozenConfig | None" = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# A builder of the current worker process
+_worker_builder: "ConfigBuilder | None" = None
+
+
+def _init_worker(builder: "ConfigBuilder", paths: list[str]) -> None:
+    global _worker_builder
+    _worker_builder = builder
+    builder.warm_up(paths)
+
+
+def _build(builder: "ConfigBuilder | None", paths: list[str], ctx: dict,
+           overrides: dict | None) -> "dict | FrozenConfig":
+    """
+    Builds a configuration. If no builder is provided, the builder of current worker process is used
+    """
+    if builder is None:
+        builder = _worker_builder
+    return builder._make_result(builder._build_from_paths(paths, overrides, ctx)[0])
+
+
+def build_many(builder: "ConfigBuilder", paths: list[str], contexts: Iterable[dict], overrides: dict | None = None,
+               executor: "str | Executor" = "thread", max_workers: int | None = None) -> Iterator[BuildResult]:
+    """
+    Builds the same configuration files with multiple contexts concurrently.
+    The results are yielded in order of completion.
+
+    Args:
+        builder (ConfigBuilder): a builder
+        paths (list[str]): resolved paths to configuration files
+        contexts (Iterable[dict]): contexts to build the configuration with, one build per context
+        overrides (dict | None): overrides which are applied to each configuration
+        executor (str | Executor): 'thread', 'process' or an executor instance.
+            Threads share the builder with its compiled templates. Each process receives a copy of the builder
+            and compiles the templates once. Process pool scales with the number of CPU cores
+            but requires the custom globals and filters to be picklable.
+        max_workers (int | None): maximum number of workers in a new pool
+    """
+    from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+    if isinstance(executor, Executor):
+        pool, owned, task_builder = executor, False, builder
+    elif executor == "thread":
+        builder.warm_up(paths)
+        pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="configtpl")
+        owned, task_builder = True, builder
+    elif executor == "process":
+        pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(builder, paths))
+        owned, task_builder = True, None
+    else:
+        raise ValueError(f"Unknown executor: '{executor}'")
+
+    # Keep a limited number of builds in flight, so the contexts might be a lazy iterable
+    max_in_flight = 4 * (max_workers or os.cpu_count() or 1)
+    contexts_iter = enumerate(contexts)
+    in_flight: "dict[Future, tuple[int, dict]]" = {}
+    try:
+        while True:
+            for i, ctx in itertools.islice(contexts_iter, max_in_flight - len(in_flight)):
+                in_flight[pool.submit(_build, task_builder, paths, ctx, overrides)] = (i, ctx)
+            if not in_flight:
+                return
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                i, ctx = in_flight.pop(future)
+                error = future.exception()
+                yield BuildResult(index=i, ctx=ctx, config=None if error is not None else future.result(),
+                                  error=error)
+    finally:
+        if owned:
+            pool.shutdown(cancel_futures=True)
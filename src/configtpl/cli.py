@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+
+from configtpl.config_builder import ConfigBuilder
+from configtpl.jinja.precompile import PRECOMPILED_ZIP_MODES
+from configtpl.profiling import ProfileReport
+from configtpl.result_cache import ResultCache
+from configtpl.snapshot import SNAPSHOT_FORMATS
+from configtpl.utils.files import atomic_write_bytes
+
+RENDER_FORMATS = ("json", "yaml")
+
+
+def _json_object(value: str) -> dict:
+    try:
+        result = json.loads(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid JSON: {e}") from e
+    if not isinstance(result, dict):
+        raise argparse.ArgumentTypeError("a JSON object is expected")
+    return result
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="configtpl", description="Configuration builder which combines "
+                                                                   "features of Jinja and YAML")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    render = subparsers.add_parser("render", help="build the configurations and print them or write them into files")
+    render.add_argument("targets", nargs="+", type=_render_target, metavar="[OUTPUT=]PATHS",
+                        help="colon-separated paths to configuration files, e.g. base.cfg:prod.cfg. "
+                             "The configuration is printed to stdout unless the output file is specified")
+    render.add_argument("-f", "--format", choices=RENDER_FORMATS, default="json", help="output format")
+    render.add_argument("--ctx", type=_json_object, help="additional rendering context as JSON object")
+    render.add_argument("--overrides", type=_json_object, help="overrides as JSON object")
+    render.add_argument("--cache-dir", default=os.environ.get("CONFIGTPL_CACHE_DIR"),
+                        help="a directory for compiled templates and built configurations which are reused "
+                             "by the next runs. Defaults to CONFIGTPL_CACHE_DIR environment variable")
+    render.add_argument("--profile", action="store_true", help="print the timings of build stages to stderr")
+
+    snapshot = subparsers.add_parser("snapshot", help="build the configuration and write it into a snapshot file")
+    snapshot.add_argument("paths", nargs="+", help="paths to configuration files, might be colon-separated")
+    snapshot.add_argument("-o", "--output", required=True, help="a path to the snapshot file")
+    snapshot.add_argument("--format", choices=SNAPSHOT_FORMATS, default="pickle", help="serialization format")
+    snapshot.add_argument("--ctx", type=_json_object, help="additional rendering context as JSON object")
+    snapshot.add_argument("--overrides", type=_json_object, help="overrides as JSON object")
+    snapshot.add_argument("--content-hash", action="store_true",
+                          help="compare the contents of files whose modification time is changed")
+    snapshot.add_argument("--allow-nondeterministic", action="store_true",
+                          help="save the configurations which call uuid() or cmd()")
+
+    precompile = subparsers.add_parser("precompile", help="compile the templates of directory into Python modules")
+    precompile.add_argument("dir", help="a directory of configuration files")
+    precompile.add_argument("-o", "--output", required=True, help="a directory or a zip archive to write into")
+    precompile.add_argument("--zip", choices=PRECOMPILED_ZIP_MODES, help="write a zip archive with this compression")
+    precompile.add_argument("--pattern", default="*", help="a shell-style pattern of template file names")
+    precompile.add_argument("--async", action="store_true", dest="enable_async",
+                            help="compile the templates for asynchronous rendering")
+
+    daemon = subparsers.add_parser("daemon", help="serve the configurations over a Unix domain socket")
+    daemon.add_argument("--socket", required=True, help="a path to the socket")
+    daemon.add_argument("--config", action="append", type=_named_paths, required=True, dest="configs",
+                        metavar="NAME=PATHS", help="a named configuration, e.g. app=base.cfg:prod.cfg. Repeatable")
+    daemon.add_argument("--cache-size", type=int, default=128, help="how many built configurations to keep")
+    daemon.add_argument("--allow-nondeterministic", action="store_true",
+                        help="cache the configurations which call uuid() or cmd()")
+    return parser
+
+
+def _render_target(value: str) -> tuple[str | None, str]:
+    output, sep, paths = value.rpartition("=")
+    if (sep and not output) or not paths:
+        raise argparse.ArgumentTypeError("[OUTPUT=]PATHS is expected")
+    return output or None, paths
+
+
+def _named_paths(value: str) -> tuple[str, str]:
+    name, sep, paths = value.partition("=")
+    if not sep or not name or not paths:
+        raise argparse.ArgumentTypeError("NAME=PATHS is expected")
+    return name, paths
+
+
+def _dump_config(config: dict, format: str, compact: bool) -> str:
+    if format == "yaml":
+        import yaml
+
+        return yaml.safe_dump(config, sort_keys=False, allow_unicode=True)
+    if compact:
+        return json.dumps(config, ensure_ascii=False, default=str) + "\n"
+    return json.dumps(config, indent=2, ensure_ascii=False, default=str) + "\n"
+
+
+def _format_profile(report: dict, timings: list[tuple[str, float]]) -> str:
+    lines = [f"{'stage':<10}{'time, ms':>12}{'count':>8}"]
+    for stage, stage_report in report["stages"].items():
+        count = sum(source["count"] for source in stage_report["sources"])
+        lines.append(f"{stage:<10}{stage_report['total_time'] * 1000:>12.2f}{count:>8}")
+    for call in report["calls"]:
+        lines.append(f"{call['kind']} {call['name']}: {call['total_time'] * 1000:.2f} ms, {call['count']} calls")
+    for target, duration in timings:
+        lines.append(f"target {target}: {duration * 1000:.2f} ms")
+    lines.append(f"total: {sum(d for _, d in timings) * 1000:.2f} ms")
+    return "\n".join(lines)
+
+
+def cmd_render(args: argparse.Namespace) -> int:
+    builder_args = {}
+    if args.cache_dir:
+        builder_args["jinja_bytecode_cache"] = os.path.join(args.cache_dir, "templates")
+        builder_args["result_cache"] = ResultCache(cache_dir=os.path.join(args.cache_dir, "results"))
+    profile = ProfileReport() if args.profile else None
+    builder = ConfigBuilder(observer=profile, **builder_args)
+
+    # Several documents printed to stdout are separated: JSON documents are printed one per line (JSON Lines)
+    # and YAML documents are separated with '---'
+    stdout_count = sum(1 for output, _ in args.targets if output is None)
+    exit_code = 0
+    timings: list[tuple[str, float]] = []
+    for output, paths in args.targets:
+        started = time.perf_counter()
+        try:
+            config = builder.build_from_files(paths, overrides=args.overrides, ctx=args.ctx)
+            text = _dump_config(config, args.format, compact=stdout_count > 1 and output is None)
+        except Exception as e:
+            print(f"configtpl: {paths}: {type(e).__name__}: {e}", file=sys.stderr)
+            exit_code = 1
+            continue
+        finally:
+            timings.append((paths, time.perf_counter() - started))
+
+        if output is None:
+            if args.format == "yaml" and stdout_count > 1:
+                sys.stdout.write("---\n")
+            sys.stdout.write(text)
+        else:
+            os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+            atomic_write_bytes(output, text.encode())
+
+    if profile is not None:
+        print(_format_profile(profile.report(), timings), file=sys.stderr)
+    return exit_code
+
+
+def cmd_snapshot(args: argparse.Namespace) -> int:
+    ConfigBuilder().save_snapshot(args.paths, args.output, overrides=args.overrides, ctx=args.ctx,
+                                  format=args.format, use_content_hash=args.content_hash,
+                                  allow_nondeterministic=args.allow_nondeterministic)
+    return 0
+
+
+def cmd_precompile(args: argparse.Namespace) -> int:
+    count = ConfigBuilder().precompile_templates(args.dir, args.output, zip=args.zip, pattern=args.pattern,
+                                                 enable_async=args.enable_async)
+    print(f"Compiled {count} templates into {args.output}", file=sys.stderr)
+    return 0
+
+
+def cmd_daemon(args: argparse.Namespace) -> int:
+    from configtpl.daemon import ConfigDaemon, ConfigDaemonError
+
+    daemon = ConfigDaemon(ConfigBuilder(), dict(args.configs), args.socket, cache_size=args.cache_size,
+                          allow_nondeterministic=args.allow_nondeterministic)
+    # SIGTERM stops the daemon gracefully, like Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except ConfigDaemonError as e:
+        print(f"configtpl: {e}", file=sys.stderr)
+        return 1
+    finally:
+        daemon.stop()
+    return 0
+
+
+COMMANDS = {
+    "daemon": cmd_daemon,
+    "precompile": cmd_precompile,
+    "render": cmd_render,
+    "snapshot": cmd_snapshot,
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = make_parser().parse_args(argv)
+    try:
+        return COMMANDS[args.command](args)
+    except ValueError as e:
+        print(f"configtpl: {e}", file=sys.stderr)
+        return 1
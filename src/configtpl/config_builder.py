@@ -1,16 +1,55 @@
+import contextvars
 from copy import deepcopy
+import hashlib
 import os
 import os.path
-from typing import Callable
-import yaml
+import pickle
+import threading
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Mapping
+import weakref
 
-from configtpl.utils.dicts import dict_deep_merge
+from configtpl.batch import BuildResult, build_many
+from configtpl.content_store import ContentStore, ContentStoreInfo
+from configtpl.dependency_graph import DependencyGraph, StageRecord
+from configtpl.frozen import FrozenConfig
+from configtpl.profiling import (SOURCE_OVERRIDES, SOURCE_STRING, STAGE_COMPILE, STAGE_MERGE, STAGE_PARSE,
+                                 STAGE_RENDER, BuildObserver, observe_stage)
+from configtpl.result_cache import ResultCache, make_fingerprint
+from configtpl.snapshot import load_snapshot, save_snapshot
+from configtpl.tracking import BuildDependencies, BuildTracker, tracking
+from configtpl.utils.cache import CacheInfo, LRUCache
+from configtpl.utils.dicts import DictMerger, dict_select
+from configtpl.utils.yaml_loaders import check_yaml_loader, get_yaml_loader
+from configtpl.jinja.context import (LayeredContext, RecordingContext, generate_template, render_template,
+                                     render_template_async)
 from configtpl.jinja.env_factory import JinjaEnvFactory
 
+# Jinja, YAML, asyncio and the thread pools are imported on demand, so importing the builder
+# and loading a snapshot or a cached result stay cheap
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+    import jinja2
+
+    from configtpl.jinja.analysis import TemplateOutline
+    from configtpl.watch import ConfigChange, ConfigWatcher, WatchBackend
+
+# Globals whose calls are started concurrently in asynchronous mode
+PREFETCH_GLOBALS = {"cmd", "file"}
+# How many template outlines to keep for partial builds
+OUTLINE_CACHE_SIZE = 1024
+
 
 class ConfigBuilder:
     def __init__(self, jinja_constructor_args: dict | None = None, jinja_globals: dict | None = None,
-                 jinja_filters: dict | None = None, defaults: dict | None = None):
+                 jinja_filters: dict | None = None, defaults: dict | None = None, yaml_loader: str | type = "full",
+                 yaml_use_libyaml: bool | None = None, jinja_bytecode_cache: "jinja2.BytecodeCache | str | None" = None,
+                 str_template_cache_size: int = 128, result_cache: ResultCache | None = None,
+                 incremental_cache_size: int = 0, list_merge_strategy: str = "replace",
+                 list_merge_key: str | None = None, jinja_env_cache_size: int | None = 128,
+                 observer: BuildObserver | None = None, frozen: bool = False, parallel_workers: int = 0,
+                 content_store: ContentStore | None = None, precompiled_templates: dict[str, str] | None = None,
+                 low_memory: bool = False):
         """
         A constructor for Cofnig Builder.
 
@@ -18,12 +57,69 @@ class ConfigBuilder:
             constructor_args (dict | None): argument for Jinja environment constructor
             globals (dict | None): globals to inject into Jinja environment
             defaults (dict | None): Default values for configuration
+            yaml_loader (str | type): YAML loader family ('full' or 'safe') or a custom loader class
+            yaml_use_libyaml (bool | None): True to require the libyaml-backed YAML loader,
+                False to use the pure-Python one, None to use libyaml when PyYAML has it.
+                The loader is resolved once the first configuration is parsed
+            jinja_bytecode_cache (jinja2.BytecodeCache | str | None): a cache for compiled templates.
+                If a string is provided, compiled templates are stored on disk in this directory
+            str_template_cache_size (int): how many compiled templates to keep for `build_from_str`.
+                0 disables the cache
+            result_cache (ResultCache | None): a cache for configurations built by `build_from_files`.
+                The cache must not be shared between builders with different globals, filters or Jinja settings
+            incremental_cache_size (int): how many dependency graphs to keep for incremental rebuilds.
+                When a configuration is built again, only the files whose inputs have changed are rendered.
+                0 disables incremental rebuilds
+            list_merge_strategy (str): how lists are merged when configuration files define the same list:
+                'replace' (default), 'append' or 'merge_by_key'
+            list_merge_key (str | None): a key to match the list items for 'merge_by_key' strategy
+            jinja_env_cache_size (int | None): how many Jinja environments to keep. An environment is created
+                for each directory with configuration files. None means unbounded cache
+            observer (BuildObserver | None): an observer which receives the timings of build stages
+                and the calls of globals and filters. See `set_observer`
+            frozen (bool): return the configurations as immutable `FrozenConfig` objects,
+                which might be shared between threads without copying
+            parallel_workers (int): render the configuration files which do not read the values defined
+                by the previous files concurrently in a thread pool of this size. The files are merged in order,
+                so the result is the same as of sequential build. 0 disables concurrent rendering
+            content_store (ContentStore | None): a store for the templates and the files read by `file()`.
+                Unchanged files are read from disk once. A store might be shared by several builders.
+                If None, the files are read from disk on each build
+            precompiled_templates (dict[str, str] | None): directories of configuration files mapped to
+                the directories or zip archives with their templates compiled by `precompile_templates`.
+                The compiled templates are loaded instead of compiling the sources, unless the sources have changed
+            low_memory (bool): render the configuration files chunk by chunk and parse the chunks incrementally,
+                so neither the whole rendered text nor the YAML node tree of a file is kept in memory.
+                It reduces peak memory of very large configurations at the cost of slower parsing.
+                Applies to synchronous builds from files
         """
         self.jinja_env_factory = JinjaEnvFactory(constructor_args=jinja_constructor_args, globals=jinja_globals,
-                                                 filters=jinja_filters)
+                                                 filters=jinja_filters, bytecode_cache=jinja_bytecode_cache,
+                                                 env_cache_size=jinja_env_cache_size, content_store=content_store,
+                                                 precompiled_templates=precompiled_templates)
         if defaults is None:
             defaults = {}
         self.defaults = defaults
+        check_yaml_loader(yaml_loader)
+        self._yaml_loader_spec = (yaml_loader, yaml_use_libyaml)
+        self._yaml_loader: type | None = None
+        # Validates the list merge options
+        DictMerger(list_merge_strategy, list_merge_key)
+        self.list_merge_strategy = list_merge_strategy
+        self.list_merge_key = list_merge_key
+        self.result_cache = result_cache
+        self._str_template_cache = LRUCache(str_template_cache_size) if str_template_cache_size > 0 else None
+        self._graph_cache = LRUCache(incremental_cache_size) if incremental_cache_size > 0 else None
+        self._prefetch_calls: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._outline_cache = LRUCache(OUTLINE_CACHE_SIZE)
+        self.frozen = frozen
+        self.parallel_workers = parallel_workers
+        self.low_memory = low_memory
+        self._executor: "ThreadPoolExecutor | None" = None
+        self._executor_lock = threading.Lock()
+        self._observer: BuildObserver | None = None
+        if observer is not None:
+            self.set_observer(observer)
 
     def set_global(self, k: str, v: Callable) -> None:
         """
@@ -37,8 +133,101 @@ class ConfigBuilder:
         """
         self.jinja_env_factory.set_filter(k, v)
 
+    def set_observer(self, observer: BuildObserver | None) -> None:
+        """
+        Attaches an observer which receives the timings of build stages (compile, render, parse and merge)
+        for each file or string, the sizes of rendered text and the calls of globals and filters.
+        `configtpl.profiling.ProfileReport` aggregates them into a report. None detaches the observer.
+        Nothing is measured while no observer is attached.
+        """
+        self._observer = observer
+        self.jinja_env_factory.set_observer(observer)
+
+    def warm_up(self, paths_colon_separated: str | list[str]) -> None:
+        """
+        Creates Jinja environments and compiles the templates for provided configuration files in advance
+        """
+        for path in self._resolve_paths(paths_colon_separated):
+            self.jinja_env_factory.get_fs_jinja_environment(os.path.dirname(path)).get_template(os.path.basename(path))
+
+    def precompile_templates(self, dir: str, target: str, zip: str | None = None, pattern: str = "*",
+                             enable_async: bool = False) -> int:
+        """
+        Compiles the templates of directory and its subdirectories into Python modules, e.g. at image build time.
+        Pass the output to `precompiled_templates` argument of builder to skip the compilation at runtime
+
+        Args:
+            dir (str): a directory of configuration files
+            target (str): a directory or a zip archive to write the compiled templates into
+            zip (str | None): 'deflated' or 'stored' to write a zip archive. None writes a directory
+            pattern (str): a shell-style pattern of template file names, e.g. '*.cfg'
+            enable_async (bool): compile the templates for `build_from_files_async`
+        Returns:
+            int: the number of compiled templates
+        """
+        return self.jinja_env_factory.precompile_templates(dir, target, zip=zip, pattern=pattern,
+                                                           enable_async=enable_async)
+
+    def build_many(self, paths_colon_separated: str | list[str], contexts: Iterable[dict],
+                   overrides: dict | None = None, executor: "str | Executor" = "thread",
+                   max_workers: int | None = None) -> Iterator[BuildResult]:
+        """
+        Builds the same configuration files with multiple contexts concurrently, e.g. for multiple tenants.
+        The results are yielded in order of completion. Failed builds are reported with their errors.
+
+        Args:
+            paths_colon_separated (str | list[str]): Paths to configuration files. See `build_from_files`
+            contexts (Iterable[dict]): contexts to build the configuration with, one build per context
+            overrides (dict | None): Overrides are applied to each configuration
+            executor (str | Executor): 'thread', 'process' or an executor instance.
+                Threads share this builder with its compiled templates. Each process receives a copy of builder
+                and compiles the templates once. Process pool scales with the number of CPU cores,
+                but requires the custom globals and filters to be picklable.
+            max_workers (int | None): maximum number of workers in a new pool
+        Returns:
+            Iterator[BuildResult]: build results with indices of their contexts
+        """
+        return build_many(self, self._resolve_paths(paths_colon_separated), contexts, overrides=overrides,
+                          executor=executor, max_workers=max_workers)
+
+    def __getstate__(self) -> dict:
+        state = {**self.__dict__, "_prefetch_calls": None, "_observer": None, "_executor": None}
+        del state["_executor_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._prefetch_calls = weakref.WeakKeyDictionary()
+        self._executor_lock = threading.Lock()
+
+    def jinja_env_cache_info(self) -> CacheInfo:
+        """
+        Returns statistics of Jinja environment cache
+        """
+        return self.jinja_env_factory.cache_info()
+
+    def content_store_info(self) -> ContentStoreInfo | None:
+        """
+        Returns statistics of the store for templates and files or None if no store is configured
+        """
+        store = self.jinja_env_factory.content_store
+        return None if store is None else store.info()
+
+    def str_template_cache_info(self) -> CacheInfo | None:
+        """
+        Returns statistics of compiled template cache for `build_from_str` or None if the cache is disabled
+        """
+        return None if self._str_template_cache is None else self._str_template_cache.info()
+
+    def clear_str_template_cache(self) -> None:
+        """
+        Removes all compiled templates from cache for `build_from_str`
+        """
+        if self._str_template_cache is not None:
+            self._str_template_cache.clear()
+
     def build_from_files(self, paths_colon_separated: str | list[str], overrides: dict | None = None,
-                         ctx: dict | None = None) -> dict:
+                         ctx: dict | None = None) -> dict | FrozenConfig:
         """
         Renders files from provided paths.
 
@@ -51,34 +240,133 @@ class ConfigBuilder:
                 Examples: '/opt/myapp/myconfig.cfg', '/opt/myapp/myconfig_first.cfg:/opt/myapp/myconfig_second.cfg',
                 ['/opt/myapp/myconfig.cfg', '/opt/myapp/myconfig_first.cfg:/opt/myapp/myconfig_second.cfg']
         Returns:
-            dict: The rendered configuration
+            dict | FrozenConfig: The rendered configuration. See `frozen` option of constructor
+        """
+        return self._make_result(self._build_from_paths(self._resolve_paths(paths_colon_separated), overrides, ctx)[0])
+
+    def build_partial(self, paths_colon_separated: str | list[str], keys: Iterable[str],
+                      overrides: dict | None = None, ctx: dict | None = None) -> dict | FrozenConfig:
         """
-        output_cfg = deepcopy(self.defaults)
+        Builds only the requested key paths of configuration, e.g. 'server.port'.
+        The configuration files which cannot define the requested top-level keys are not rendered,
+        unless the rendered files read the values they define. The files are analyzed statically:
+        if the keys a file defines cannot be determined (e.g. a key is an expression), the file is rendered.
+        The rendered files are rendered as a whole, e.g. the `cmd()` calls in them are executed.
+
+        Args:
+            paths_colon_separated (str | list[str]): Paths to configuration files. See `build_from_files`
+            keys (Iterable[str]): the key paths to build. Nested keys are joined with dots
+            overrides (dict | None): Overrides are applied at the very end stage after all templates are rendered
+            ctx (dict | None): additional rendering context which is NOT injected into configuration
+        Returns:
+            dict | FrozenConfig: The configuration which contains only the requested key paths. Missing keys are skipped
+        """
+        keys = list(keys)
+        paths = self._resolve_paths(paths_colon_separated)
         if ctx is None:
             ctx = {}
         if overrides is None:
             overrides = {}
-        # Convert the path input into list of paths
-        paths_colon_separated: list[str] = [paths_colon_separated] \
-            if isinstance(paths_colon_separated, str) \
-            else paths_colon_separated
-        paths: list[str] = []
-        for path_colon_separated in paths_colon_separated:
-            paths += path_colon_separated.split(":")
 
-        for cfg_path in paths:
-            cfg_path = os.path.realpath(cfg_path)
-            ctx = {**output_cfg, **ctx}
-            cfg_iter: dict = self._render_cfg_from_file(cfg_path, ctx)
+        required = self._find_required_files(paths, {key.split(".")[0] for key in keys})
+        with tracking(BuildTracker()):
+            merger = self._make_merger(deepcopy(self.defaults))
+            cfg_values = self._make_context_values()
+            render_ctx = LayeredContext(ctx, cfg_values)
+            for cfg_path, is_required in zip(paths, required):
+                if not is_required:
+                    continue
+                cfg_iter: dict = self._render_cfg_from_file(cfg_path, render_ctx)
+                with observe_stage(self._observer, STAGE_MERGE, cfg_path):
+                    merger.merge(cfg_iter)
+                self._add_context_values(cfg_values, cfg_iter, merger.result)
 
-            output_cfg = dict_deep_merge(output_cfg, cfg_iter)
+        with observe_stage(self._observer, STAGE_MERGE, SOURCE_OVERRIDES):
+            output_cfg = merger.merge(overrides)
+        return self._make_result(dict_select(output_cfg, keys))
 
-        # Append overrides
-        output_cfg = dict_deep_merge(output_cfg, overrides)
-        return output_cfg
+    def watch(self, paths_colon_separated: str | list[str], callback: "Callable[[ConfigChange], None] | None" = None,
+              overrides: dict | None = None, ctx: dict | None = None, debounce: float = 0.1,
+              backend: "str | WatchBackend" = "auto", poll_interval: float = 1.0) -> "ConfigWatcher":
+        """
+        Builds the configuration and rebuilds it in background once any file it was built from is changed.
+        The watched files include configuration files, included templates and files read with `file()`.
+
+        Args:
+            paths_colon_separated (str | list[str]): Paths to configuration files. See `build_from_files`
+            callback (Callable[[ConfigChange], None] | None): a function to call after the configuration is rebuilt
+            overrides (dict | None): Overrides are applied at the very end stage after all templates are rendered
+            ctx (dict | None): additional rendering context which is NOT injected into configuration
+            debounce (float): the configuration is rebuilt once there are no changes during this period, in seconds
+            backend (str | WatchBackend): 'inotify', 'poll' or 'auto' (inotify if available, polling otherwise)
+            poll_interval (float): how often the files are checked by polling backend, in seconds
+        Returns:
+            ConfigWatcher: a watcher. The current configuration is available as `config` attribute
+        """
+        from configtpl.watch import ConfigWatcher
+
+        watcher = ConfigWatcher(self, self._resolve_paths(paths_colon_separated), overrides=overrides, ctx=ctx,
+                                debounce=debounce, backend=backend, poll_interval=poll_interval)
+        if callback is not None:
+            watcher.subscribe(callback)
+        return watcher
+
+    def save_snapshot(self, paths_colon_separated: str | list[str], snapshot_path: str,
+                      overrides: dict | None = None, ctx: dict | None = None, format: str = "pickle",
+                      use_content_hash: bool = False, allow_nondeterministic: bool = False) -> dict | FrozenConfig:
+        """
+        Builds the configuration and writes it into a snapshot file along with the fingerprint of its inputs,
+        e.g. at image build time. See `load_snapshot`
+
+        Args:
+            paths_colon_separated (str | list[str]): Paths to configuration files. See `build_from_files`
+            snapshot_path (str): a path to the snapshot file
+            overrides (dict | None): Overrides are applied at the very end stage after all templates are rendered
+            ctx (dict | None): additional rendering context which is NOT injected into configuration
+            format (str): serialization format: 'pickle' (default), 'marshal' or 'msgpack' (if installed)
+            use_content_hash (bool): compare the contents of files whose modification time is changed
+            allow_nondeterministic (bool): save the configurations which call `uuid()` or `cmd()`
+        Returns:
+            dict | FrozenConfig: The rendered configuration
+        """
+        return save_snapshot(self, self._resolve_paths(paths_colon_separated), snapshot_path, overrides=overrides,
+                             ctx=ctx, format=format, use_content_hash=use_content_hash,
+                             allow_nondeterministic=allow_nondeterministic)
+
+    def load_snapshot(self, paths_colon_separated: str | list[str], snapshot_path: str,
+                      overrides: dict | None = None, ctx: dict | None = None, update: bool = False,
+                      format: str = "pickle", use_content_hash: bool = False) -> dict | FrozenConfig:
+        """
+        Loads the configuration from a snapshot file written by `save_snapshot`. If the snapshot is missing,
+        it was built with different arguments or any of its inputs has changed, the configuration is built from files.
+
+        Args:
+            paths_colon_separated (str | list[str]): Paths to configuration files. See `build_from_files`
+            snapshot_path (str): a path to the snapshot file
+            overrides (dict | None): Overrides are applied at the very end stage after all templates are rendered
+            ctx (dict | None): additional rendering context which is NOT injected into configuration
+            update (bool): write a new snapshot if the existing one cannot be used
+            format (str): serialization format of a new snapshot
+            use_content_hash (bool): record the content hash of files in a new snapshot
+        Returns:
+            dict | FrozenConfig: The configuration
+        """
+        return load_snapshot(self, self._resolve_paths(paths_colon_separated), snapshot_path, overrides=overrides,
+                             ctx=ctx, update=update, format=format, use_content_hash=use_content_hash)
+
+    def get_dependency_graph(self, paths_colon_separated: str | list[str],
+                             ctx: dict | None = None) -> DependencyGraph | None:
+        """
+        Returns the dependency graph recorded during the last incremental build of provided files and context.
+        Returns None if incremental builds are disabled or the files have not been built yet.
+        """
+        if self._graph_cache is None:
+            return None
+        key = self._get_graph_key(self._resolve_paths(paths_colon_separated), {} if ctx is None else ctx)
+        return None if key is None else self._graph_cache.get(key)
 
     def build_from_str(self, input: str, work_dir: str | None = None, defaults: dict | None = None,
-                       ctx: dict | None = None, overrides: dict | None = None) -> dict:
+                       ctx: dict | None = None, overrides: dict | None = None) -> dict | FrozenConfig:
         """
         Renders config from string.
 
@@ -90,7 +378,7 @@ class ConfigBuilder:
             ctx (dict | None): additional rendering context which is NOT injected into configuration
             overrides (dict | None): Overrides are applied at the very end stage after all templates are rendered
         Returns:
-            dict: The rendered configuration
+            dict | FrozenConfig: The rendered configuration. See `frozen` option of constructor
         """
         if work_dir is None:
             work_dir = os.getcwd()
@@ -100,11 +388,319 @@ class ConfigBuilder:
         if overrides is None:
             overrides = {}
 
-        cfg = self._render_cfg_from_str(input, ctx, work_dir)
-        output_cfg = dict_deep_merge(cfg, overrides)
+        with tracking(BuildTracker()):
+            cfg = self._render_cfg_from_str(input, ctx, work_dir)
+        with observe_stage(self._observer, STAGE_MERGE, SOURCE_OVERRIDES):
+            output_cfg = self._make_merger(cfg).merge(overrides)
+        return self._make_result(output_cfg)
+
+    async def build_from_files_async(self, paths_colon_separated: str | list[str], overrides: dict | None = None,
+                                     ctx: dict | None = None) -> dict | FrozenConfig:
+        """
+        Renders files from provided paths in asynchronous mode.
+        Templates are loaded, rendered and parsed without blocking the event loop. The calls of `cmd()` and `file()`
+        with constant arguments which are not nested into conditions or loops are started concurrently
+        before a template is rendered. Incremental rebuilds are not supported in asynchronous mode.
+
+        Args:
+            paths_colon_separated (str | list[str]): Paths to configuration files. See `build_from_files`
+            overrides (dict | None): Overrides are applied at the very end stage after all templates are rendered
+            ctx (dict | None): additional rendering context which is NOT injected into configuration
+        Returns:
+            dict | FrozenConfig: The rendered configuration. See `frozen` option of constructor
+        """
+        return self._make_result(
+            await self._build_from_paths_async(self._resolve_paths(paths_colon_separated), overrides, ctx))
+
+    async def build_from_str_async(self, input: str, work_dir: str | None = None, defaults: dict | None = None,
+                                   ctx: dict | None = None, overrides: dict | None = None) -> dict | FrozenConfig:
+        """
+        Renders config from string in asynchronous mode. See `build_from_str` and `build_from_files_async`
+        """
+        if work_dir is None:
+            work_dir = os.getcwd()
+        if ctx is None:
+            ctx = {}
+        if overrides is None:
+            overrides = {}
+
+        with tracking(BuildTracker()):
+            with observe_stage(self._observer, STAGE_COMPILE, SOURCE_STRING):
+                jinja_env = self.jinja_env_factory.get_fs_jinja_environment(work_dir, enable_async=True)
+                tpl = self._get_str_template(input, work_dir, jinja_env)
+                prefetch = self._find_prefetch_calls(tpl, jinja_env, input)
+            with observe_stage(self._observer, STAGE_RENDER, SOURCE_STRING) as stage:
+                tpl_rendered = await render_template_async(tpl, ctx, prefetch)
+                stage.set_output(tpl_rendered)
+        with observe_stage(self._observer, STAGE_PARSE, SOURCE_STRING):
+            cfg = await self._parse_yaml_async(tpl_rendered)
+        with observe_stage(self._observer, STAGE_MERGE, SOURCE_OVERRIDES):
+            output_cfg = self._make_merger(cfg).merge(overrides)
+        return self._make_result(output_cfg)
+
+    def _build_from_paths(self, paths: list[str], overrides: dict | None, ctx: dict | None,
+                          tracker: BuildTracker | None = None) -> tuple[dict, BuildDependencies]:
+        """
+        Builds the configuration from resolved paths.
+        Returns the configuration and its dependencies, i.e. the files and environment variables read by templates.
+        A custom tracker might be provided to inspect the build, e.g. the calls of non-deterministic functions.
+        In this case the result cache is not looked up, so the tracker records the whole build
+        """
+        if ctx is None:
+            ctx = {}
+        if overrides is None:
+            overrides = {}
+
+        cache_key = self._get_result_cache_key(paths, ctx, overrides)
+        if cache_key is not None and tracker is None:
+            cached = self.result_cache.lookup(cache_key)
+            if cached is not None:
+                return cached
+
+        if tracker is None:
+            tracker = self._make_tracker()
+        with tracking(tracker):
+            merger = self._make_merger(deepcopy(self.defaults))
+            if self._graph_cache is not None:
+                self._build_incremental(paths, ctx, tracker, merger)
+            else:
+                cfg_values = self._make_context_values()
+                # The user context takes precedence over the configuration values
+                render_ctx = LayeredContext(ctx, cfg_values)
+                independent = self._render_independent_files(paths, ctx, tracker) if self.parallel_workers > 0 else {}
+                for i, cfg_path in enumerate(paths):
+                    if i in independent:
+                        cfg_iter, stage_tracker = independent[i].result()
+                        tracker.merge(stage_tracker.dependencies, stage_tracker.nondeterministic)
+                    else:
+                        cfg_iter = self._render_cfg_from_file(cfg_path, render_ctx)
+
+                    with observe_stage(self._observer, STAGE_MERGE, cfg_path):
+                        merger.merge(cfg_iter)
+                    self._add_context_values(cfg_values, cfg_iter, merger.result)
+
+        # Append overrides
+        with observe_stage(self._observer, STAGE_MERGE, SOURCE_OVERRIDES):
+            output_cfg = merger.merge(overrides)
+        if cache_key is not None:
+            self.result_cache.set(cache_key, output_cfg, tracker)
+        return output_cfg, tracker.dependencies
+
+    async def _build_from_paths_async(self, paths: list[str], overrides: dict | None, ctx: dict | None) -> dict:
+        """
+        Builds the configuration from resolved paths in asynchronous mode
+        """
+        if ctx is None:
+            ctx = {}
+        if overrides is None:
+            overrides = {}
+
+        cache_key = self._get_result_cache_key(paths, ctx, overrides)
+        if cache_key is not None:
+            cached_cfg = self.result_cache.get(cache_key)
+            if cached_cfg is not None:
+                return cached_cfg
+
+        tracker = self._make_tracker()
+        with tracking(tracker):
+            merger = self._make_merger(deepcopy(self.defaults))
+            cfg_values = self._make_context_values()
+            render_ctx = LayeredContext(ctx, cfg_values)
+            for cfg_path in paths:
+                cfg_iter: dict = await self._render_cfg_from_file_async(cfg_path, render_ctx)
+
+                with observe_stage(self._observer, STAGE_MERGE, cfg_path):
+                    merger.merge(cfg_iter)
+                self._add_context_values(cfg_values, cfg_iter, merger.result)
+
+        # Append overrides
+        with observe_stage(self._observer, STAGE_MERGE, SOURCE_OVERRIDES):
+            output_cfg = merger.merge(overrides)
+        if cache_key is not None:
+            self.result_cache.set(cache_key, output_cfg, tracker)
         return output_cfg
 
-    def _render_cfg_from_file(self, path: str, ctx: dict) -> dict:
+    def _make_result(self, cfg: dict) -> dict | FrozenConfig:
+        return FrozenConfig(cfg) if self.frozen else cfg
+
+    def _get_result_cache_key(self, paths: list[str], ctx: dict, overrides: dict) -> str | None:
+        if self.result_cache is None:
+            return None
+        return self.result_cache.make_key(paths, ctx, overrides, self.defaults, self._yaml_loader_name,
+                                          self.list_merge_strategy, self.list_merge_key,
+                                          self.jinja_env_factory.get_signature())
+
+    def _make_context_values(self) -> dict:
+        """
+        Returns the configuration values which the first file is rendered with, i.e. the defaults.
+        They are copied apart from the merger's result, since the merger updates its nested dictionaries in place
+        """
+        return deepcopy(self.defaults)
+
+    @staticmethod
+    def _add_context_values(cfg_values: dict, cfg: dict, result: dict) -> None:
+        """
+        Adds the top-level keys defined by a configuration file to the values which the following files are rendered
+        with. A key keeps the value it was defined with first, i.e. in defaults or the earliest file,
+        so only the new keys are added. The accumulated configuration is not copied.
+
+        Args:
+            cfg_values (dict): the configuration values of render context
+            cfg (dict): the output of configuration file
+            result (dict): the configuration merged so far
+        """
+        for key in cfg:
+            if key not in cfg_values:
+                cfg_values[key] = result[key]
+
+    def _make_tracker(self) -> BuildTracker:
+        return BuildTracker() if self.result_cache is None else self.result_cache.make_tracker()
+
+    def _make_merger(self, initial: dict) -> DictMerger:
+        """
+        Creates a merger which accumulates the configuration layers.
+        The initial dictionary must not be referenced elsewhere, because it is updated in place.
+        """
+        merger = DictMerger(self.list_merge_strategy, self.list_merge_key)
+        merger.adopt(initial)
+        return merger
+
+    def _build_incremental(self, paths: list[str], ctx: dict, tracker: BuildTracker, merger: DictMerger) -> None:
+        """
+        Builds the configuration reusing the outputs of files whose inputs are unchanged since the previous build.
+        Each file is rendered with a separate tracker, so its dependencies and the context keys it reads are recorded.
+        The outputs of files are merged into provided merger.
+        """
+        graph_key = self._get_graph_key(paths, ctx)
+        previous_graph = None if graph_key is None else self._graph_cache.get(graph_key)
+        graph = DependencyGraph()
+        cfg_values = self._make_context_values()
+        render_ctx = LayeredContext(ctx, cfg_values)
+
+        for i, cfg_path in enumerate(paths):
+            stage = None if previous_graph is None else previous_graph.get_stage(i)
+            if stage is not None and stage.is_reusable(cfg_path, render_ctx):
+                cfg_iter = stage.load_output()
+            else:
+                stage_tracker = BuildTracker(with_digests=tracker.with_digests, memo=tracker.memo)
+                recording_ctx = RecordingContext(render_ctx)
+                cfg_iter, _ = self._render_stage(cfg_path, recording_ctx, stage_tracker)
+                stage = StageRecord(
+                    path=cfg_path,
+                    dependencies=stage_tracker.dependencies,
+                    nondeterministic=stage_tracker.nondeterministic,
+                    keys_read=StageRecord.capture_keys(recording_ctx.names_read, render_ctx, ctx),
+                    output=pickle.dumps(cfg_iter, protocol=pickle.HIGHEST_PROTOCOL),
+                )
+                graph.rendered_stages.append(i)
+            tracker.merge(stage.dependencies, stage.nondeterministic)
+            graph.stages.append(stage)
+
+            with observe_stage(self._observer, STAGE_MERGE, cfg_path):
+                merger.merge(cfg_iter)
+            self._add_context_values(cfg_values, cfg_iter, merger.result)
+
+        if graph_key is not None:
+            self._graph_cache.set(graph_key, graph)
+
+    def _render_independent_files(self, paths: list[str], ctx: dict, tracker: BuildTracker) -> "dict[int, Future]":
+        """
+        Starts rendering the configuration files which do not read the values defined by defaults
+        and the previous files. Returns the indices of files mapped to futures of their outputs.
+        Each file is rendered with a separate tracker, since the trackers are not thread-safe:
+        the futures return the outputs along with trackers, which are merged into the build tracker in order.
+        """
+        if self._uses_context_functions():
+            return {}
+        independent = []
+        defined_keys: set[str] | None = set(self.defaults)
+        for i, path in enumerate(paths):
+            outline = self._get_outline(path)
+            names = None if outline.names is None else outline.names - set(ctx)
+            if names is not None and (not names if defined_keys is None else names.isdisjoint(defined_keys)):
+                independent.append(i)
+            if defined_keys is not None:
+                defined_keys = None if outline.keys is None else defined_keys | outline.keys
+        if not independent or len(paths) < 2:
+            return {}
+
+        executor = self._get_executor()
+        # The files see only user context, since they do not read the configuration values
+        render_ctx = LayeredContext(ctx)
+        return {i: executor.submit(contextvars.copy_context().run, self._render_stage, paths[i], render_ctx,
+                                   BuildTracker(with_digests=tracker.with_digests, memo=tracker.memo))
+                for i in independent}
+
+    def _render_stage(self, path: str, ctx: Mapping, tracker: BuildTracker) -> tuple[dict, BuildTracker]:
+        """
+        Renders a configuration file with a separate tracker. Returns the output and the tracker
+        """
+        with tracking(tracker):
+            return self._render_cfg_from_file(path, ctx), tracker
+
+    def _uses_context_functions(self) -> bool:
+        """
+        Checks whether any global or filter receives the render context, so it might read any value
+        """
+        return any(getattr(getattr(func, "jinja_pass_arg", None), "name", None) == "context"
+                   for func in self.jinja_env_factory.get_functions())
+
+    def _get_executor(self) -> "ThreadPoolExecutor":
+        from concurrent.futures import ThreadPoolExecutor
+
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.parallel_workers,
+                                                    thread_name_prefix="configtpl-render")
+            return self._executor
+
+    def _find_required_files(self, paths: list[str], keys: set[str]) -> list[bool]:
+        """
+        Finds the configuration files which need to be rendered to build the provided top-level keys.
+        A file is required if it might define a required key. The names it reads become required too.
+        """
+        required = [False] * len(paths)
+        all_required = False
+        for i in reversed(range(len(paths))):
+            outline = self._get_outline(paths[i])
+            if all_required or outline.keys is None or not outline.keys.isdisjoint(keys):
+                required[i] = True
+                if outline.names is None:
+                    all_required = True
+                else:
+                    keys = keys | outline.names
+        return required
+
+    def _get_outline(self, path: str) -> "TemplateOutline":
+        from configtpl.jinja.analysis import outline_template
+
+        jinja_env = self.jinja_env_factory.get_fs_jinja_environment(os.path.dirname(path))
+        cached = self._outline_cache.get(path)
+        if cached is not None:
+            outline, env_ref, uptodate = cached
+            if env_ref() is jinja_env and all(check() for check in uptodate):
+                return outline
+        outline, uptodate = outline_template(jinja_env, os.path.basename(path))
+        self._outline_cache.set(path, (outline, weakref.ref(jinja_env), uptodate))
+        return outline
+
+    def _get_graph_key(self, paths: list[str], ctx: dict) -> str | None:
+        return make_fingerprint(paths, ctx, self.defaults, self._yaml_loader_name, self.list_merge_strategy,
+                                self.list_merge_key, self.jinja_env_factory.get_signature())
+
+    def _resolve_paths(self, paths_colon_separated: str | list[str]) -> list[str]:
+        """
+        Converts the path input into list of real paths
+        """
+        paths_colon_separated: list[str] = [paths_colon_separated] \
+            if isinstance(paths_colon_separated, str) \
+            else paths_colon_separated
+        paths: list[str] = []
+        for path_colon_separated in paths_colon_separated:
+            paths += [os.path.realpath(p) for p in path_colon_separated.split(":")]
+        return paths
+
+    def _render_cfg_from_file(self, path: str, ctx: Mapping) -> dict:
         """
         Renders a template file into config dictionary in two steps:
         1. Renders a file as Jinja template
@@ -112,13 +708,124 @@ class ConfigBuilder:
         """
         dir = os.path.dirname(path)
         filename = os.path.basename(path)
-        jinja_env = self.jinja_env_factory.get_fs_jinja_environment(dir)
+        with observe_stage(self._observer, STAGE_COMPILE, path):
+            jinja_env = self.jinja_env_factory.get_fs_jinja_environment(dir)
+            tpl = jinja_env.get_template(filename)
+        if self.low_memory:
+            return self._stream_cfg_from_template(tpl, path, ctx)
+        with observe_stage(self._observer, STAGE_RENDER, path) as stage:
+            tpl_rendered = render_template(tpl, ctx)
+            stage.set_output(tpl_rendered)
+        with observe_stage(self._observer, STAGE_PARSE, path):
+            return self._parse_yaml(tpl_rendered)
+
+    def _stream_cfg_from_template(self, tpl: "jinja2.Template", path: str, ctx: Mapping) -> dict:
+        """
+        Renders a template into config dictionary in low-memory mode. The YAML parser consumes the template
+        while it is being rendered, so rendering and parsing are reported as a single render stage
+        """
+        from configtpl.utils.yaml_stream import ChunkReader, load_yaml_stream
+
+        with observe_stage(self._observer, STAGE_RENDER, path) as stage:
+            reader = ChunkReader(generate_template(tpl, ctx))
+            cfg = load_yaml_stream(reader, self.yaml_loader)
+            stage.set_size(reader.size)
+        return cfg
+
+    async def _render_cfg_from_file_async(self, path: str, ctx: Mapping) -> dict:
+        """
+        Renders a template file into config dictionary in asynchronous mode
+        """
+        dir = os.path.dirname(path)
+        filename = os.path.basename(path)
+        import asyncio
+
+        with observe_stage(self._observer, STAGE_COMPILE, path):
+            jinja_env = self.jinja_env_factory.get_fs_jinja_environment(dir, enable_async=True)
+            tpl, prefetch = await asyncio.to_thread(self._load_async_template, jinja_env, filename)
+        with observe_stage(self._observer, STAGE_RENDER, path) as stage:
+            tpl_rendered = await render_template_async(tpl, ctx, prefetch)
+            stage.set_output(tpl_rendered)
+        with observe_stage(self._observer, STAGE_PARSE, path):
+            return await self._parse_yaml_async(tpl_rendered)
+
+    def _load_async_template(self, jinja_env: "jinja2.Environment",
+                             filename: str) -> "tuple[jinja2.Template, list[tuple[str, tuple]]]":
         tpl = jinja_env.get_template(filename)
-        tpl_rendered = tpl.render(ctx)
-        return yaml.load(tpl_rendered, Loader=yaml.FullLoader)
-
-    def _render_cfg_from_str(self, input: str, ctx: dict, work_dir: str) -> dict:
-        jinja_env = self.jinja_env_factory.get_fs_jinja_environment(work_dir)
-        tpl = jinja_env.from_string(input)
-        tpl_rendered = tpl.render(ctx)
-        return yaml.load(tpl_rendered, Loader=yaml.FullLoader)
+        calls = self._prefetch_calls.get(tpl)
+        if calls is None:
+            source = jinja_env.loader.get_source(jinja_env, filename)[0]
+            calls = self._find_prefetch_calls(tpl, jinja_env, source)
+        return tpl, calls
+
+    def _find_prefetch_calls(self, tpl: "jinja2.Template", jinja_env: "jinja2.Environment",
+                             source: str) -> list[tuple[str, tuple]]:
+        """
+        Finds the I/O calls which might be started concurrently before the template is rendered
+        """
+        calls = self._prefetch_calls.get(tpl)
+        if calls is None:
+            from configtpl.jinja.analysis import find_unconditional_calls
+
+            calls = list(find_unconditional_calls(jinja_env.parse(source), PREFETCH_GLOBALS))
+            self._prefetch_calls[tpl] = calls
+        return calls
+
+    def _render_cfg_from_str(self, input: str, ctx: Mapping, work_dir: str) -> dict:
+        with observe_stage(self._observer, STAGE_COMPILE, SOURCE_STRING):
+            tpl = self._get_str_template(input, work_dir)
+        with observe_stage(self._observer, STAGE_RENDER, SOURCE_STRING) as stage:
+            tpl_rendered = render_template(tpl, ctx)
+            stage.set_output(tpl_rendered)
+        with observe_stage(self._observer, STAGE_PARSE, SOURCE_STRING):
+            return self._parse_yaml(tpl_rendered)
+
+    @property
+    def yaml_loader(self) -> type:
+        """
+        The YAML loader class. It is resolved on first use
+        """
+        if self._yaml_loader is None:
+            self._yaml_loader = get_yaml_loader(*self._yaml_loader_spec)
+        return self._yaml_loader
+
+    @property
+    def _yaml_loader_name(self) -> str:
+        # The libyaml-backed and pure-Python loaders of the same family produce the same results,
+        # so the name does not require resolving the loader
+        loader = self._yaml_loader_spec[0]
+        return f"{loader.__module__}.{loader.__qualname__}" if isinstance(loader, type) else loader
+
+    def _parse_yaml(self, input: str) -> dict:
+        """
+        Parses the rendered template using the configured YAML loader
+        """
+        import yaml
+
+        return yaml.load(input, Loader=self.yaml_loader)
+
+    async def _parse_yaml_async(self, input: str) -> dict:
+        """
+        Parses the rendered template in a worker thread
+        """
+        import asyncio
+
+        return await asyncio.to_thread(self._parse_yaml, input)
+
+    def _get_str_template(self, input: str, work_dir: str,
+                          jinja_env: "jinja2.Environment | None" = None) -> "jinja2.Template":
+        """
+        Compiles a template from string. Compiled templates are cached by hash of template and working directory
+        """
+        if jinja_env is None:
+            jinja_env = self.jinja_env_factory.get_fs_jinja_environment(work_dir)
+        if self._str_template_cache is None:
+            return jinja_env.from_string(input)
+
+        key = (work_dir, jinja_env.is_async, hashlib.blake2b(input.encode(), digest_size=16).digest())
+        tpl = self._str_template_cache.get(key)
+        # The environment might be replaced in factory. Templates compiled for another environment are stale
+        if tpl is None or tpl.environment is not jinja_env:
+            tpl = jinja_env.from_string(input)
+            self._str_template_cache.set(key, tpl)
+        return tpl
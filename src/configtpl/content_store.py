@@ -0,0 +1,175 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import fnmatch
+import os
+import threading
+
+from configtpl.tracking import get_tracker
+
+
+@dataclass(frozen=True)
+class ContentStoreInfo:
+    """
+    Statistics of a content store
+    """
+    hits: int
+    misses: int
+    files: int
+    bytes: int
+    max_bytes: int | None
+    pinned: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class _Entry:
+    text: str
+    inode: int
+    mtime_ns: int
+    size: int
+    pinned: bool = False
+
+
+class ContentStore:
+    """
+    Keeps the contents of files which are read by `file()` global and the templates loaded by Jinja.
+
+    Files are keyed by real path and validated by `os.stat` on each read, so an unchanged file is read
+    from disk once per process. The least recently used files are evicted once the memory cap is reached.
+    Pinned files are never evicted.
+    """
+    def __init__(self, max_bytes: int | None = 64 * 1024 * 1024):
+        """
+        A constructor for content store
+
+        Args:
+            max_bytes (int | None): maximum total size of unpinned files to keep. None means no limit
+        """
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self._bytes = 0
+        self._pinned_bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def __call__(self, path: str) -> str:
+        """
+        Returns contents of file. This is the implementation of `file()` global
+
+        Args:
+            path (str): path to file
+        """
+        tracker = get_tracker()
+        if tracker is not None:
+            tracker.record_file(path)
+            if not os.path.isabs(path):
+                tracker.record_cwd()
+        return self.read(path)
+
+    def read(self, path: str, encoding: str = "utf-8") -> str:
+        """
+        Returns contents of file from the store. The file is read from disk if it is changed or not stored yet
+        """
+        return self.read_with_mtime(path, encoding)[0]
+
+    def read_with_mtime(self, path: str, encoding: str = "utf-8") -> tuple[str, int]:
+        """
+        Returns contents of file along with its modification time in nanoseconds
+        """
+        key = (os.path.realpath(path), encoding)
+        stat = os.stat(key[0])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.inode, entry.mtime_ns, entry.size) == \
+                    (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return entry.text, entry.mtime_ns
+            self._misses += 1
+
+        entry = self._load(key, pinned=entry is not None and entry.pinned)
+        return entry.text, entry.mtime_ns
+
+    def pin(self, path: str, encoding: str = "utf-8") -> None:
+        """
+        Reads a file into the store and keeps it there regardless of the memory cap
+        """
+        self._load((os.path.realpath(path), encoding), pinned=True)
+
+    def preload(self, dir: str, pattern: str = "*", pin: bool = False, encoding: str = "utf-8") -> int:
+        """
+        Reads the files of directory and its subdirectories into the store, e.g. the snippets at startup
+
+        Args:
+            dir (str): a directory to read the files from
+            pattern (str): a shell-style pattern of file names, e.g. '*.cfg'
+            pin (bool): pin the files, so they are never evicted
+            encoding (str): encoding of the files
+        Returns:
+            int: the number of files read
+        """
+        count = 0
+        for root, _, files in os.walk(dir):
+            for name in fnmatch.filter(files, pattern):
+                self._load((os.path.realpath(os.path.join(root, name)), encoding), pinned=pin)
+                count += 1
+        return count
+
+    def clear(self) -> None:
+        """
+        Removes all files from the store, including the pinned ones
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._pinned_bytes = 0
+
+    def info(self) -> ContentStoreInfo:
+        """
+        Returns statistics of the store
+        """
+        with self._lock:
+            return ContentStoreInfo(hits=self._hits, misses=self._misses, files=len(self._entries),
+                                    bytes=self._bytes, max_bytes=self.max_bytes,
+                                    pinned=sum(1 for e in self._entries.values() if e.pinned))
+
+    def __getstate__(self) -> dict:
+        return {"max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def _load(self, key: tuple[str, str], pinned: bool) -> _Entry:
+        with open(key[0], encoding=key[1]) as f:
+            # The file is validated by its status at the time of opening
+            stat = os.fstat(f.fileno())
+            entry = _Entry(text=f.read(), inode=stat.st_ino, mtime_ns=stat.st_mtime_ns, size=stat.st_size,
+                           pinned=pinned)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._account(previous, -1)
+            if pinned or self.max_bytes is None or entry.size <= self.max_bytes:
+                self._entries[key] = entry
+                self._account(entry, 1)
+                self._evict()
+        return entry
+
+    def _account(self, entry: _Entry, sign: int) -> None:
+        self._bytes += sign * entry.size
+        if entry.pinned:
+            self._pinned_bytes += sign * entry.size
+
+    def _evict(self) -> None:
+        if self.max_bytes is None or self._bytes - self._pinned_bytes <= self.max_bytes:
+            return
+        for key in [k for k, e in self._entries.items() if not e.pinned]:
+            self._account(self._entries.pop(key), -1)
+            if self._bytes - self._pinned_bytes <= self.max_bytes:
+                break
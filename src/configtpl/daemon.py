@@ -0,0 +1,353 @@
+import json
+import os
+import socket
+import stat
+import struct
+import threading
+from typing import TYPE_CHECKING, Any
+
+from configtpl.frozen import FrozenConfig
+from configtpl.snapshot import make_snapshot_key
+from configtpl.tracking import BuildDependencies, BuildTracker
+from configtpl.utils.cache import CacheInfo, LRUCache
+
+if TYPE_CHECKING:
+    import socketserver
+
+    from configtpl.config_builder import ConfigBuilder
+
+# Each message is a JSON document prefixed with its length as 4-byte big-endian integer
+_HEADER = struct.Struct(">I")
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+# How often the server checks for shutdown, in seconds
+POLL_INTERVAL = 0.1
+# The errors of a reused connection after which the request is sent again over a new connection
+_RETRIED_ERRORS = (BrokenPipeError, ConnectionResetError, ConnectionRefusedError, FileNotFoundError)
+
+
+class ConfigDaemonError(Exception):
+    """
+    An error reported by the daemon or a failure to reach it
+    """
+
+
+def send_message(sock: socket.socket, payload: bytes) -> None:
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def recv_message(sock: socket.socket) -> bytes | None:
+    """
+    Receives a message. Returns None if the connection is closed before a new message
+    """
+    header = _recv_exactly(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ConfigDaemonError(f"The message is too large: {size} bytes")
+    payload = _recv_exactly(sock, size)
+    if payload is None:
+        raise ConfigDaemonError("The connection is closed in the middle of a message")
+    return payload
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes | None:
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 1024 * 1024))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+class ConfigDaemon:
+    """
+    Serves built configurations to the processes of the same host over a Unix domain socket.
+
+    The daemon keeps one builder with its warm Jinja environments and the built configurations.
+    A configuration is requested by name and context. A cached configuration is served until any file,
+    template or environment variable it was built from is changed; then it is rebuilt on the next request.
+    The configurations are sent as JSON, so they must consist of JSON-compatible values.
+    See `ConfigClient` for the client side.
+    """
+    def __init__(self, builder: "ConfigBuilder", configs: dict[str, str | list[str]], socket_path: str,
+                 cache_size: int | None = 128, allow_nondeterministic: bool = False, socket_mode: int = 0o600):
+        """
+        A constructor for config daemon
+
+        Args:
+            builder (ConfigBuilder): a builder to build the configurations with
+            configs (dict[str, str | list[str]]): names of configurations mapped to their paths.
+                See `ConfigBuilder.build_from_files` for path format
+            socket_path (str): a path to the Unix domain socket. A stale socket file is replaced.
+                If another daemon is listening on the socket, `ConfigDaemonError` is raised on start
+            cache_size (int | None): how many built configurations to keep. None means no limit
+            allow_nondeterministic (bool): cache the configurations which call `uuid()` or `cmd()`.
+                Otherwise, they are built on each request
+            socket_mode (int): permissions of the socket file
+        """
+        self.builder = builder
+        self.configs = {name: builder._resolve_paths(paths) for name, paths in configs.items()}
+        self.socket_path = socket_path
+        self.allow_nondeterministic = allow_nondeterministic
+        self.socket_mode = socket_mode
+        self._cache = LRUCache(cache_size)
+        self._server: "socketserver.ThreadingUnixStreamServer | None" = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> "ConfigDaemon":
+        """
+        Compiles the templates and starts serving in a background thread
+        """
+        self._bind()
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": POLL_INTERVAL},
+                                        name="configtpl-daemon", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """
+        Compiles the templates and serves the requests in the current thread until `stop` is called
+        """
+        self._bind()
+        self._server.serve_forever(poll_interval=POLL_INTERVAL)
+
+    def stop(self) -> None:
+        """
+        Stops serving and removes the socket file
+        """
+        server, self._server = self._server, None
+        if server is None:
+            return
+        server.shutdown()
+        server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            os.remove(self.socket_path)
+        except OSError:
+            pass
+
+    def __enter__(self) -> "ConfigDaemon":
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Returns statistics of built configurations cache
+        """
+        return self._cache.info()
+
+    def handle(self, request: bytes) -> bytes:
+        """
+        Handles a request and returns the response. Build errors are reported in the response
+        """
+        try:
+            message = json.loads(request)
+            if message.get("op") == "ping":
+                return b'{"ok":true}'
+            config = self._get_config(message["name"], message.get("ctx"), message.get("overrides"))
+        except Exception as e:
+            return json.dumps({"ok": False, "error": f"{type(e).__name__}: {e}"}).encode()
+        return b'{"ok":true,"config":' + config + b"}"
+
+    def _get_config(self, name: str, ctx: dict | None, overrides: dict | None) -> bytes:
+        """
+        Returns a configuration encoded as JSON
+        """
+        if name not in self.configs:
+            raise KeyError(f"Unknown configuration: '{name}'")
+        paths = self.configs[name]
+        key = make_snapshot_key(self.builder, paths, overrides, ctx)
+        cached: tuple[BuildDependencies, bytes] | None = None if key is None else self._cache.get(key)
+        if cached is not None and cached[0].is_up_to_date():
+            return cached[1]
+
+        tracker = BuildTracker()
+        config, dependencies = self.builder._build_from_paths(paths, overrides, ctx, tracker=tracker)
+        encoded = json.dumps(config, separators=(",", ":")).encode()
+        if key is not None and (tracker.is_deterministic or self.allow_nondeterministic):
+            self._cache.set(key, (dependencies, encoded))
+        return encoded
+
+    def _bind(self) -> None:
+        import socketserver
+
+        self._remove_stale_socket()
+        for paths in self.configs.values():
+            self.builder.warm_up(paths)
+
+        daemon = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self) -> None:
+                # A connection might send any number of requests
+                while True:
+                    try:
+                        request = recv_message(self.request)
+                    except (OSError, ConfigDaemonError):
+                        return
+                    if request is None:
+                        return
+                    send_message(self.request, daemon.handle(request))
+
+        # The socket file is created with the permissions of umask, so it is restricted until chmod
+        umask = os.umask(0o777)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        finally:
+            os.umask(umask)
+        server.daemon_threads = True
+        try:
+            os.chmod(self.socket_path, self.socket_mode)
+        except OSError:
+            server.server_close()
+            raise
+        self._server = server
+
+    def _remove_stale_socket(self) -> None:
+        """
+        Removes the socket file left by a daemon which is not running anymore. The socket is stale
+        if nothing accepts the connections to it. Raises an error if the socket is in use or the path is not a socket
+        """
+        try:
+            mode = os.stat(self.socket_path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise ConfigDaemonError(f"The path is not a socket: {self.socket_path}")
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except ConnectionRefusedError:
+            os.remove(self.socket_path)
+            return
+        except FileNotFoundError:
+            return
+        finally:
+            sock.close()
+        raise ConfigDaemonError(f"Another daemon is listening on the socket: {self.socket_path}")
+
+
+class ConfigClient:
+    """
+    A client of `ConfigDaemon`. If the daemon is not reachable or fails to build a configuration,
+    the configuration is built in-process with the fallback builder, if it is provided.
+    The client is thread-safe: the requests of threads are sent over one connection in turn.
+    """
+    def __init__(self, socket_path: str, timeout: float | None = 5.0, fallback: "ConfigBuilder | None" = None,
+                 configs: dict[str, str | list[str]] | None = None, frozen: bool = False):
+        """
+        A constructor for config client
+
+        Args:
+            socket_path (str): a path to the Unix domain socket of the daemon
+            timeout (float | None): a timeout for connection and each request in seconds
+            fallback (ConfigBuilder | None): a builder to build the configurations in-process
+                if the daemon is unavailable. The errors are raised if None
+            configs (dict[str, str | list[str]] | None): names of configurations mapped to their paths
+                for the fallback builder. It should match the configurations of the daemon
+            frozen (bool): return the configurations as `FrozenConfig`
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.fallback = fallback
+        self.configs = {} if configs is None else configs
+        self.frozen = frozen
+        self._sock: socket.socket | None = None
+        self._lock = threading.Lock()
+
+    def get(self, name: str, ctx: dict | None = None, overrides: dict | None = None) -> dict | FrozenConfig:
+        """
+        Returns a configuration by name
+
+        Args:
+            name (str): a name of configuration
+            ctx (dict | None): additional rendering context. Must be JSON-serializable
+            overrides (dict | None): overrides of configuration. Must be JSON-serializable
+        """
+        try:
+            config = self._request({"op": "get", "name": name, "ctx": ctx, "overrides": overrides})["config"]
+        except ConfigDaemonError:
+            if self.fallback is None or name not in self.configs:
+                raise
+            config = self.fallback._build_from_paths(self.fallback._resolve_paths(self.configs[name]),
+                                                     overrides, ctx)[0]
+        return FrozenConfig(config) if self.frozen else config
+
+    def ping(self) -> bool:
+        """
+        Checks if the daemon is reachable
+        """
+        try:
+            self._request({"op": "ping"})
+        except ConfigDaemonError:
+            return False
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+    def __enter__(self) -> "ConfigClient":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _request(self, message: dict) -> dict:
+        try:
+            payload = json.dumps(message).encode()
+        except (TypeError, ValueError) as e:
+            raise ConfigDaemonError(f"The request cannot be serialized: {e}") from e
+
+        with self._lock:
+            response = self._send(payload)
+        result = json.loads(response)
+        if not result["ok"]:
+            raise ConfigDaemonError(result["error"])
+        return result
+
+    def _send(self, payload: bytes) -> bytes:
+        # A connection which is reused might be closed by the restarted daemon. Then the request is sent again.
+        # The timeouts are not retried, so a request takes no longer than the timeout
+        for retry in (self._sock is not None, False):
+            try:
+                if self._sock is None:
+                    self._connect()
+                send_message(self._sock, payload)
+                response = recv_message(self._sock)
+            except OSError as e:
+                self._disconnect()
+                if retry and isinstance(e, _RETRIED_ERRORS):
+                    continue
+                raise ConfigDaemonError(f"The daemon is not available: {e}") from e
+            except ConfigDaemonError:
+                self._disconnect()
+                raise
+            if response is not None:
+                return response
+            self._disconnect()
+            if not retry:
+                raise ConfigDaemonError("The daemon has closed the connection")
+
+    def _connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
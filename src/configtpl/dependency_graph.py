@@ -0,0 +1,80 @@
+from dataclasses import dataclass, field
+import hashlib
+import pickle
+from typing import Any, Mapping
+
+from configtpl.tracking import BuildDependencies
+
+_MISSING = object()
+
+
+def value_digest(value: Any) -> bytes | None:
+    """
+    Computes a digest of configuration value. Returns None if the value cannot be serialized
+    """
+    if value is _MISSING:
+        return b""
+    try:
+        return hashlib.blake2b(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), digest_size=16).digest()
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+
+
+@dataclass
+class StageRecord:
+    """
+    Inputs and output of a single configuration file rendered in `build_from_files`
+    """
+    path: str
+    dependencies: BuildDependencies
+    nondeterministic: set[str]
+    # Top-level keys of render context which are read by template, mapped to digests of their values
+    keys_read: dict[str, bytes | None]
+    output: bytes  # the pickled configuration produced by the file
+
+    @classmethod
+    def capture_keys(cls, names: set[str], render_ctx: Mapping, ignored: Mapping) -> dict[str, bytes | None]:
+        """
+        Computes digests of context values read by template
+
+        Args:
+            names (set[str]): names which are looked up by template
+            render_ctx (Mapping): the render context
+            ignored (Mapping): the context provided by user. It is a part of graph key, so it is not tracked
+        """
+        return {k: value_digest(render_ctx.get(k, _MISSING)) for k in names if k not in ignored}
+
+    def is_reusable(self, path: str, render_ctx: Mapping) -> bool:
+        """
+        Checks if the stage output is still valid: the file is the same, its dependencies are unchanged
+        and the values it reads from render context are the same
+        """
+        if path != self.path or self.nondeterministic or not self.dependencies.is_up_to_date():
+            return False
+        for k, digest in self.keys_read.items():
+            if digest is None or value_digest(render_ctx.get(k, _MISSING)) != digest:
+                return False
+        return True
+
+    def load_output(self) -> dict:
+        return pickle.loads(self.output)
+
+
+@dataclass
+class DependencyGraph:
+    """
+    Dependencies of configuration built from multiple files
+    """
+    stages: list[StageRecord] = field(default_factory=list)
+    # Indices of stages which were rendered during the last build. Other stages were reused from previous build
+    rendered_stages: list[int] = field(default_factory=list)
+
+    @property
+    def files(self) -> set[str]:
+        """
+        Returns all files which are read during build: configuration files, included templates and files
+        """
+        return {path for stage in self.stages for path in stage.dependencies.files}
+
+    def get_stage(self, i: int) -> StageRecord | None:
+        return self.stages[i] if i < len(self.stages) else None
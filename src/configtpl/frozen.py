@@ -0,0 +1,129 @@
+import sys
+from typing import Any, Iterator, Mapping
+
+_MISSING = object()
+
+
+class FrozenConfig(Mapping):
+    """
+    An immutable configuration. Nested dictionaries are converted into frozen configurations, lists into tuples
+    and sets into frozensets. The keys are interned, so the configurations built from the same files share them.
+
+    A frozen configuration might be shared between threads and request handlers without copying:
+    `copy.copy` and `copy.deepcopy` return the same object. The values are available by key, as attributes
+    and by dotted path:
+        cfg["server"]["port"] == cfg.server.port == cfg.get("server.port")
+    """
+    __slots__ = ("_data", "_hash")
+
+    def __init__(self, data: Mapping):
+        object.__setattr__(self, "_data", {sys.intern(k) if type(k) is str else k: freeze(v) for k, v in data.items()})
+        object.__setattr__(self, "_hash", None)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(f"No configuration key '{name}'") from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise TypeError("FrozenConfig is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise TypeError("FrozenConfig is immutable")
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """
+        Returns a value by key or by dotted path, e.g. 'server.port' or 'servers.0.host'.
+        A key which contains dots itself takes precedence over the path.
+        """
+        value = self._data.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if not isinstance(key, str) or "." not in key:
+            return default
+
+        value = self
+        for part in key.split("."):
+            if isinstance(value, FrozenConfig):
+                value = value._data.get(part, _MISSING)
+            elif isinstance(value, tuple) and part.lstrip("-").isdigit():
+                index = int(part)
+                value = value[index] if -len(value) <= index < len(value) else _MISSING
+            else:
+                return default
+            if value is _MISSING:
+                return default
+        return value
+
+    def to_dict(self) -> dict:
+        """
+        Converts the configuration into a new mutable dictionary. Tuples are converted back into lists
+        """
+        return thaw(self)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, FrozenConfig):
+            return self._data == other._data
+        if isinstance(other, Mapping):
+            return self.to_dict() == thaw(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash(frozenset(self._data.items())))
+        return self._hash
+
+    def __copy__(self) -> "FrozenConfig":
+        return self
+
+    def __deepcopy__(self, memo: dict) -> "FrozenConfig":
+        return self
+
+    def __reduce__(self) -> tuple:
+        return FrozenConfig, (self._data,)
+
+    def __repr__(self) -> str:
+        return f"FrozenConfig({self._data!r})"
+
+
+def freeze(value: Any) -> Any:
+    """
+    Converts a value into an immutable one recursively. See `FrozenConfig`
+    """
+    if isinstance(value, FrozenConfig):
+        return value
+    if isinstance(value, Mapping):
+        return FrozenConfig(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """
+    Converts a frozen value into a mutable one recursively
+    """
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    if isinstance(value, frozenset):
+        return set(value)
+    return value
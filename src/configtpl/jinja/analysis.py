@@ -0,0 +1,184 @@
+from dataclasses import dataclass
+import re
+from typing import Any, Callable, Iterator
+
+import jinja2
+from jinja2 import meta, nodes
+
+# The nodes whose children are evaluated conditionally, repeatedly or not evaluated at all
+_CONDITIONAL_NODES = (nodes.If, nodes.For, nodes.Macro, nodes.CallBlock, nodes.CondExpr, nodes.And, nodes.Or)
+
+
+def find_unconditional_calls(ast: nodes.Template, names: set[str]) -> Iterator[tuple[str, tuple[Any, ...]]]:
+    """
+    Finds the calls of global functions with constant arguments which are always evaluated when template is rendered,
+    i.e. the calls which are not nested into conditions, loops or macros.
+
+    Args:
+        ast (nodes.Template): a parsed template
+        names (set[str]): names of functions to find
+    Returns:
+        Iterator[tuple[str, tuple[Any, ...]]]: function names with their arguments
+    """
+    def walk(node: nodes.Node) -> Iterator[tuple[str, tuple[Any, ...]]]:
+        if isinstance(node, _CONDITIONAL_NODES):
+            return
+        if isinstance(node, nodes.Call) and isinstance(node.node, nodes.Name) and node.node.name in names \
+                and not node.kwargs and node.dyn_args is None and node.dyn_kwargs is None \
+                and all(isinstance(arg, nodes.Const) for arg in node.args):
+            yield node.node.name, tuple(arg.value for arg in node.args)
+        for child in node.iter_child_nodes():
+            yield from walk(child)
+
+    yield from walk(ast)
+
+
+@dataclass(frozen=True)
+class TemplateOutline:
+    """
+    A result of static analysis of configuration template
+
+    Args:
+        keys (frozenset[str] | None): top-level YAML keys which the template might define.
+            None if they cannot be determined, e.g. if a key is rendered from an expression
+        names (frozenset[str] | None): context names which the template and its included templates might read.
+            None if they cannot be determined, e.g. if a template name is not a constant
+    """
+    keys: frozenset[str] | None
+    names: frozenset[str] | None
+
+
+# A top-level key of YAML mapping: a quoted or plain scalar followed by a colon
+_KEY_RE = re.compile(r"""(?:"([^"\\]*)"|'([^']*)'|([^\s#&*!|>'"%@`{}\[\],?:-][^#]*?))\s*:(?:\s|$)""")
+
+
+class _OutlineBuilder:
+    """
+    Walks the template nodes in order of output and tracks whether the output might be at the beginning of a line.
+    A text at the beginning of a line is a top-level YAML key. An expression there makes the keys unknown.
+    """
+    def __init__(self, env: jinja2.Environment):
+        self.env = env
+        self.keys: set[str] | None = set()
+        self.names: set[str] | None = set()
+        self.uptodate: list[Callable[[], bool]] = []
+        self._stack: list[str] = []
+        self._macros: set[str] = set()
+
+    def template(self, name: str, line_start: bool) -> bool:
+        if name in self._stack:
+            self.keys = self.names = None
+            return line_start
+        source, _, uptodate = self.env.loader.get_source(self.env, name)
+        if uptodate is not None:
+            self.uptodate.append(uptodate)
+        ast = self.env.parse(source)
+        if self.names is not None:
+            self.names |= meta.find_undeclared_variables(ast)
+        self._macros |= {node.name for node in ast.find_all(nodes.Macro)}
+        for node in ast.find_all((nodes.Import, nodes.FromImport)):
+            if node.with_context:
+                self.names = None
+            if isinstance(node, nodes.Import):
+                self._macros.add(node.target)
+            else:
+                self._macros |= {name if isinstance(name, str) else name[1] for name in node.names}
+        self._stack.append(name)
+        try:
+            return self.body(ast.body, line_start)
+        finally:
+            self._stack.pop()
+
+    def body(self, body: list[nodes.Node], line_start: bool) -> bool:
+        for node in body:
+            line_start = self.node(node, line_start)
+        return line_start
+
+    def node(self, node: nodes.Node, line_start: bool) -> bool:
+        if isinstance(node, nodes.Output):
+            return self.output(node, line_start)
+        if isinstance(node, nodes.If):
+            states = [self.body(node.body, line_start), self.body(node.else_, line_start)]
+            states += [self.body(elif_.body, line_start) for elif_ in node.elif_]
+            return any(states)
+        if isinstance(node, nodes.For):
+            # The loop body might start after the previous iteration
+            body_start = line_start or self.body(node.body, line_start)
+            body_end = self.body(node.body, body_start)
+            return line_start or body_end or self.body(node.else_, line_start)
+        if isinstance(node, (nodes.With, nodes.Scope, nodes.ScopedEvalContextModifier, nodes.Block)):
+            return self.body(node.body, line_start)
+        if isinstance(node, nodes.Include):
+            return self.include(node, line_start)
+        if isinstance(node, (nodes.Extends, nodes.CallBlock, nodes.FilterBlock)):
+            self.keys = self.names = None
+            return False
+        # Statements which do not produce output, e.g. assignments and macro definitions
+        return line_start
+
+    def output(self, node: nodes.Output, line_start: bool) -> bool:
+        for child in node.nodes:
+            if isinstance(child, nodes.TemplateData):
+                line_start = self.text(child.data, line_start)
+            else:
+                self.expression(child, line_start)
+                line_start = False
+        return line_start
+
+    def include(self, node: nodes.Include, line_start: bool) -> bool:
+        if isinstance(node.template, nodes.Const) and isinstance(node.template.value, str):
+            try:
+                return self.template(node.template.value, line_start)
+            except jinja2.TemplateNotFound:
+                if node.ignore_missing:
+                    return line_start
+                raise
+        self.keys = self.names = None
+        return False
+
+    def expression(self, node: nodes.Expr, line_start: bool) -> None:
+        # A macro might render several lines, including the top-level keys
+        calls = [node] if isinstance(node, nodes.Call) else []
+        calls.extend(node.find_all(nodes.Call))
+        calls_macro = any(isinstance(call.node, nodes.Name) and call.node.name in self._macros
+                          or isinstance(call.node, nodes.Getattr) and isinstance(call.node.node, nodes.Name)
+                          and call.node.node.name in self._macros
+                          for call in calls)
+        if line_start or calls_macro:
+            self.keys = None
+
+    def text(self, data: str, line_start: bool) -> bool:
+        lines = data.split("\n")
+        for i, line in enumerate(lines):
+            if (line_start or i > 0) and self.keys is not None:
+                self.line(line)
+        return lines[-1] == "" if len(lines) > 1 else line_start and data == ""
+
+    def line(self, line: str) -> None:
+        if line.strip() == "" or line[0] in " \t#" or line.startswith(("---", "...")):
+            return
+        match = _KEY_RE.match(line)
+        key = None if match is None else next(group for group in match.groups() if group is not None)
+        if key is None or key == "<<":  # a merge key includes the keys of another mapping
+            self.keys = None
+        else:
+            self.keys.add(key)
+
+
+def outline_template(env: jinja2.Environment, name: str) -> tuple[TemplateOutline, list[Callable[[], bool]]]:
+    """
+    Finds the top-level keys which a configuration template might define and the context names it might read.
+    The included templates are analyzed too. The results are a superset of actual keys and names.
+
+    Args:
+        env (jinja2.Environment): an environment to load the template from
+        name (str): a template name
+    Returns:
+        tuple[TemplateOutline, list[Callable[[], bool]]]: an outline and the functions which check
+            whether the analyzed templates are up to date
+    """
+    builder = _OutlineBuilder(env)
+    builder.template(name, True)
+    outline = TemplateOutline(keys=None if builder.keys is None else frozenset(builder.keys),
+                              names=None if builder.names is None else frozenset(builder.names))
+    return outline, builder.uptodate
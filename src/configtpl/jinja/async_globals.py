@@ -0,0 +1,77 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from configtpl.content_store import ContentStore
+from configtpl.jinja import globals as jinja_globals
+from configtpl.jinja.cmd_runner import CmdRunner
+from configtpl.tracking import get_tracker
+
+
+def make_async_cmd(runner: CmdRunner) -> Callable[[str], Awaitable[str]]:
+    """
+    Creates an asynchronous version of `cmd()` global.
+    Commands are executed in worker threads, so independent commands run concurrently.
+    """
+    async def jinja_global_cmd_async(cmd: str) -> str:
+        """
+        Runs a system command provided as argument and returns the output
+
+        Args:
+            cmd (str): a command to execute
+        """
+        tracker = get_tracker()
+        if tracker is None:
+            return await asyncio.to_thread(runner.run, cmd)
+        tracker.record_nondeterministic("cmd")
+        return await _memoized(("cmd_async", cmd), lambda: asyncio.to_thread(runner.run, cmd))
+
+    return jinja_global_cmd_async
+
+
+def make_async_file(read: Callable[[str], str]) -> Callable[[str], Awaitable[str]]:
+    """
+    Creates an asynchronous version of `file()` global. The files are read with provided function,
+    e.g. a `ContentStore`, in worker threads
+    """
+    async def jinja_global_file_async(path: str) -> str:
+        """
+        Returns contents of file
+
+        Args:
+            path (str): path to file
+        """
+        if get_tracker() is None:
+            return await asyncio.to_thread(read, path)
+        return await _memoized(("file_async", path), lambda: asyncio.to_thread(read, path))
+
+    return jinja_global_file_async
+
+
+def make_async_globals(globals: dict) -> dict:
+    """
+    Replaces the standard I/O globals with their asynchronous versions.
+    Custom globals are kept as they are: Jinja calls synchronous functions in asynchronous mode too.
+    """
+    globals = dict(globals)
+    cmd = globals.get("cmd")
+    if cmd is jinja_globals.jinja_global_cmd:
+        globals["cmd"] = make_async_cmd(jinja_globals.default_cmd_runner)
+    elif isinstance(cmd, CmdRunner):
+        globals["cmd"] = make_async_cmd(cmd)
+    file = globals.get("file")
+    if file is jinja_globals.jinja_global_file:
+        globals["file"] = make_async_file(jinja_globals.jinja_global_file)
+    elif isinstance(file, ContentStore):
+        globals["file"] = make_async_file(file)
+    return globals
+
+
+def _memoized(key: tuple, factory: Callable[[], Awaitable[str]]) -> asyncio.Future:
+    """
+    Returns a task which is shared by all calls with the same key during a build
+    """
+    memo = get_tracker().memo
+    task = memo.get(key)
+    if task is None:
+        task = memo[key] = asyncio.ensure_future(factory())
+    return task
@@ -0,0 +1,53 @@
+import io
+import os
+
+import jinja2
+
+from configtpl.utils.files import atomic_write_bytes
+
+
+class FileSystemBytecodeCache(jinja2.FileSystemBytecodeCache):
+    """
+    A disk-backed cache of compiled templates which can be shared between processes.
+
+    Cache entries are keyed by template name, path and rendering mode, as the templates are compiled differently
+    for asynchronous environments. Each entry stores a checksum of template source,
+    so Jinja recompiles a template once its source is changed. Entries are written atomically,
+    therefore multiple processes might use the same directory concurrently.
+    """
+    def __init__(self, directory: str, pattern: str = "__configtpl_%s.cache"):
+        """
+        A constructor for bytecode cache
+
+        Args:
+            directory (str): a directory to store the compiled templates in. Created if it does not exist
+            pattern (str): a filename pattern for cache entries. '%s' is replaced with a cache key
+        """
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(directory, pattern)
+
+    def get_bucket(self, environment: jinja2.Environment, name: str, filename: str | None,
+                   source: str) -> jinja2.bccache.Bucket:
+        key = self.get_cache_key(name, filename)
+        if environment.is_async:
+            key += "-async"
+        bucket = jinja2.bccache.Bucket(environment, key, self.get_source_checksum(source))
+        self.load_bytecode(bucket)
+        return bucket
+
+    def dump_bytecode(self, bucket: jinja2.bccache.Bucket) -> None:
+        buffer = io.BytesIO()
+        bucket.write_bytecode(buffer)
+        atomic_write_bytes(self._get_cache_filename(bucket), buffer.getvalue())
+
+
+def make_bytecode_cache(bytecode_cache: jinja2.BytecodeCache | str | None) -> jinja2.BytecodeCache | None:
+    """
+    Converts the bytecode cache setting into cache instance.
+
+    Args:
+        bytecode_cache (jinja2.BytecodeCache | str | None): a cache instance, a path to cache directory or None
+    """
+    if isinstance(bytecode_cache, str):
+        return FileSystemBytecodeCache(bytecode_cache)
+    return bytecode_cache
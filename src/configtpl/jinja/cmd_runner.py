@@ -0,0 +1,179 @@
+from dataclasses import dataclass
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from configtpl.tracking import get_tracker
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+_concurrency_semaphore: threading.BoundedSemaphore | None = None
+
+
+def set_cmd_concurrency_limit(limit: int | None) -> None:
+    """
+    Limits the number of system commands which are executed concurrently in this process by `cmd()` global.
+
+    Args:
+        limit (int | None): maximum number of concurrent subprocesses. None removes the limit
+    """
+    global _concurrency_semaphore
+    _concurrency_semaphore = None if limit is None else threading.BoundedSemaphore(limit)
+
+
+@dataclass
+class CmdStats:
+    """
+    Statistics of a system command
+    """
+    calls: int = 0  # calls from templates, including the ones served from cache
+    executions: int = 0  # actual subprocess runs
+    total_time: float = 0.0  # total execution time in seconds
+    max_time: float = 0.0  # the slowest execution in seconds
+
+
+class CmdRunner:
+    """
+    Runs system commands for `cmd()` global.
+
+    The output of each command is memoized for the duration of a build, so repeated calls of the same command
+    in one or several configuration files spawn a single subprocess. Optionally, the output might be cached
+    across builds for a limited time.
+    """
+    def __init__(self, timeout: float | None = None, cache_ttl: float | None = None):
+        """
+        A constructor for command runner
+
+        Args:
+            timeout (float | None): a timeout for each command in seconds. `subprocess.TimeoutExpired` is raised
+                if a command does not complete in time
+            cache_ttl (float | None): cache the command output across builds for this number of seconds.
+                Commands are cached per working directory. None disables the cache
+        """
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        self._cache: dict[tuple[str, str], tuple[float, str]] = {}  # (cwd, cmd) -> (expiration time, output)
+        self._in_progress: dict[tuple[str, str], "Future"] = {}
+        self._stats: dict[str, CmdStats] = {}
+
+    def __call__(self, cmd: str) -> str:
+        """
+        Runs a system command provided as argument and returns the output
+
+        Args:
+            cmd (str): a command to execute
+        """
+        tracker = get_tracker()
+        if tracker is None:
+            return self._run_cached(cmd)
+
+        tracker.record_nondeterministic("cmd")
+        from concurrent.futures import Future
+
+        # The files of a build might be rendered in several threads. The command is executed once anyway
+        future = Future()
+        memoized = tracker.memo.setdefault(("cmd", cmd), future)
+        if memoized is not future:
+            self._count_call(cmd)
+            return memoized.result()
+        try:
+            future.set_result(self._run_cached(cmd))
+        except BaseException as e:
+            future.set_exception(e)
+        return future.result()
+
+    def run(self, cmd: str) -> str:
+        """
+        Runs a system command bypassing the memo of current build. The cache across builds is still used
+        """
+        return self._run_cached(cmd)
+
+    def stats(self) -> dict[str, CmdStats]:
+        """
+        Returns statistics of executed commands, the slowest ones first
+        """
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda item: item[1].total_time, reverse=True)
+            return {cmd: CmdStats(**vars(stats)) for cmd, stats in items}
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def __getstate__(self) -> dict:
+        return {"timeout": self.timeout, "cache_ttl": self.cache_ttl}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def _count_call(self, cmd: str) -> None:
+        with self._lock:
+            self._stats.setdefault(cmd, CmdStats()).calls += 1
+
+    def _run_cached(self, cmd: str) -> str:
+        if self.cache_ttl is None:
+            self._count_call(cmd)
+            return self._run(cmd)
+
+        from concurrent.futures import Future
+
+        key = (os.getcwd(), cmd)
+        with self._lock:
+            self._stats.setdefault(cmd, CmdStats()).calls += 1
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+            # If the same command is already running in another thread, wait for its result
+            future = self._in_progress.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_progress[key] = Future()
+
+        if not owner:
+            return future.result()
+        try:
+            output = self._run(cmd)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(output)
+            with self._lock:
+                self._cache[key] = (time.monotonic() + self.cache_ttl, output)
+            return output
+        finally:
+            with self._lock:
+                del self._in_progress[key]
+
+    def _run(self, cmd: str) -> str:
+        import subprocess
+
+        semaphore = _concurrency_semaphore
+        if semaphore is not None:
+            semaphore.acquire()
+        try:
+            kwargs = {} if self.timeout is None else {"timeout": self.timeout}
+            started = time.perf_counter()
+            result = subprocess.run(
+                cmd,
+                shell=True,
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                **kwargs,
+            )
+            duration = time.perf_counter() - started
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+        with self._lock:
+            stats = self._stats.setdefault(cmd, CmdStats())
+            stats.executions += 1
+            stats.total_time += duration
+            stats.max_time = max(stats.max_time, duration)
+        return result.stdout
@@ -0,0 +1,122 @@
+from collections import ChainMap
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Mapping
+
+if TYPE_CHECKING:
+    import jinja2
+
+
+class RecordingContext(Mapping):
+    """
+    A read-only render context which records the names looked up by template.
+    The names which are defined in template itself (e.g. with `set` statement) are not looked up in context.
+    """
+    __slots__ = ("_vars", "names_read")
+
+    def __init__(self, vars: Mapping):
+        self._vars = vars
+        self.names_read: set[str] = set()
+
+    def __getitem__(self, key: str) -> Any:
+        self.names_read.add(key)
+        return self._vars[key]
+
+    def __contains__(self, key: object) -> bool:
+        self.names_read.add(key)
+        return key in self._vars
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._vars)
+
+    def __len__(self) -> int:
+        return len(self._vars)
+
+    def copy(self) -> dict:
+        """
+        Returns a copy of context as a dictionary. Jinja copies the context to rewrite the traceback of errors
+        """
+        return dict(self)
+
+
+class LayeredContext(Mapping):
+    """
+    A read-only render context which looks up the names in several mappings in order, like `collections.ChainMap`.
+    The mappings are not copied, so the context reflects their later updates.
+    """
+    __slots__ = ("_layers",)
+
+    def __init__(self, *layers: Mapping):
+        self._layers = layers
+
+    def __getitem__(self, key: str) -> Any:
+        for layer in self._layers:
+            try:
+                return layer[key]
+            except KeyError:
+                pass
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return any(key in layer for layer in self._layers)
+
+    def __iter__(self) -> Iterator[str]:
+        keys: dict = {}
+        for layer in reversed(self._layers):
+            keys.update(dict.fromkeys(layer))
+        return iter(keys)
+
+    def __len__(self) -> int:
+        return len(set().union(*self._layers))
+
+    def copy(self) -> dict:
+        """
+        Returns a copy of context as a dictionary. Jinja copies the context to rewrite the traceback of errors
+        """
+        return dict(self)
+
+
+def render_template(tpl: "jinja2.Template", vars: Mapping) -> str:
+    """
+    Renders a template. Unlike `jinja2.Template.render`, the provided variables are not copied into a new dictionary,
+    so any mapping might be used as render context.
+    """
+    ctx = tpl.new_context(ChainMap(vars, tpl.globals), shared=True)
+    try:
+        return tpl.environment.concat(tpl.root_render_func(ctx))
+    except Exception:
+        return tpl.environment.handle_exception()
+
+
+def generate_template(tpl: "jinja2.Template", vars: Mapping) -> Iterator[str]:
+    """
+    Renders a template chunk by chunk like `jinja2.Template.generate`, with the render context of `render_template`
+    """
+    ctx = tpl.new_context(ChainMap(vars, tpl.globals), shared=True)
+    try:
+        yield from tpl.root_render_func(ctx)
+    except Exception:
+        tpl.environment.handle_exception()
+
+
+async def render_template_async(tpl: "jinja2.Template", vars: Mapping,
+                                prefetch: Iterable[tuple[str, tuple[Any, ...]]] = ()) -> str:
+    """
+    Renders a template in an environment with enabled asynchronous mode.
+
+    Args:
+        tpl (jinja2.Template): a template to render
+        vars (Mapping): render context
+        prefetch (Iterable[tuple[str, tuple[Any, ...]]]): calls of asynchronous globals to start before rendering.
+            The globals are expected to memoize their results, so the template receives the prefetched values.
+    """
+    import asyncio
+
+    tasks = [asyncio.ensure_future(tpl.globals[name](*args)) for name, args in prefetch
+             if name not in vars and asyncio.iscoroutinefunction(tpl.globals.get(name))]
+    ctx = tpl.new_context(ChainMap(vars, tpl.globals), shared=True)
+    try:
+        return tpl.environment.concat([chunk async for chunk in tpl.root_render_func(ctx)])
+    except Exception:
+        return tpl.environment.handle_exception()
+    finally:
+        # Prefetch errors are raised by rendering; here the tasks are only collected
+        await asyncio.gather(*tasks, return_exceptions=True)
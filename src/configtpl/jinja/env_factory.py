@@ -1,73 +1,268 @@
-import jinja2
-from typing import Callable
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Callable
 
-from configtpl.jinja import filters as jinja_filters
-from configtpl.jinja import globals as jinja_globals
-from configtpl.utils.dicts import dict_deep_merge
+from configtpl.content_store import ContentStore
+from configtpl.profiling import BuildObserver, instrument
+from configtpl.utils.cache import CacheInfo, LRUCache
+
+if TYPE_CHECKING:
+    import jinja2
+
+    from configtpl.jinja.environment import Environment
+
+
+def setting_name(value: Any) -> Any:
+    """
+    Returns a JSON-serializable representation of a setting which might be a function or a class,
+    e.g. a Jinja setting, global or filter. The functions are represented by their qualified names
+    """
+    if isinstance(value, (list, tuple)):
+        return [setting_name(item) for item in value]
+    if isinstance(value, dict):
+        return {str(k): setting_name(v) for k, v in value.items()}
+    if callable(value):
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', type(value).__qualname__)}"
+    return value
 
 
 class JinjaEnvFactory:
-    def __init__(self, constructor_args: dict | None = None, globals: dict | None = None, filters: dict | None = None):
+    def __init__(self, constructor_args: dict | None = None, globals: dict | None = None, filters: dict | None = None,
+                 bytecode_cache: "jinja2.BytecodeCache | str | None" = None, env_cache_size: int | None = 128,
+                 content_store: ContentStore | None = None, precompiled_templates: dict[str, str] | None = None):
         """
-        A constructor for Jinja Envoronment Factory
+        A constructor for Jinja Envoronment Factory.
+        Jinja, the standard globals and filters are imported once the first environment is created.
 
         Args:
             constructor_args (dict | None): argument for Jinja environment constructor
             globals (dict | None): globals to inject into Jinja environment
+            bytecode_cache (jinja2.BytecodeCache | str | None): a cache for compiled templates.
+                If a string is provided, compiled templates are stored on disk in this directory
+            env_cache_size (int | None): how many environments to keep. Each directory and rendering mode
+                has its own environment with its compiled templates. None means unbounded cache
+            content_store (ContentStore | None): a store for templates and files read by `file()` global.
+                If None, the files are read from disk
+            precompiled_templates (dict[str, str] | None): directories of templates mapped to the directories
+                or zip archives with their compiled templates. See `precompile_templates`
         """
-        self._constructor_args = dict_deep_merge(
-            {
-                "undefined": jinja2.StrictUndefined,
-            },
-            {} if constructor_args is None else constructor_args,
-        )
-        self._globals = dict_deep_merge(
-            {
-                "cmd": jinja_globals.jinja_global_cmd,
-                "cwd": jinja_globals.jinja_global_cwd,
-                "env": jinja_globals.jinja_global_env,
-                "file": jinja_globals.jinja_global_file,
-                "uuid": jinja_globals.jinja_global_uuid,
-            },
-            {} if globals is None else globals,
-        )
-        self._filters = dict_deep_merge(
-            {
-                "base64": jinja_filters.jinja_filter_base64,
-                "base64_decode": jinja_filters.jinja_filter_base64_decode,
-                "md5": jinja_filters.jinja_filter_md5,
-                "split_space": jinja_filters.jinja_filter_split_space,
-                "sha256": jinja_filters.jinja_filter_sha256,
-                "sha512": jinja_filters.jinja_filter_sha512,
-            },
-            {} if filters is None else filters,
-        )
-
-        self._fs_loader_cache = {}
+        self._constructor_args = {} if constructor_args is None else dict(constructor_args)
+        self._bytecode_cache = bytecode_cache
+        # Custom globals and filters. They take precedence over the standard ones
+        self._globals = {} if globals is None else dict(globals)
+        self._filters = {} if filters is None else dict(filters)
+        self._content_store = content_store
+        self._precompiled = {os.path.realpath(dir): target for dir, target in (precompiled_templates or {}).items()}
+        self._fs_loader_cache = LRUCache(env_cache_size)
+        # The generation is incremented once globals or filters are changed.
+        # Cached environments of older generations are updated on next use.
+        self._generation = 0
+        # Incremented once globals or filters are changed. Unlike the generation, it is not changed by observer
+        self._functions_version = 0
+        self._lock = threading.Lock()
+        self._observer: BuildObserver | None = None
 
     def set_global(self, k: str, v: Callable) -> None:
         """
-        Sets a global for children Jinja environments
+        Sets a global for children Jinja environments, including the ones which are already created
         """
-        self._globals[k] = v
+        with self._lock:
+            self._globals[k] = v
+            self._generation += 1
+            self._functions_version += 1
 
     def set_filter(self, k: str, v: Callable) -> None:
         """
-        Sets a filter for children Jinja environments
+        Sets a filter for children Jinja environments, including the ones which are already created
         """
-        self._filters[k] = v
+        with self._lock:
+            self._filters[k] = v
+            self._generation += 1
+            self._functions_version += 1
 
-    def get_fs_jinja_environment(self, dir: str) -> jinja2.Environment:
+    def get_global(self, k: str) -> Any:
         """
-        Creates an instance of Jinja environment with filesystem loaded for provided directory
+        Returns a global for children Jinja environments or None if it is not set
+        """
+        return self._get_globals().get(k)
+
+    def get_functions(self) -> list[Callable]:
+        """
+        Returns the globals and filters for children Jinja environments
+        """
+        with self._lock:
+            return [*self._get_globals().values(), *self._get_filters().values()]
+
+    def get_signature(self) -> list:
+        """
+        Returns a JSON-serializable description of the settings, globals and filters of children environments.
+        The built configurations depend on them, so the signature is a part of cache keys
+        """
+        with self._lock:
+            return [self._functions_version, setting_name(self._constructor_args),
+                    setting_name(self._get_globals()), setting_name(self._get_filters())]
+
+    def set_observer(self, observer: BuildObserver | None) -> None:
+        """
+        Sets an observer which receives the calls of globals and filters. The globals and filters are wrapped
+        only when an observer is set. None removes the observer
+        """
+        with self._lock:
+            self._observer = observer
+            self._generation += 1
+
+    @property
+    def content_store(self) -> ContentStore | None:
+        """
+        The store which is used to read the templates or None if the templates are read from disk
+        """
+        return self._content_store
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Returns statistics of environment cache
         """
-        if dir in self._fs_loader_cache:
-            return self._fs_loader_cache[dir]
+        return self._fs_loader_cache.info()
+
+    def __getstate__(self) -> dict:
+        # Jinja environments are not picklable. They are created again on demand
+        # The observer is not copied either, because it would not receive the calls from another process
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_observer"] = None
+        return state
 
-        jinja_env = jinja2.Environment(**self._constructor_args, loader=jinja2.FileSystemLoader(dir))
-        jinja_env.globals.update(self._globals)
-        jinja_env.filters.update(self._filters)
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
 
-        self._fs_loader_cache[dir] = jinja_env
+    def get_fs_jinja_environment(self, dir: str, enable_async: bool = False) -> "jinja2.Environment":
+        """
+        Creates an instance of Jinja environment with filesystem loaded for provided directory
 
+        Args:
+            dir (str): a directory to load the templates from
+            enable_async (bool): create an environment for asynchronous rendering.
+                The standard I/O globals are replaced with their asynchronous versions in such environment
+        """
+        jinja_env = self._fs_loader_cache.get_or_create((dir, enable_async),
+                                                        lambda: self._create_environment(dir, enable_async))
+        if jinja_env.generation != self._generation:
+            with self._lock:
+                if jinja_env.generation != self._generation:
+                    self._update_environment(jinja_env)
         return jinja_env
+
+    def precompile_templates(self, dir: str, target: str, zip: str | None = None, pattern: str = "*",
+                             enable_async: bool = False, ignore_errors: bool = True) -> int:
+        """
+        Compiles the templates of directory and its subdirectories into Python modules in advance.
+        The environments load them instead of compiling the templates once the output is configured
+        in `precompiled_templates`. The templates are compiled with the Jinja settings of this factory.
+
+        Args:
+            dir (str): a directory of templates
+            target (str): a directory or a zip archive to write the compiled templates into
+            zip (str | None): 'deflated' or 'stored' to write a zip archive. None writes a directory
+            pattern (str): a shell-style pattern of template file names, e.g. '*.cfg'
+            enable_async (bool): compile the templates for asynchronous rendering
+            ignore_errors (bool): skip the templates with syntax errors
+        Returns:
+            int: the number of compiled templates
+        """
+        from configtpl.jinja.precompile import precompile_templates
+
+        env = self._create_environment(dir, enable_async, use_precompiled=False)
+        # Jinja checks the filters and tests used by templates on compilation
+        self._update_environment(env)
+        return precompile_templates(env, target, zip=zip, pattern=pattern, ignore_errors=ignore_errors)
+
+    def _create_environment(self, dir: str, enable_async: bool, use_precompiled: bool = True) -> "Environment":
+        import jinja2
+
+        from configtpl.jinja.bytecode_cache import make_bytecode_cache
+        from configtpl.jinja.environment import Environment
+        from configtpl.jinja.loader import StoreFileSystemLoader
+
+        # A cache directory is converted into a cache instance once, so all environments share it
+        self._bytecode_cache = make_bytecode_cache(self._bytecode_cache)
+        args = {"undefined": jinja2.StrictUndefined, **self._constructor_args}
+        if self._bytecode_cache is not None:
+            args["bytecode_cache"] = self._bytecode_cache
+        env = Environment(**args, loader=StoreFileSystemLoader(dir, self.content_store), enable_async=enable_async)
+        if use_precompiled and self._precompiled:
+            self._use_precompiled(env, dir)
+        return env
+
+    def _use_precompiled(self, env: "Environment", dir: str) -> None:
+        """
+        Replaces the loader of environment with the one which loads the compiled templates,
+        if the templates of directory are compiled with the same Jinja settings
+        """
+        from configtpl.jinja.loader import PrecompiledLoader
+        from configtpl.jinja.precompile import environment_signature, read_manifest
+
+        # The templates of subdirectories are compiled with their paths relative to the compiled directory
+        real_dir = os.path.realpath(dir)
+        roots = [root for root in self._precompiled if real_dir == root or real_dir.startswith(root + os.sep)]
+        if not roots:
+            return
+        root = max(roots, key=len)
+        manifest = read_manifest(self._precompiled[root])
+        if manifest is None or manifest["signature"] != environment_signature(env):
+            return
+        prefix = os.path.relpath(real_dir, root).replace(os.sep, "/")
+        env.loader = PrecompiledLoader(dir, self.content_store, self._precompiled[root],
+                                       "" if prefix == "." else prefix, manifest["templates"])
+
+    def _get_globals(self) -> dict:
+        from configtpl.jinja import globals as jinja_globals
+
+        return {
+            "cmd": jinja_globals.jinja_global_cmd,
+            "cwd": jinja_globals.jinja_global_cwd,
+            "env": jinja_globals.jinja_global_env,
+            "file": jinja_globals.jinja_global_file if self._content_store is None else self._content_store,
+            "file_hash": jinja_globals.jinja_global_file_hash,
+            "uuid": jinja_globals.jinja_global_uuid,
+            **self._globals,
+        }
+
+    def _get_filters(self) -> dict:
+        from configtpl.jinja import filters as jinja_filters
+
+        return {
+            "base64": jinja_filters.jinja_filter_base64,
+            "base64_decode": jinja_filters.jinja_filter_base64_decode,
+            "md5": jinja_filters.jinja_filter_md5,
+            "split_space": jinja_filters.jinja_filter_split_space,
+            "sha256": jinja_filters.jinja_filter_sha256,
+            "sha512": jinja_filters.jinja_filter_sha512,
+            **self._filters,
+        }
+
+    def _update_environment(self, jinja_env: "Environment") -> None:
+        """
+        Applies current globals and filters to an environment. The compiled templates are kept,
+        because they look up globals and filters on rendering
+        """
+        import jinja2
+
+        from configtpl.jinja.async_globals import make_async_globals
+
+        # The built-in globals and filters of Jinja are included, so they are measured by observer
+        # and restored once the observer is removed
+        globals = self._get_globals()
+        if jinja_env.is_async:
+            globals = make_async_globals(globals)
+        globals = {**jinja2.defaults.DEFAULT_NAMESPACE, **globals}
+        filters = {**jinja2.defaults.DEFAULT_FILTERS, **self._get_filters()}
+        if self._observer is not None:
+            # The classes, e.g. 'range' or 'namespace', are kept as they are, so templates might read their attributes
+            # and pass them to `isinstance` checks
+            globals = {k: instrument(v, "global", k, self._observer) if callable(v) and not isinstance(v, type) else v
+                       for k, v in globals.items()}
+            filters = {k: instrument(v, "filter", k, self._observer) for k, v in filters.items()}
+        jinja_env.globals.update(globals)
+        jinja_env.filters.update(filters)
+        jinja_env.generation = self._generation
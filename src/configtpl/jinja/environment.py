@@ -0,0 +1,27 @@
+from typing import Any
+
+import jinja2
+
+from configtpl.tracking import get_tracker
+
+
+class Environment(jinja2.Environment):
+    """
+    Jinja environment which reports the loaded templates (including the included, imported and extended ones)
+    to the tracker of current build
+    """
+    # A generation of globals and filters of the environment factory which are applied to this environment
+    generation: int = -1
+
+    def get_template(self, *args: Any, **kwargs: Any) -> jinja2.Template:
+        return _track(super().get_template(*args, **kwargs))
+
+    def select_template(self, *args: Any, **kwargs: Any) -> jinja2.Template:
+        return _track(super().select_template(*args, **kwargs))
+
+
+def _track(tpl: jinja2.Template) -> jinja2.Template:
+    tracker = get_tracker()
+    if tracker is not None:
+        tracker.record_file(tpl.filename)
+    return tpl
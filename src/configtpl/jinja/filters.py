@@ -2,26 +2,43 @@ import base64
 import hashlib
 
 
+def _to_bytes(input: str | bytes) -> bytes:
+    """
+    Strings are converted into UTF-8. Bytes-like values are hashed and encoded as is, without copying.
+    Other values are rejected
+    """
+    if isinstance(input, str):
+        return input.encode()
+    if isinstance(input, (bytes, bytearray, memoryview)):
+        return input
+
+    from jinja2 import Undefined
+
+    if isinstance(input, Undefined):
+        input._fail_with_undefined_error()
+    raise TypeError(f"A string or bytes are expected, got: '{type(input).__name__}'")
+
+
 def jinja_filter_split_space(input: str) -> list[str]:
     """Splits a multiline string into list of strings where each item is a line"""
     return input.strip().split()
 
 
-def jinja_filter_md5(input_string: str) -> str:
-    return hashlib.md5(input_string.encode()).hexdigest()
+def jinja_filter_md5(input_string: str | bytes) -> str:
+    return hashlib.md5(_to_bytes(input_string)).hexdigest()
 
 
-def jinja_filter_sha256(input_string: str) -> str:
-    return hashlib.sha256(input_string.encode()).hexdigest()
+def jinja_filter_sha256(input_string: str | bytes) -> str:
+    return hashlib.sha256(_to_bytes(input_string)).hexdigest()
 
 
-def jinja_filter_sha512(input_string: str) -> str:
-    return hashlib.sha512(input_string.encode()).hexdigest()
+def jinja_filter_sha512(input_string: str | bytes) -> str:
+    return hashlib.sha512(_to_bytes(input_string)).hexdigest()
 
 
-def jinja_filter_base64(input_string: str) -> str:
-    return base64.b64encode(input_string.encode()).decode()
+def jinja_filter_base64(input_string: str | bytes) -> str:
+    return base64.b64encode(_to_bytes(input_string)).decode()
 
 
-def jinja_filter_base64_decode(encoded_string: str) -> str:
-    return base64.b64decode(encoded_string.encode()).decode()
+def jinja_filter_base64_decode(encoded_string: str | bytes) -> str:
+    return base64.b64decode(_to_bytes(encoded_string)).decode()
@@ -1,30 +1,30 @@
 import os
-import subprocess
-import uuid
+
+from configtpl.jinja.cmd_runner import CmdRunner
+from configtpl.tracking import get_tracker
+from configtpl.utils.files import file_hash
+
+default_cmd_runner = CmdRunner()
 
 
 def jinja_global_cmd(cmd: str) -> str:
     """
-    Runs a system command provided as argument and returns the output
+    Runs a system command provided as argument and returns the output.
+    The output is memoized during a build, see `CmdRunner`.
 
     Args:
         cmd (str): a command to execute
     """
-    result = subprocess.run(
-        cmd,
-        shell=True,
-        check=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
-    return result.stdout
+    return default_cmd_runner(cmd)
 
 
 def jinja_global_cwd() -> str:
     """
     Returns the current working directory
     """
+    tracker = get_tracker()
+    if tracker is not None:
+        tracker.record_cwd()
     return os.getcwd()
 
 
@@ -36,6 +36,9 @@ def jinja_global_env(name: str, default: str | None = "") -> str | None:
         name (str): name of environment variable
         default (str | None): a default value to return
     """
+    tracker = get_tracker()
+    if tracker is not None:
+        tracker.record_env(name)
     v = os.getenv(name, default)
     if v is None:
         raise ValueError(f"An environment variable '{name}' is not set and no default value is provided.")
@@ -44,17 +47,48 @@ def jinja_global_env(name: str, default: str | None = "") -> str | None:
 
 def jinja_global_file(path: str) -> str:
     """
-    Returns contents of file
+    Returns contents of file. To keep the contents of unchanged files in memory, see `ContentStore`
 
     Args:
         path (str): path to file
     """
+    tracker = get_tracker()
+    if tracker is not None:
+        tracker.record_file(path)
+        if not os.path.isabs(path):
+            tracker.record_cwd()
     with open(path, "r") as f:
         return f.read()
 
 
+def jinja_global_file_hash(path: str, algorithm: str = "sha256") -> str:
+    """
+    Returns a hex digest of file contents. Unlike `file(path) | sha256`, the file is hashed in chunks
+    and the digest is memoized until the file is changed, so large files are cheap to hash on every build.
+
+    Args:
+        path (str): path to file
+        algorithm (str): a hash algorithm, e.g. 'md5', 'sha256' or 'sha512'
+    """
+    tracker = get_tracker()
+    if tracker is not None:
+        tracker.record_file(path)
+        if not os.path.isabs(path):
+            tracker.record_cwd()
+    return file_hash(path, algorithm)
+
+
 def jinja_global_uuid() -> str:
     """
     Generates UUID
     """
+    import uuid
+
+    _record_nondeterministic("uuid")
     return str(uuid.uuid4())
+
+
+def _record_nondeterministic(name: str) -> None:
+    tracker = get_tracker()
+    if tracker is not None:
+        tracker.record_nondeterministic(name)
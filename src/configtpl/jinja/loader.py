@@ -0,0 +1,87 @@
+import os
+import posixpath
+from typing import Callable
+
+import jinja2
+from jinja2.loaders import split_template_path
+
+from configtpl.content_store import ContentStore
+from configtpl.jinja.precompile import source_checksum
+
+
+class StoreFileSystemLoader(jinja2.FileSystemLoader):
+    """
+    A file system loader which reads the templates through a content store,
+    so the templates shared by several environments or builders are read from disk once.
+    Without a store, the templates are read from disk like by the parent loader
+    """
+    def __init__(self, searchpath: str | list[str], store: ContentStore | None, encoding: str = "utf-8"):
+        super().__init__(searchpath, encoding=encoding)
+        self.store = store
+
+    def get_source(self, environment: jinja2.Environment, template: str) -> tuple[str, str, Callable[[], bool]]:
+        if self.store is None:
+            return super().get_source(environment, template)
+        pieces = split_template_path(template)
+        for searchpath in self.searchpath:
+            # Use posixpath even on Windows to avoid "drive:" or UNC segments breaking out of the search directory
+            filename = posixpath.join(searchpath, *pieces)
+            if os.path.isfile(filename):
+                break
+        else:
+            raise jinja2.TemplateNotFound(template, f"{template!r} not found in search path: "
+                                                    f"{', '.join(repr(p) for p in self.searchpath)}")
+
+        try:
+            contents, mtime_ns = self.store.read_with_mtime(filename, self.encoding)
+        except OSError:
+            # The file cannot be validated by its status, e.g. it is removed concurrently. It is not stored then
+            return super().get_source(environment, template)
+
+        def uptodate() -> bool:
+            try:
+                return os.stat(filename).st_mtime_ns == mtime_ns
+            except OSError:
+                return False
+
+        return contents, os.path.normpath(filename), uptodate
+
+
+class PrecompiledLoader(StoreFileSystemLoader):
+    """
+    A file system loader which takes the templates compiled in advance by `JinjaEnvFactory.precompile_templates`.
+    The compiled modules are imported through Jinja's `ModuleLoader`. A compiled template is used only if its source
+    is unchanged since compilation, otherwise the template is compiled from source like by the parent loader.
+    The sources are read anyway, so the builds track them and the static analysis of templates works as usual.
+    """
+    def __init__(self, searchpath: str, store: ContentStore | None, modules_path: str, prefix: str,
+                 checksums: dict[str, str], encoding: str = "utf-8"):
+        """
+        A constructor for precompiled template loader
+
+        Args:
+            searchpath (str): a directory to load the templates from
+            store (ContentStore | None): a store to read the sources through or None to read them from disk
+            modules_path (str): a directory or a zip archive with compiled templates
+            prefix (str): a path of `searchpath` relative to the directory the templates were compiled for
+            checksums (dict[str, str]): the checksums of compiled sources keyed by template name
+        """
+        super().__init__(searchpath, store, encoding=encoding)
+        self.modules = jinja2.ModuleLoader(modules_path)
+        self.prefix = prefix
+        self.checksums = checksums
+
+    def load(self, environment: jinja2.Environment, name: str, globals: dict | None = None) -> jinja2.Template:
+        source, filename, uptodate = self.get_source(environment, name)
+        key = "/".join(split_template_path(posixpath.join(self.prefix, name)))
+        if self.checksums.get(key) != source_checksum(source):
+            return super().load(environment, name, globals)
+        try:
+            tpl = self.modules.load(environment, key, globals)
+        except jinja2.TemplateNotFound:
+            return super().load(environment, name, globals)
+
+        # A compiled module refers to its own file. The source is reported instead, so the builds track it
+        tpl.name, tpl.filename = name, filename
+        tpl._uptodate = uptodate
+        return tpl
@@ -0,0 +1,110 @@
+import fnmatch
+import hashlib
+import json
+import os
+import posixpath
+import zipfile
+from typing import TYPE_CHECKING
+
+from configtpl.jinja.env_factory import setting_name
+from configtpl.utils.files import atomic_write_bytes
+
+if TYPE_CHECKING:
+    import jinja2
+
+# The manifest is stored along with the compiled templates in the target directory or archive
+PRECOMPILED_MANIFEST = "configtpl_manifest.json"
+PRECOMPILED_VERSION = 1
+PRECOMPILED_ZIP_MODES = ("deflated", "stored")
+
+
+def source_checksum(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def environment_signature(env: "jinja2.Environment") -> list:
+    """
+    Returns the settings of environment which affect the compiled code of templates.
+    The compiled templates are used only by the environments with the same signature
+    """
+    import jinja2
+
+    return [
+        jinja2.__version__, env.is_async, env.block_start_string, env.block_end_string,
+        env.variable_start_string, env.variable_end_string, env.comment_start_string, env.comment_end_string,
+        env.line_statement_prefix, env.line_comment_prefix, env.trim_blocks, env.lstrip_blocks,
+        env.newline_sequence, env.keep_trailing_newline, env.optimized, sorted(env.extensions),
+        setting_name(env.autoescape), setting_name(env.finalize),
+    ]
+
+
+def precompile_templates(env: "jinja2.Environment", target: str, zip: str | None = None, pattern: str = "*",
+                         ignore_errors: bool = True) -> int:
+    """
+    Compiles the templates of environment into Python modules like Jinja's `compile_templates`
+    and writes the manifest with checksums of their sources. Only the compiled templates are listed in the manifest
+
+    Args:
+        env (jinja2.Environment): an environment with file system loader and the globals and filters
+            which the templates use
+        target (str): a directory or a zip archive to write the modules into
+        zip (str | None): 'deflated' or 'stored' to write a zip archive. None writes a directory
+        pattern (str): a shell-style pattern of template file names, e.g. '*.cfg'
+        ignore_errors (bool): skip the templates with syntax errors. They are compiled from source at runtime
+    Returns:
+        int: the number of compiled templates
+    """
+    import jinja2
+
+    if zip is not None and zip not in PRECOMPILED_ZIP_MODES:
+        raise ValueError(f"Unknown zip mode: '{zip}'. Available modes: {', '.join(PRECOMPILED_ZIP_MODES)}")
+
+    def filter_func(name: str) -> bool:
+        return fnmatch.fnmatch(posixpath.basename(name), pattern)
+
+    modules: dict[str, str] = {}
+    templates: dict[str, str] = {}
+    for name in env.list_templates(filter_func=filter_func):
+        source, filename, _ = env.loader.get_source(env, name)
+        try:
+            code = env.compile(source, name, filename, raw=True, defer_init=True)
+        except jinja2.TemplateSyntaxError:
+            if not ignore_errors:
+                raise
+            continue
+        modules[jinja2.ModuleLoader.get_module_filename(name)] = code
+        templates[name] = source_checksum(source)
+
+    modules[PRECOMPILED_MANIFEST] = json.dumps({
+        "version": PRECOMPILED_VERSION,
+        "signature": environment_signature(env),
+        "templates": templates,
+    })
+    if zip is None:
+        os.makedirs(target, exist_ok=True)
+        for filename, code in modules.items():
+            atomic_write_bytes(os.path.join(target, filename), code.encode())
+    else:
+        compression = zipfile.ZIP_DEFLATED if zip == "deflated" else zipfile.ZIP_STORED
+        with zipfile.ZipFile(target, "w", compression) as f:
+            for filename, code in modules.items():
+                f.writestr(filename, code)
+    return len(templates)
+
+
+def read_manifest(target: str) -> dict | None:
+    """
+    Reads the manifest of precompiled templates. Returns None if it is missing or invalid
+    """
+    try:
+        if zipfile.is_zipfile(target):
+            with zipfile.ZipFile(target) as f:
+                manifest = json.loads(f.read(PRECOMPILED_MANIFEST))
+        else:
+            with open(os.path.join(target, PRECOMPILED_MANIFEST), "rb") as f:
+                manifest = json.loads(f.read())
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != PRECOMPILED_VERSION:
+        return None
+    return manifest
@@ -0,0 +1,201 @@
+from dataclasses import asdict, dataclass
+import functools
+import inspect
+import json
+import threading
+import time
+from typing import Any, Callable
+
+# Build stages reported to observers
+STAGE_COMPILE = "compile"  # loading and compiling a template, including the included ones
+STAGE_RENDER = "render"  # rendering a template
+STAGE_PARSE = "parse"  # parsing the rendered YAML
+STAGE_MERGE = "merge"  # merging a configuration file or overrides into configuration
+
+# Sources of stages which are not files
+SOURCE_STRING = "<string>"
+SOURCE_OVERRIDES = "<overrides>"
+
+
+class BuildObserver:
+    """
+    Receives the measurements of builds. An observer is attached with `ConfigBuilder.set_observer`.
+    The methods are called from the threads which run the builds, so the implementations must be thread-safe.
+    """
+    def on_stage(self, stage: str, source: str, duration: float, size: int | None) -> None:
+        """
+        Called once a build stage is completed
+
+        Args:
+            stage (str): a stage, e.g. 'render'. See STAGE_* constants
+            source (str): a path to configuration file, '<string>' or '<overrides>'
+            duration (float): duration of the stage in seconds
+            size (int | None): the size of rendered text in bytes for 'render' stage, None for other stages
+        """
+
+    def on_call(self, kind: str, name: str, duration: float) -> None:
+        """
+        Called after a global or filter is called from a template
+
+        Args:
+            kind (str): 'global' or 'filter'
+            name (str): a name of global or filter
+            duration (float): duration of the call in seconds
+        """
+
+
+class _Stage:
+    """
+    Measures a build stage and reports it to observer
+    """
+    __slots__ = ("_observer", "_stage", "_source", "_size", "_started")
+
+    def __init__(self, observer: BuildObserver, stage: str, source: str):
+        self._observer = observer
+        self._stage = stage
+        self._source = source
+        self._size = None
+
+    def set_output(self, output: str) -> None:
+        self._size = len(output.encode())
+
+    def set_size(self, size: int) -> None:
+        self._size = size
+
+    def __enter__(self) -> "_Stage":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, *args: Any) -> None:
+        if exc_type is None:
+            self._observer.on_stage(self._stage, self._source, time.perf_counter() - self._started, self._size)
+
+
+class _NullStage:
+    """
+    A stage which is used when no observer is attached. It measures nothing
+    """
+    __slots__ = ()
+
+    def set_output(self, output: str) -> None:
+        pass
+
+    def set_size(self, size: int) -> None:
+        pass
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def observe_stage(observer: BuildObserver | None, stage: str, source: str) -> _Stage | _NullStage:
+    """
+    Returns a context manager which measures a build stage
+    """
+    return _NULL_STAGE if observer is None else _Stage(observer, stage, source)
+
+
+def instrument(func: Callable, kind: str, name: str, observer: BuildObserver) -> Callable:
+    """
+    Wraps a global or filter, so its calls are reported to observer.
+    The attributes of function, e.g. the ones set by `jinja2.pass_context`, are preserved.
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                observer.on_call(kind, name, time.perf_counter() - started)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            observer.on_call(kind, name, time.perf_counter() - started)
+    return wrapper
+
+
+@dataclass
+class StageStats:
+    """
+    Statistics of a build stage of a single source
+    """
+    count: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    total_size: int = 0  # total size of rendered text in bytes
+
+
+@dataclass
+class CallStats:
+    """
+    Statistics of a global or filter
+    """
+    count: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+
+
+class ProfileReport(BuildObserver):
+    """
+    An observer which aggregates the measurements into a structured report
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: dict[tuple[str, str], StageStats] = {}
+        self._calls: dict[tuple[str, str], CallStats] = {}
+
+    def on_stage(self, stage: str, source: str, duration: float, size: int | None) -> None:
+        with self._lock:
+            stats = self._stages.setdefault((stage, source), StageStats())
+            stats.count += 1
+            stats.total_time += duration
+            stats.max_time = max(stats.max_time, duration)
+            if size is not None:
+                stats.total_size += size
+
+    def on_call(self, kind: str, name: str, duration: float) -> None:
+        with self._lock:
+            stats = self._calls.setdefault((kind, name), CallStats())
+            stats.count += 1
+            stats.total_time += duration
+            stats.max_time = max(stats.max_time, duration)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._calls.clear()
+
+    def report(self) -> dict:
+        """
+        Returns the report as a JSON-serializable dictionary. The slowest items are listed first:
+            {
+                "stages": {"render": {"total_time": ..., "sources": [{"source": ..., "count": ..., ...}]}},
+                "calls": [{"kind": "global", "name": "cmd", "count": ..., "total_time": ..., "max_time": ...}],
+            }
+        """
+        with self._lock:
+            stages: dict[str, dict] = {}
+            for (stage, source), stats in sorted(self._stages.items(), key=lambda item: -item[1].total_time):
+                stage_report = stages.setdefault(stage, {"total_time": 0.0, "sources": []})
+                stage_report["total_time"] += stats.total_time
+                stage_report["sources"].append({"source": source, **asdict(stats)})
+            calls = [{"kind": kind, "name": name, **asdict(stats)}
+                     for (kind, name), stats in sorted(self._calls.items(), key=lambda item: -item[1].total_time)]
+        return {"stages": stages, "calls": calls}
+
+    def to_json(self, **kwargs: Any) -> str:
+        """
+        Returns the report in JSON format. Keyword arguments are passed to `json.dumps`
+        """
+        return json.dumps(self.report(), **kwargs)
@@ -0,0 +1,176 @@
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+import pickle
+from typing import Any
+
+from configtpl.tracking import BuildDependencies, BuildTracker
+from configtpl.utils.cache import CacheInfo, LRUCache
+from configtpl.utils.files import atomic_write_bytes, make_private_dir
+
+
+def make_fingerprint(*inputs: Any) -> str | None:
+    """
+    Computes a fingerprint of JSON-serializable inputs. Returns None if the inputs cannot be serialized.
+    The types of dictionary keys and tuples are preserved, e.g. `{1: 'a'}` and `{'1': 'a'}` have different
+    fingerprints, although they are serialized into the same JSON
+    """
+    try:
+        serialized = json.dumps(_with_types(inputs), sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+# The types of dictionary keys which are serialized
+_KEY_TYPES = (str, int, float, bool, type(None))
+
+
+def _with_types(value: Any) -> Any:
+    """
+    Converts a value into JSON-compatible one which keeps the types lost by JSON serialization.
+    The dictionary keys are prefixed with their types, so a dictionary with prefixed keys cannot be confused
+    with a tuple, which is converted into a dictionary with a single unprefixed key
+    """
+    if isinstance(value, dict):
+        result = {}
+        for k, v in value.items():
+            if type(k) not in _KEY_TYPES:
+                raise TypeError(f"Unsupported key type: {type(k).__name__}")
+            result[f"{type(k).__name__}:{k!r}"] = _with_types(v)
+        return result
+    if isinstance(value, list):
+        return [_with_types(item) for item in value]
+    if isinstance(value, tuple):
+        return {"tuple": [_with_types(item) for item in value]}
+    return value
+
+
+@dataclass
+class CachedResult:
+    """
+    A built configuration along with the dependencies it was built from
+    """
+    dependencies: BuildDependencies
+    payload: bytes  # the pickled configuration
+
+    def load(self) -> dict:
+        return pickle.loads(self.payload)
+
+
+class ResultCache:
+    """
+    A cache of built configurations.
+
+    Entries are keyed by a fingerprint of build arguments (paths, context, overrides and defaults).
+    Each entry also stores the dependencies which were recorded during the build: modification time and size
+    (optionally content hash) of each template, included template and file, the environment variables
+    and the working directory if a template has read them. An entry is discarded once any dependency is changed.
+    """
+    def __init__(self, max_size: int | None = 128, cache_dir: str | None = None, use_content_hash: bool = False,
+                 allow_nondeterministic: bool = False):
+        """
+        A constructor for result cache
+
+        Args:
+            max_size (int | None): maximum number of configurations to keep in memory. None means no limit
+            cache_dir (str | None): a directory to store the configurations on disk. Disk cache is disabled if None.
+                The cache files are unpickled, so the directory must be private: it is created with 0700 permissions,
+                and an existing directory must be owned by the current user and not accessible by others
+            use_content_hash (bool): compare the content hash of files if their modification time is changed
+            allow_nondeterministic (bool): cache the configurations which call non-deterministic functions
+                like `uuid()` or `cmd()`
+        """
+        self._memory = LRUCache(max_size)
+        self.cache_dir = cache_dir
+        self.use_content_hash = use_content_hash
+        self.allow_nondeterministic = allow_nondeterministic
+        if cache_dir is not None:
+            make_private_dir(cache_dir)
+
+    def make_key(self, *inputs: Any) -> str | None:
+        """
+        Computes a fingerprint of build arguments.
+        Returns None if arguments cannot be serialized, i.e. the build cannot be cached.
+        """
+        return make_fingerprint(*inputs)
+
+    def make_tracker(self) -> BuildTracker:
+        """
+        Creates a tracker to record the dependencies of a new build
+        """
+        return BuildTracker(with_digests=self.use_content_hash)
+
+    def get(self, key: str) -> dict | None:
+        """
+        Returns a copy of cached configuration or None if there is no valid entry for this key
+        """
+        cached = self.lookup(key)
+        return None if cached is None else cached[0]
+
+    def lookup(self, key: str) -> tuple[dict, BuildDependencies] | None:
+        """
+        Returns a copy of cached configuration along with its dependencies
+        or None if there is no valid entry for this key
+        """
+        entry = self._memory.get(key)
+        if entry is None:
+            entry = self._load_from_disk(key)
+            if entry is None:
+                return None
+            self._memory.set(key, entry)
+
+        if not entry.dependencies.is_up_to_date():
+            self._memory.pop(key)
+            return None
+        return entry.load(), entry.dependencies
+
+    def set(self, key: str, config: dict, tracker: BuildTracker) -> bool:
+        """
+        Stores a copy of configuration. Returns False if the configuration cannot be cached
+        """
+        if not tracker.is_deterministic and not self.allow_nondeterministic:
+            return False
+        try:
+            payload = pickle.dumps(config, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+
+        entry = CachedResult(dependencies=tracker.dependencies, payload=payload)
+        self._memory.set(key, entry)
+        if self.cache_dir is not None:
+            atomic_write_bytes(self._get_cache_filename(key), pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+        return True
+
+    def clear(self) -> None:
+        """
+        Removes all entries from memory and disk
+        """
+        self._memory.clear()
+        if self.cache_dir is not None:
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith(".result"):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, filename))
+                    except OSError:
+                        pass
+
+    def info(self) -> CacheInfo:
+        """
+        Returns statistics of in-memory cache
+        """
+        return self._memory.info()
+
+    def _get_cache_filename(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.result")
+
+    def _load_from_disk(self, key: str) -> CachedResult | None:
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._get_cache_filename(key), "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        return entry if isinstance(entry, CachedResult) else None
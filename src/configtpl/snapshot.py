@@ -0,0 +1,195 @@
+from dataclasses import dataclass, field
+import marshal
+import pickle
+from typing import TYPE_CHECKING, Any, Callable
+
+from configtpl.result_cache import make_fingerprint
+from configtpl.tracking import BuildDependencies, BuildTracker, FileSignature
+from configtpl.utils.files import atomic_write_bytes
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+if TYPE_CHECKING:
+    from configtpl.config_builder import ConfigBuilder
+    from configtpl.frozen import FrozenConfig
+
+# A snapshot file starts with the magic bytes, the version of snapshot layout and the code of serialization format
+SNAPSHOT_MAGIC = b"CTPLSNAP"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FORMATS = ("pickle", "marshal", "msgpack")
+
+_HEADER_SIZE = len(SNAPSHOT_MAGIC) + 2
+_LOAD_ERRORS = (OSError, ValueError, TypeError, KeyError, IndexError, EOFError, AttributeError, ImportError,
+                pickle.UnpicklingError)
+
+
+@dataclass
+class Snapshot:
+    """
+    A built configuration along with the fingerprint of build arguments and the dependencies it was built from
+    """
+    key: str
+    config: dict
+    dependencies: BuildDependencies
+    nondeterministic: list[str] = field(default_factory=list)
+
+    def is_valid(self, key: str | None) -> bool:
+        """
+        Checks if the snapshot is built with the same arguments and its dependencies are unchanged
+        """
+        return key is not None and key == self.key and self.dependencies.is_up_to_date()
+
+
+def _get_serializer(format: str) -> tuple[int, Callable[[Any], bytes], Callable[[bytes], Any]]:
+    if format == "pickle":
+        return 0, lambda v: pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads
+    if format == "marshal":
+        return 1, marshal.dumps, marshal.loads
+    if format == "msgpack":
+        if msgpack is None:
+            raise ValueError("The msgpack snapshot format is requested, but msgpack is not installed.")
+        return 2, msgpack.packb, lambda b: msgpack.unpackb(b, strict_map_key=False)
+    raise ValueError(f"Unknown snapshot format: '{format}'. Available formats: {', '.join(SNAPSHOT_FORMATS)}")
+
+
+def make_snapshot_key(builder: "ConfigBuilder", paths: list[str], overrides: dict | None,
+                      ctx: dict | None) -> str | None:
+    """
+    Computes a fingerprint of build arguments and builder options which affect the result.
+    Returns None if arguments cannot be serialized
+    """
+    return make_fingerprint(paths, ctx or {}, overrides or {}, builder.defaults, builder._yaml_loader_name,
+                            builder.list_merge_strategy, builder.list_merge_key,
+                            builder.jinja_env_factory.get_signature())
+
+
+def dump_snapshot(snapshot: Snapshot, format: str = "pickle") -> bytes:
+    """
+    Serializes a snapshot. Marshal and msgpack formats support only the basic types:
+    dictionaries, lists, strings, numbers, booleans and None
+    """
+    code, dumps, _ = _get_serializer(format)
+    deps = snapshot.dependencies
+    payload = {
+        "key": snapshot.key,
+        "files": {path: None if sig is None else [sig.mtime_ns, sig.size, sig.digest]
+                  for path, sig in deps.files.items()},
+        "env": deps.env,
+        "cwd": deps.cwd,
+        "nondeterministic": snapshot.nondeterministic,
+        "config": snapshot.config,
+    }
+    try:
+        data = dumps(payload)
+    except (ValueError, TypeError, pickle.PicklingError, AttributeError) as e:
+        raise ValueError(f"The configuration cannot be serialized in {format} format: {e}") from e
+    return SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION, code]) + data
+
+
+def parse_snapshot(data: bytes) -> Snapshot:
+    """
+    Deserializes a snapshot. The format is detected from the header
+    """
+    if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC or len(data) < _HEADER_SIZE:
+        raise ValueError("Not a configtpl snapshot")
+    version, code = data[len(SNAPSHOT_MAGIC)], data[len(SNAPSHOT_MAGIC) + 1]
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {version}")
+    if code >= len(SNAPSHOT_FORMATS):
+        raise ValueError(f"Unknown snapshot format code: {code}")
+
+    payload = _get_serializer(SNAPSHOT_FORMATS[code])[2](data[_HEADER_SIZE:])
+    files = {path: None if sig is None else FileSignature(*sig) for path, sig in payload["files"].items()}
+    return Snapshot(key=payload["key"], config=payload["config"],
+                    dependencies=BuildDependencies(files=files, env=payload["env"], cwd=payload["cwd"]),
+                    nondeterministic=list(payload["nondeterministic"]))
+
+
+def read_snapshot(snapshot_path: str) -> Snapshot | None:
+    """
+    Reads a snapshot file. Returns None if the file is missing or is not a valid snapshot.
+    NB: pickle snapshots are unpickled, so the file must not be writable for untrusted users
+    """
+    try:
+        with open(snapshot_path, "rb") as f:
+            return parse_snapshot(f.read())
+    except _LOAD_ERRORS:
+        return None
+
+
+def save_snapshot(builder: "ConfigBuilder", paths: list[str], snapshot_path: str, overrides: dict | None = None,
+                  ctx: dict | None = None, format: str = "pickle", use_content_hash: bool = False,
+                  allow_nondeterministic: bool = False) -> "dict | FrozenConfig":
+    """
+    Builds the configuration and writes it into a snapshot file
+
+    Args:
+        builder (ConfigBuilder): a builder to build the configuration with
+        paths (list[str]): resolved paths to configuration files
+        snapshot_path (str): a path to the snapshot file
+        overrides (dict | None): overrides to apply after all templates are rendered
+        ctx (dict | None): additional rendering context
+        format (str): serialization format: 'pickle' (default), 'marshal' or 'msgpack' (if installed)
+        use_content_hash (bool): record the content hash of files, so the snapshot stays valid
+            if the files are copied with a different modification time
+        allow_nondeterministic (bool): save the configurations which call non-deterministic functions
+            like `uuid()` or `cmd()`. Their results are frozen in the snapshot
+    Returns:
+        dict | FrozenConfig: the built configuration
+    """
+    key = make_snapshot_key(builder, paths, overrides, ctx)
+    if key is None:
+        raise ValueError("The context and overrides of snapshot must be JSON-serializable")
+    # Validates the format before the build
+    _get_serializer(format)
+
+    snapshot = _build_snapshot(builder, paths, key, overrides, ctx, use_content_hash)
+    if snapshot.nondeterministic and not allow_nondeterministic:
+        raise ValueError(f"The configuration calls non-deterministic functions: {', '.join(snapshot.nondeterministic)}."
+                         " Set allow_nondeterministic=True to save their results into the snapshot")
+    atomic_write_bytes(snapshot_path, dump_snapshot(snapshot, format))
+    return builder._make_result(snapshot.config)
+
+
+def _build_snapshot(builder: "ConfigBuilder", paths: list[str], key: str, overrides: dict | None, ctx: dict | None,
+                    use_content_hash: bool) -> Snapshot:
+    tracker = BuildTracker(with_digests=use_content_hash)
+    config, dependencies = builder._build_from_paths(paths, overrides, ctx, tracker=tracker)
+    return Snapshot(key=key, config=config, dependencies=dependencies,
+                    nondeterministic=sorted(tracker.nondeterministic))
+
+
+def load_snapshot(builder: "ConfigBuilder", paths: list[str], snapshot_path: str, overrides: dict | None = None,
+                  ctx: dict | None = None, update: bool = False, format: str = "pickle",
+                  use_content_hash: bool = False) -> "dict | FrozenConfig":
+    """
+    Loads the configuration from a snapshot file if the snapshot is built with the same arguments
+    and none of its dependencies is changed. Otherwise, the configuration is built from files.
+
+    Args:
+        builder (ConfigBuilder): a builder to build the configuration with if the snapshot is outdated
+        paths (list[str]): resolved paths to configuration files
+        snapshot_path (str): a path to the snapshot file
+        overrides (dict | None): overrides to apply after all templates are rendered
+        ctx (dict | None): additional rendering context
+        update (bool): write a new snapshot if the existing one is outdated or missing.
+            The configurations which call non-deterministic functions are not saved
+        format (str): serialization format of a new snapshot
+        use_content_hash (bool): record the content hash of files in a new snapshot
+    Returns:
+        dict | FrozenConfig: the configuration
+    """
+    key = make_snapshot_key(builder, paths, overrides, ctx)
+    snapshot = read_snapshot(snapshot_path)
+    if snapshot is not None and snapshot.is_valid(key):
+        return builder._make_result(snapshot.config)
+    if not update or key is None:
+        return builder._make_result(builder._build_from_paths(paths, overrides, ctx)[0])
+
+    snapshot = _build_snapshot(builder, paths, key, overrides, ctx, use_content_hash)
+    if not snapshot.nondeterministic:
+        atomic_write_bytes(snapshot_path, dump_snapshot(snapshot, format))
+    return builder._make_result(snapshot.config)
@@ -0,0 +1,158 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import os
+from typing import Iterator
+
+from configtpl.utils.files import file_hash
+
+
+@dataclass
+class FileSignature:
+    """
+    A signature of file which is used to detect the changes. Missing files have no signature
+    """
+    mtime_ns: int
+    size: int
+    digest: str | None = None
+
+    @classmethod
+    def of(cls, path: str, with_digest: bool = False) -> "FileSignature | None":
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return cls(mtime_ns=stat.st_mtime_ns, size=stat.st_size, digest=file_digest(path) if with_digest else None)
+
+    def matches(self, path: str) -> bool:
+        """
+        Checks if the file is unchanged.
+        If the file has been touched, but it has a digest, the contents are compared.
+        """
+        current = FileSignature.of(path)
+        if current is None:
+            return False
+        if (current.mtime_ns, current.size) == (self.mtime_ns, self.size):
+            return True
+        return self.digest is not None and current.size == self.size and file_digest(path) == self.digest
+
+
+def file_digest(path: str) -> str | None:
+    try:
+        return file_hash(path)
+    except OSError:
+        return None
+
+
+@dataclass
+class BuildDependencies:
+    """
+    Inputs of a build which are not provided as arguments:
+    files read by templates, environment variables and the working directory
+    """
+    files: dict[str, FileSignature | None] = field(default_factory=dict)
+    env: dict[str, str | None] = field(default_factory=dict)
+    cwd: str | None = None
+
+    def is_up_to_date(self) -> bool:
+        """
+        Checks if all dependencies are unchanged since they were recorded
+        """
+        if self.cwd is not None and self.cwd != os.getcwd():
+            return False
+        for name, value in self.env.items():
+            if os.environ.get(name) != value:
+                return False
+        for path, signature in self.files.items():
+            if signature is None:
+                if os.path.exists(path):
+                    return False
+            elif not signature.matches(path):
+                return False
+        return True
+
+
+class BuildTracker:
+    """
+    Records the inputs which are accessed by templates while a configuration is built
+    """
+    def __init__(self, with_digests: bool = False, memo: dict | None = None):
+        """
+        A constructor for build tracker
+
+        Args:
+            with_digests (bool): compute digests of files in addition to modification time and size
+            memo (dict | None): a storage for results of functions which are memoized during a build.
+                Trackers of build stages share the memo of the build
+        """
+        self.with_digests = with_digests
+        self.dependencies = BuildDependencies()
+        self.nondeterministic: set[str] = set()
+        self.memo: dict = {} if memo is None else memo
+
+    def record_file(self, path: str | None) -> None:
+        """
+        Records a file which is read by template: a template itself, an included template or a file read by global
+        """
+        if path is None:
+            return
+        path = os.path.realpath(path)
+        if path not in self.dependencies.files:
+            self.dependencies.files[path] = FileSignature.of(path, self.with_digests)
+
+    def record_env(self, name: str) -> None:
+        """
+        Records an environment variable which is read by template
+        """
+        if name not in self.dependencies.env:
+            self.dependencies.env[name] = os.environ.get(name)
+
+    def record_cwd(self) -> None:
+        """
+        Records that the template depends on the current working directory
+        """
+        self.dependencies.cwd = os.getcwd()
+
+    def record_nondeterministic(self, name: str) -> None:
+        """
+        Records a call of function which might return a different result each time, e.g. `uuid()` or `cmd()`
+        """
+        self.nondeterministic.add(name)
+
+    def merge(self, dependencies: BuildDependencies, nondeterministic: set[str]) -> None:
+        """
+        Adds the dependencies recorded by another tracker, e.g. a tracker of a single build stage
+        """
+        for path, signature in dependencies.files.items():
+            self.dependencies.files.setdefault(path, signature)
+        for name, value in dependencies.env.items():
+            self.dependencies.env.setdefault(name, value)
+        if dependencies.cwd is not None:
+            self.dependencies.cwd = dependencies.cwd
+        self.nondeterministic |= nondeterministic
+
+    @property
+    def is_deterministic(self) -> bool:
+        return not self.nondeterministic
+
+
+_current_tracker: ContextVar[BuildTracker | None] = ContextVar("configtpl_build_tracker", default=None)
+
+
+def get_tracker() -> BuildTracker | None:
+    """
+    Returns the tracker of current build or None if no build is in progress
+    """
+    return _current_tracker.get()
+
+
+@contextmanager
+def tracking(tracker: BuildTracker) -> Iterator[BuildTracker]:
+    """
+    Activates the tracker for the current context
+    """
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+from typing import Any, Callable, Hashable
+
+
+@dataclass(frozen=True)
+class CacheInfo:
+    """
+    Statistics of a cache
+    """
+    hits: int
+    misses: int
+    size: int
+    max_size: int | None
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache:
+    """
+    A thread-safe cache which evicts the least recently used items once the size limit is reached
+    """
+    def __init__(self, max_size: int | None = 128):
+        """
+        A constructor for LRU cache
+
+        Args:
+            max_size (int | None): maximum number of items to keep. None means unbounded cache
+        """
+        self.max_size = max_size
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns a cached item and marks it as recently used
+        """
+        with self._lock:
+            if key in self._items:
+                self._hits += 1
+                self._items.move_to_end(key)
+                return self._items[key]
+            self._misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Adds an item to cache and evicts the least recently used items if needed
+        """
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            if self.max_size is not None:
+                while len(self._items) > self.max_size:
+                    self._items.popitem(last=False)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Returns a cached item or creates it using the factory function.
+        The cache is locked while the item is created, so the factory is called once per key.
+        """
+        with self._lock:
+            if key in self._items:
+                self._hits += 1
+                self._items.move_to_end(key)
+                return self._items[key]
+            self._misses += 1
+            value = factory()
+            self.set(key, value)
+            return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._items.pop(key, default)
+
+    def clear(self) -> None:
+        """
+        Removes all items and resets the statistics
+        """
+        with self._lock:
+            self._items.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(hits=self._hits, misses=self._misses, size=len(self._items), max_size=self.max_size)
+
+    def __getstate__(self) -> dict:
+        # Cached items are not copied along with the cache, e.g. into worker processes
+        return {"max_size": self.max_size}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["max_size"])
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
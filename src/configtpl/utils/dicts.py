@@ -1,20 +1,180 @@
-def dict_deep_merge(*dicts: dict) -> dict:
+from dataclasses import dataclass, field
+from typing import Iterable, Mapping
+
+LIST_MERGE_STRATEGIES = ("replace", "append", "merge_by_key")
+
+
+class DictMerger:
     """
-    Deep merge multiple dictionaries recursively.
-    Values in later dictionaries overwrite those in earlier ones.
-    This function does not update any dictionary by reference.
-    """
-    def merge_two_dicts(d1: dict, d2: dict):
-        merged = d1.copy()
-        for key, value in d2.items():
-            if key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
-                merged[key] = merge_two_dicts(merged[key], value)
-            else:
-                merged[key] = value
+    Deep merges dictionaries into a single result dictionary which is updated in place.
+
+    The source dictionaries are never modified. Their subtrees are shared with the result until the result
+    is updated at the same path. At that moment only the dictionaries along the updated path are copied
+    (copy-on-write). As a result, merging N layers does not copy the whole accumulated result N times.
+    """
+    def __init__(self, list_strategy: str = "replace", list_merge_key: str | None = None):
+        """
+        A constructor for dictionary merger
+
+        Args:
+            list_strategy (str): how to merge two lists at the same path:
+                'replace' - the later list replaces the earlier one,
+                'append' - the items of later list are appended to the earlier one,
+                'merge_by_key' - the dictionary items with the same value of `list_merge_key` are deep merged,
+                other items are appended
+            list_merge_key (str | None): a key to match the list items for 'merge_by_key' strategy
+        """
+        if list_strategy not in LIST_MERGE_STRATEGIES:
+            raise ValueError(f"Unknown list merge strategy: '{list_strategy}'. "
+                             f"Available strategies: {', '.join(LIST_MERGE_STRATEGIES)}")
+        if list_strategy == "merge_by_key" and list_merge_key is None:
+            raise ValueError("A key is required for 'merge_by_key' list merge strategy")
+        self.list_strategy = list_strategy
+        self.list_merge_key = list_merge_key
+        self.result: dict = {}
+        # Dictionaries created by merger, i.e. the ones which might be updated in place.
+        # The values keep the dictionaries alive, so their ids cannot be reused by other objects.
+        self._owned: dict[int, dict] = {id(self.result): self.result}
+
+    def merge(self, source: dict) -> dict:
+        """
+        Merges a dictionary into result. Values in source overwrite the values in result
+        """
+        self._merge_into(self.result, source)
+        return self.result
+
+    def adopt(self, d: dict) -> dict:
+        """
+        Uses a dictionary as result, so the following merges update it in place instead of copying.
+        The dictionary must not be referenced elsewhere, e.g. a freshly parsed or deep copied one.
+        The nested dictionaries which appear more than once (e.g. YAML aliases) are still copied on update.
+        """
+        counts: dict[int, int] = {}
+        nested: list[dict] = []
+
+        def walk(value: dict) -> None:
+            counts[id(value)] = counts.get(id(value), 0) + 1
+            if counts[id(value)] > 1:
+                return
+            nested.append(value)
+            for item in value.values():
+                if isinstance(item, dict):
+                    walk(item)
+
+        walk(d)
+        self.result = d
+        self._owned = {id(value): value for value in nested if counts[id(value)] == 1}
+        self._owned[id(d)] = d
+        return d
+
+    def _merge_into(self, target: dict, source: dict) -> None:
+        owned = self._owned
+        merge_lists = self.list_strategy != "replace"
+        for key, value in source.items():
+            if isinstance(value, dict):
+                current = target.get(key)
+                if isinstance(current, dict):
+                    if id(current) not in owned:
+                        current = target[key] = self._own(current)
+                    self._merge_into(current, value)
+                    continue
+            elif merge_lists and isinstance(value, list):
+                current = target.get(key)
+                if isinstance(current, list):
+                    target[key] = self._merge_lists(current, value)
+                    continue
+            target[key] = value
+
+    def _own(self, d: dict) -> dict:
+        copy = d.copy()
+        self._owned[id(copy)] = copy
+        return copy
+
+    def _merge_lists(self, l1: list, l2: list) -> list:
+        if self.list_strategy == "append":
+            return l1 + l2
+
+        merged = list(l1)
+        positions = {item[self.list_merge_key]: i for i, item in enumerate(merged)
+                     if isinstance(item, dict) and self.list_merge_key in item}
+        for item in l2:
+            position = positions.get(item[self.list_merge_key]) \
+                if isinstance(item, dict) and self.list_merge_key in item else None
+            if position is None:
+                merged.append(item)
+            elif isinstance(merged[position], dict):
+                if id(merged[position]) not in self._owned:
+                    merged[position] = self._own(merged[position])
+                self._merge_into(merged[position], item)
         return merged
 
-    result = {}
+
+def dict_deep_merge(*dicts: dict, list_strategy: str = "replace", list_merge_key: str | None = None) -> dict:
+    """
+    Deep merge multiple dictionaries recursively.
+    Values in later dictionaries overwrite those in earlier ones.
+    This function does not update any dictionary by reference. The unchanged subtrees are shared between
+    the result and the input dictionaries. See `DictMerger` for description of list merge strategies.
+    """
+    merger = DictMerger(list_strategy=list_strategy, list_merge_key=list_merge_key)
     for d in dicts:
-        result = merge_two_dicts(result, d)
+        merger.merge(d)
+    return merger.result
 
+
+def dict_select(d: dict, paths: Iterable[str]) -> dict:
+    """
+    Returns a new dictionary which contains only the provided paths of source dictionary.
+    Nested keys are joined with dots, e.g. 'server.port'. Missing paths are skipped.
+    """
+    result: dict = {}
+    for path in paths:
+        parts = path.split(".")
+        value = d
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = result
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
     return result
+
+
+@dataclass(frozen=True)
+class DictDiff:
+    """
+    Key-level difference between two dictionaries. Nested keys are joined with dots, e.g. 'server.port'
+    """
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def dict_diff(old: Mapping, new: Mapping) -> DictDiff:
+    """
+    Compares two dictionaries recursively. Values other than mappings (including lists) are compared as a whole.
+    Any mappings might be compared, e.g. frozen configurations.
+    """
+    diff = DictDiff()
+
+    def compare(d1: Mapping, d2: Mapping, prefix: str) -> None:
+        for key, value in d1.items():
+            path = f"{prefix}{key}"
+            if key not in d2:
+                diff.removed.append(path)
+            elif isinstance(value, Mapping) and isinstance(d2[key], Mapping):
+                compare(value, d2[key], f"{path}.")
+            elif value != d2[key] or type(value) is not type(d2[key]):
+                diff.changed.append(path)
+        for key in d2:
+            if key not in d1:
+                diff.added.append(f"{prefix}{key}")
+
+    compare(old, new, "")
+    return diff
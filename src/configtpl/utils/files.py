@@ -0,0 +1,83 @@
+import hashlib
+import os
+
+from configtpl.utils.cache import CacheInfo, LRUCache
+
+# Digests of files keyed by path, algorithm, inode, modification time and size
+_file_hash_cache = LRUCache(1024)
+
+
+def atomic_write_bytes(path: str, data: bytes) -> None:
+    """
+    Writes data into file atomically.
+    The data is written into a temporary file in the same directory first and then the temporary file is renamed.
+    Concurrent readers see either the previous contents or the complete new contents, but never a partial file.
+
+    Args:
+        path (str): path to the target file
+        data (bytes): contents to write
+    """
+    import tempfile
+
+    dir = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=dir, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def make_private_dir(path: str) -> None:
+    """
+    Creates a directory which is accessible only by the current user. An existing directory must be owned
+    by the current user and must not be accessible by other users, otherwise ValueError is raised.
+    The ownership is not checked on the systems without POSIX permissions
+
+    Args:
+        path (str): path to the directory
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if os.name != "posix":
+        return
+    stat = os.stat(path)
+    if stat.st_uid != os.getuid():
+        raise ValueError(f"The directory is owned by another user: {path}")
+    if stat.st_mode & 0o077:
+        raise ValueError(f"The directory is accessible by other users: {path}. Set its permissions to 0700")
+
+
+def file_hash(path: str, algorithm: str = "sha256") -> str:
+    """
+    Computes a hex digest of file contents. The file is read in chunks, so it is never loaded into memory entirely.
+    The digests are memoized until the modification time or size of file is changed.
+
+    Args:
+        path (str): path to the file
+        algorithm (str): a hash algorithm supported by `hashlib`, e.g. 'md5', 'sha256' or 'sha512'
+    Returns:
+        str: the hex digest
+    """
+    if algorithm not in hashlib.algorithms_available:
+        raise ValueError(f"Unknown hash algorithm: '{algorithm}'")
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    key = (path, algorithm, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    digest = _file_hash_cache.get(key)
+    if digest is None:
+        with open(path, "rb") as f:
+            digest = hashlib.file_digest(f, algorithm).hexdigest()
+        _file_hash_cache.set(key, digest)
+    return digest
+
+
+def file_hash_cache_info() -> CacheInfo:
+    """
+    Returns statistics of the memoized file digests
+    """
+    return _file_hash_cache.info()
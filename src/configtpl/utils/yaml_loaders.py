@@ -0,0 +1,53 @@
+# Each loader family maps to a pair of names of (libyaml-backed loader, pure-Python loader) in `yaml` module.
+# The libyaml-backed loader is missing if PyYAML was built without libyaml support.
+# The loaders are resolved on demand, so `yaml` is not imported until a configuration is parsed.
+YAML_LOADERS: dict[str, tuple[str, str]] = {
+    "full": ("CFullLoader", "FullLoader"),
+    "safe": ("CSafeLoader", "SafeLoader"),
+}
+
+
+def is_libyaml_available() -> bool:
+    """
+    Checks if PyYAML is built with libyaml bindings
+    """
+    import yaml
+
+    return bool(getattr(yaml, "__with_libyaml__", False))
+
+
+def check_yaml_loader(loader: str | type) -> None:
+    """
+    Raises ValueError if the loader is neither a known loader family nor a loader class
+    """
+    if not isinstance(loader, type) and loader not in YAML_LOADERS:
+        raise ValueError(f"Unknown YAML loader: '{loader}'. Available loaders: {', '.join(YAML_LOADERS)}")
+
+
+def get_yaml_loader(loader: str | type = "full", use_libyaml: bool | None = None) -> type:
+    """
+    Resolves a YAML loader class.
+
+    Args:
+        loader (str | type): a loader family ('full' or 'safe') or a loader class.
+            Loader classes are returned as is.
+        use_libyaml (bool | None): True to require the libyaml-backed loader, False to force the pure-Python one,
+            None to pick the libyaml-backed loader if it is available and fall back to pure-Python otherwise.
+    Returns:
+        type: a loader class to pass into `yaml.load`
+    """
+    check_yaml_loader(loader)
+    if isinstance(loader, type):
+        return loader
+
+    import yaml
+
+    c_name, py_name = YAML_LOADERS[loader]
+    c_loader, py_loader = getattr(yaml, c_name, None), getattr(yaml, py_name)
+    if use_libyaml is False:
+        return py_loader
+    if c_loader is None or not is_libyaml_available():
+        if use_libyaml:
+            raise ValueError("The libyaml-backed YAML loader is requested, but PyYAML is built without libyaml.")
+        return py_loader
+    return c_loader
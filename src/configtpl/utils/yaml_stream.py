@@ -0,0 +1,265 @@
+from collections.abc import Hashable
+from types import GeneratorType
+from typing import Any, Iterable
+
+import yaml
+from yaml.composer import ComposerError
+from yaml.constructor import ConstructorError, SafeConstructor
+from yaml.events import (AliasEvent, MappingEndEvent, MappingStartEvent, ScalarEvent, SequenceEndEvent,
+                         SequenceStartEvent, StreamEndEvent)
+from yaml.nodes import MappingNode, Node, ScalarNode, SequenceNode
+
+MAP_TAG = "tag:yaml.org,2002:map"
+SEQ_TAG = "tag:yaml.org,2002:seq"
+STR_TAG = "tag:yaml.org,2002:str"
+MERGE_TAG = "tag:yaml.org,2002:merge"
+VALUE_TAG = "tag:yaml.org,2002:value"
+# Aliases of the values which are constructed from events are composed into placeholder nodes
+_PLACEHOLDER_TAG = "tag:configtpl,2025:constructed"
+
+
+class ChunkReader:
+    """
+    A file-like object which reads the text from an iterator of chunks, e.g. a template which is being rendered.
+    Only the chunks which the reader has not consumed yet are kept in memory
+    """
+    def __init__(self, chunks: Iterable[str]):
+        self._chunks = iter(chunks)
+        self._buffer: list[str] = []
+        self._buffered = 0
+        # The size of text read so far in bytes
+        self.size = 0
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or self._buffered < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer.append(chunk)
+            self._buffered += len(chunk)
+
+        data = "".join(self._buffer)
+        if 0 <= size < len(data):
+            data, rest = data[:size], data[size:]
+            self._buffer, self._buffered = [rest], len(rest)
+        else:
+            self._buffer, self._buffered = [], 0
+        self.size += len(data.encode())
+        return data
+
+
+def supports_streaming(loader_cls: type) -> bool:
+    """
+    Checks if the documents of loader might be constructed from events. The mappings and sequences
+    must be constructed by the standard constructors, like in the 'full' and 'safe' loaders
+    """
+    constructors = getattr(loader_cls, "yaml_constructors", {})
+    return constructors.get(MAP_TAG) is SafeConstructor.construct_yaml_map \
+        and constructors.get(SEQ_TAG) is SafeConstructor.construct_yaml_seq
+
+
+def load_yaml_stream(stream: Any, loader_cls: type) -> Any:
+    """
+    Loads a single YAML document from a stream without composing the whole node tree.
+    The plain mappings and sequences are constructed directly from parser events and the scalars are constructed
+    one by one, so the memory used besides the result is bounded by the largest scalar or explicitly tagged
+    collection. The result is the same as of `yaml.load`. The loaders which are not supported by streaming
+    (see `supports_streaming`) fall back to `yaml.load`
+
+    Args:
+        stream (Any): a string or a file-like object, e.g. `ChunkReader`
+        loader_cls (type): a loader class
+    """
+    if not supports_streaming(loader_cls):
+        return yaml.load(stream, Loader=loader_cls)
+
+    loader = loader_cls(stream)
+    try:
+        loader.get_event()  # StreamStartEvent
+        if loader.check_event(StreamEndEvent):
+            return None
+        document = loader.get_event()  # DocumentStartEvent
+        value = _StreamConstructor(loader).construct()
+        loader.get_event()  # DocumentEndEvent
+        if not loader.check_event(StreamEndEvent):
+            raise ComposerError("expected a single document in the stream", document.start_mark,
+                                "but found another document", loader.get_event().start_mark)
+        return value
+    finally:
+        loader.dispose()
+
+
+class _StreamConstructor:
+    """
+    Constructs the values of a document from the events of loader
+    """
+    def __init__(self, loader: Any):
+        self.loader = loader
+        self.constructors = type(loader).yaml_constructors
+        # Anchors mapped to the constructed values
+        self.anchors: dict[str, Any] = {}
+
+    def construct(self) -> Any:
+        loader = self.loader
+        event = loader.peek_event()
+        if isinstance(event, AliasEvent):
+            loader.get_event()
+            if event.anchor not in self.anchors:
+                raise ComposerError(None, None, f"found undefined alias {event.anchor!r}", event.start_mark)
+            return self.anchors[event.anchor]
+        if isinstance(event, ScalarEvent):
+            loader.get_event()
+            value = self._construct_scalar(event, self._scalar_tag(event))
+            if event.anchor is not None:
+                self.anchors[event.anchor] = value
+            return value
+
+        node_cls, tag = self._collection_tag(event)
+        if node_cls is MappingNode and tag == MAP_TAG:
+            return self._construct_mapping(loader.get_event())
+        if node_cls is SequenceNode and tag == SEQ_TAG:
+            return self._construct_sequence(loader.get_event())
+        return self._construct_tagged()
+
+    def _scalar_tag(self, event: ScalarEvent) -> str:
+        if event.tag is None or event.tag == "!":
+            return self.loader.resolve(ScalarNode, event.value, event.implicit)
+        return event.tag
+
+    def _collection_tag(self, event: MappingStartEvent | SequenceStartEvent) -> tuple[type, str]:
+        node_cls = MappingNode if isinstance(event, MappingStartEvent) else SequenceNode
+        if event.tag is None or event.tag == "!":
+            return node_cls, self.loader.resolve(node_cls, None, event.implicit)
+        return node_cls, event.tag
+
+    def _construct_scalar(self, event: ScalarEvent, tag: str) -> Any:
+        node = ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+        constructor = self.constructors.get(tag)
+        if constructor is None:
+            # Multi-constructors and undefined tags are resolved by the loader
+            return self._construct_node(node)
+        value = constructor(self.loader, node)
+        if isinstance(value, GeneratorType):
+            generator, value = value, next(value)
+            for _ in generator:
+                pass
+        return value
+
+    def _construct_mapping(self, start: MappingStartEvent) -> dict:
+        loader = self.loader
+        mapping: dict = {}
+        if start.anchor is not None:
+            self.anchors[start.anchor] = mapping
+        merged: list[dict] = []
+        while not loader.check_event(MappingEndEvent):
+            key_event = loader.peek_event()
+            if isinstance(key_event, ScalarEvent):
+                loader.get_event()
+                key_tag = self._scalar_tag(key_event)
+                if key_tag == MERGE_TAG:
+                    merged.extend(self._construct_merge(start))
+                    continue
+                key = self._construct_scalar(key_event, STR_TAG if key_tag == VALUE_TAG else key_tag)
+                if key_event.anchor is not None:
+                    self.anchors[key_event.anchor] = key
+            else:
+                key = self.construct()
+            if not isinstance(key, Hashable):
+                raise ConstructorError("while constructing a mapping", start.start_mark,
+                                       "found unhashable key", key_event.start_mark)
+            mapping[key] = self.construct()
+        loader.get_event()
+
+        if merged:
+            # Like in `SafeConstructor.flatten_mapping`, the keys of mapping take precedence over the merged ones
+            result = {}
+            for source in merged:
+                result.update(source)
+            result.update(mapping)
+            mapping.clear()
+            mapping.update(result)
+        return mapping
+
+    def _construct_merge(self, start: MappingStartEvent) -> list[dict]:
+        """
+        Constructs the value of merge key '<<'. Returns the mappings to merge in order of precedence, lowest first
+        """
+        event = self.loader.peek_event()
+        value = self.construct()
+        if isinstance(value, dict):
+            return [value]
+        if isinstance(value, list) and all(isinstance(item, dict) for item in value):
+            # The first mapping of sequence takes precedence
+            return value[::-1]
+        raise ConstructorError("while constructing a mapping", start.start_mark,
+                               "expected a mapping or list of mappings for merging", event.start_mark)
+
+    def _construct_sequence(self, start: SequenceStartEvent) -> list:
+        loader = self.loader
+        sequence: list = []
+        if start.anchor is not None:
+            self.anchors[start.anchor] = sequence
+        while not loader.check_event(SequenceEndEvent):
+            sequence.append(self.construct())
+        loader.get_event()
+        return sequence
+
+    def _construct_tagged(self) -> Any:
+        """
+        Composes an explicitly tagged collection, e.g. '!!set', into nodes and constructs it with the loader
+        """
+        anchored: dict[str, Node] = {}
+        placeholders: dict[Node, Any] = {}
+        node = self._compose(anchored, placeholders)
+        return self._construct_node(node, placeholders, anchored)
+
+    def _compose(self, anchored: dict[str, Node], placeholders: dict[Node, Any]) -> Node:
+        loader = self.loader
+        event = loader.get_event()
+        if isinstance(event, AliasEvent):
+            return self._compose_alias(event, anchored, placeholders)
+
+        if isinstance(event, ScalarEvent):
+            node = ScalarNode(self._scalar_tag(event), event.value, event.start_mark, event.end_mark,
+                              style=event.style)
+        else:
+            node_cls, tag = self._collection_tag(event)
+            node = node_cls(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        if event.anchor is not None:
+            anchored[event.anchor] = node
+
+        if isinstance(node, SequenceNode):
+            while not loader.check_event(SequenceEndEvent):
+                node.value.append(self._compose(anchored, placeholders))
+            node.end_mark = loader.get_event().end_mark
+        elif isinstance(node, MappingNode):
+            while not loader.check_event(MappingEndEvent):
+                key = self._compose(anchored, placeholders)
+                node.value.append((key, self._compose(anchored, placeholders)))
+            node.end_mark = loader.get_event().end_mark
+        return node
+
+    def _compose_alias(self, event: AliasEvent, anchored: dict[str, Node], placeholders: dict[Node, Any]) -> Node:
+        if event.anchor in anchored:
+            return anchored[event.anchor]
+        if event.anchor not in self.anchors:
+            raise ComposerError(None, None, f"found undefined alias {event.anchor!r}", event.start_mark)
+        node = ScalarNode(_PLACEHOLDER_TAG, "", event.start_mark, event.end_mark)
+        placeholders[node] = self.anchors[event.anchor]
+        return node
+
+    def _construct_node(self, node: Node, placeholders: dict[Node, Any] | None = None,
+                        anchored: dict[str, Node] | None = None) -> Any:
+        loader = self.loader
+        if placeholders:
+            loader.constructed_objects.update(placeholders)
+        try:
+            value = loader.construct_object(node, deep=True)
+            # The anchors of composed nodes might be referenced by the following events
+            for anchor, anchored_node in (anchored or {}).items():
+                self.anchors[anchor] = loader.construct_object(anchored_node, deep=True)
+        finally:
+            # The constructed objects are not kept by the loader, as the nodes are not needed anymore
+            loader.constructed_objects.clear()
+            loader.recursive_objects.clear()
+        return value
@@ -0,0 +1,421 @@
+import ctypes
+import ctypes.util
+from dataclasses import dataclass, field
+import errno
+import logging
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+import weakref
+
+from configtpl.frozen import FrozenConfig
+from configtpl.tracking import FileSignature
+from configtpl.utils.dicts import DictDiff, dict_diff
+
+if TYPE_CHECKING:
+    from configtpl.config_builder import ConfigBuilder
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ConfigChange:
+    """
+    A configuration which is rebuilt after its files have changed.
+    If the build has failed, `error` is set and `config` is the last successfully built configuration.
+    The configurations are frozen if the builder is created with `frozen=True`.
+    """
+    config: dict | FrozenConfig
+    previous: dict | FrozenConfig
+    diff: DictDiff = field(default_factory=DictDiff)
+    changed_files: set[str] = field(default_factory=set)
+    error: Exception | None = None
+
+
+class WatchBackend:
+    """
+    A base class for file watchers
+    """
+    def set_files(self, files: dict[str, FileSignature | None]) -> None:
+        """
+        Replaces the set of watched files
+
+        Args:
+            files (dict[str, FileSignature | None]): paths to files mapped to their signatures at the moment
+                they were read. The signatures are used to detect the changes which happened after reading the file.
+        """
+        raise NotImplementedError()
+
+    def wait(self, timeout: float | None) -> set[str]:
+        """
+        Waits until any of watched files is changed.
+        Returns the changed files or an empty set on timeout or wakeup.
+        """
+        raise NotImplementedError()
+
+    def wakeup(self) -> None:
+        """
+        Interrupts the current `wait` call from another thread
+        """
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        pass
+
+
+class PollingBackend(WatchBackend):
+    """
+    Detects the changes by checking modification time and size of watched files periodically
+    """
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._signatures: dict[str, FileSignature | None] = {}
+        self._wakeup = threading.Event()
+
+    def set_files(self, files: dict[str, FileSignature | None]) -> None:
+        self._signatures = {path: _strip_digest(signature) for path, signature in files.items()}
+
+    def wait(self, timeout: float | None) -> set[str]:
+        remaining = timeout
+        while True:
+            wait_time = self.interval if remaining is None else min(self.interval, remaining)
+            if self._wakeup.wait(wait_time):
+                self._wakeup.clear()
+                return set()
+            changed = self.check()
+            if changed:
+                return changed
+            if remaining is not None:
+                remaining -= wait_time
+                if remaining <= 0:
+                    return set()
+
+    def check(self) -> set[str]:
+        """
+        Checks the watched files once. Returns the files which are changed since the previous check
+        """
+        changed = set()
+        for path, signature in self._signatures.items():
+            current = FileSignature.of(path)
+            if current != signature:
+                self._signatures[path] = current
+                changed.add(path)
+        return changed
+
+    def wakeup(self) -> None:
+        self._wakeup.set()
+
+
+class InotifyBackend(WatchBackend):
+    """
+    Uses Linux inotify API to receive the change events from kernel.
+    The parent directories of files are watched, so the files which are replaced or re-created are tracked too.
+    The files in directories which cannot be watched, e.g. missing ones, are polled.
+    """
+    _EVENT_HEADER = struct.Struct("iIII")
+    _MASK = (
+        0x00000002  # IN_MODIFY
+        | 0x00000004  # IN_ATTRIB
+        | 0x00000008  # IN_CLOSE_WRITE
+        | 0x00000040  # IN_MOVED_FROM
+        | 0x00000080  # IN_MOVED_TO
+        | 0x00000100  # IN_CREATE
+        | 0x00000200  # IN_DELETE
+    )
+
+    def __init__(self, poll_interval: float = 1.0):
+        """
+        A constructor for inotify backend
+
+        Args:
+            poll_interval (float): how often the files in directories which cannot be watched are checked, in seconds
+        """
+        self._libc = _get_libc()
+        if self._libc is None:
+            raise OSError("inotify is not available on this platform")
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        try:
+            self._wakeup_r, self._wakeup_w = os.pipe()
+        except OSError:
+            os.close(self._fd)
+            raise
+        self._dirs: dict[int, str] = {}  # watch descriptor -> directory
+        self._files: set[str] = set()
+        self._pending: set[str] = set()
+        self._poller = PollingBackend(poll_interval)
+        self._poll_interval: float | None = None  # set if any files are polled
+
+    def set_files(self, files: dict[str, FileSignature | None]) -> None:
+        self._files = set(files)
+        dirs = {os.path.dirname(path) for path in files}
+        for wd, dir in list(self._dirs.items()):
+            if dir not in dirs:
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+        for dir in dirs - set(self._dirs.values()):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir), self._MASK)
+            if wd >= 0:
+                self._dirs[wd] = dir
+            else:
+                # Missing directories are expected, e.g. if a template checks whether a file exists
+                error = ctypes.get_errno()
+                level = logging.DEBUG if error in (errno.ENOENT, errno.ENOTDIR) else logging.WARNING
+                logger.log(level, "Cannot watch directory '%s': %s. Its files are polled", dir, os.strerror(error))
+        watched_dirs = set(self._dirs.values())
+        polled = {path: signature for path, signature in files.items() if os.path.dirname(path) not in watched_dirs}
+        self._poller.set_files(polled)
+        self._poll_interval = self._poller.interval if polled else None
+        # The files might be changed after they were read, but before the directories are watched
+        self._pending = {path for path, signature in files.items()
+                         if os.path.dirname(path) in watched_dirs
+                         and FileSignature.of(path) != _strip_digest(signature)}
+
+    def wait(self, timeout: float | None) -> set[str]:
+        if self._pending:
+            changed, self._pending = self._pending, set()
+            return changed
+        remaining = timeout
+        while True:
+            wait_time = remaining
+            if self._poll_interval is not None and (remaining is None or remaining > self._poll_interval):
+                wait_time = self._poll_interval
+            ready, _, _ = select.select([self._fd, self._wakeup_r], [], [], wait_time)
+            if self._wakeup_r in ready:
+                os.read(self._wakeup_r, 4096)
+                return set()
+            changed = self._poller.check()
+            if self._fd in ready:
+                changed |= self._read_events()
+            if changed or ready or wait_time == remaining:
+                return changed
+            if remaining is not None:
+                remaining -= wait_time
+
+    def _read_events(self) -> set[str]:
+        """
+        Reads the pending inotify events. Returns the watched files which are changed
+        """
+        changed = set()
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, _, _, name_len = self._EVENT_HEADER.unpack_from(data, offset)
+            offset += self._EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+            dir = self._dirs.get(wd)
+            if dir is not None and name:
+                path = os.path.join(dir, os.fsdecode(name))
+                if path in self._files:
+                    changed.add(path)
+        return changed
+
+    def wakeup(self) -> None:
+        os.write(self._wakeup_w, b"\0")
+
+    def close(self) -> None:
+        for fd in (self._fd, self._wakeup_r, self._wakeup_w):
+            os.close(fd)
+
+
+def _strip_digest(signature: FileSignature | None) -> FileSignature | None:
+    if signature is None or signature.digest is None:
+        return signature
+    return FileSignature(mtime_ns=signature.mtime_ns, size=signature.size)
+
+
+def _get_libc() -> Any:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    return libc if hasattr(libc, "inotify_init1") else None
+
+
+def make_watch_backend(backend: str | WatchBackend = "auto", poll_interval: float = 1.0) -> WatchBackend:
+    """
+    Creates a file watcher backend
+
+    Args:
+        backend (str | WatchBackend): 'inotify', 'poll', 'auto' (inotify if available, polling otherwise)
+            or a backend instance
+        poll_interval (float): how often the files are checked by polling backend, in seconds
+    """
+    if isinstance(backend, WatchBackend):
+        return backend
+    if backend == "poll" or (backend == "auto" and _get_libc() is None):
+        return PollingBackend(poll_interval)
+    if backend in ("auto", "inotify"):
+        return InotifyBackend(poll_interval)
+    raise ValueError(f"Unknown watch backend: '{backend}'")
+
+
+class ConfigWatcher:
+    """
+    Rebuilds a configuration in background once any file it was built from is changed.
+    The watched files are the configuration files, the included templates and files read with `file()`.
+    """
+    def __init__(self, builder: "ConfigBuilder", paths: list[str], overrides: dict | None = None,
+                 ctx: dict | None = None, debounce: float = 0.1, backend: str | WatchBackend = "auto",
+                 poll_interval: float = 1.0):
+        """
+        A constructor for config watcher. The configuration is built immediately.
+
+        Args:
+            builder (ConfigBuilder): a builder to build the configuration with
+            paths (list[str]): resolved paths to configuration files
+            overrides (dict | None): overrides for `build_from_files`
+            ctx (dict | None): context for `build_from_files`
+            debounce (float): the configuration is rebuilt once there are no changes during this period, in seconds
+            backend (str | WatchBackend): a file watcher backend. See `make_watch_backend`
+            poll_interval (float): how often the files are checked by polling backend, in seconds
+        """
+        self._builder = builder
+        self._paths = paths
+        self._overrides = overrides
+        self._ctx = ctx
+        self.debounce = debounce
+        self._backend = make_watch_backend(backend, poll_interval)
+        self._subscribers: list[Callable[[ConfigChange], None]] = []
+        self._queues: list[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+        try:
+            config, dependencies = self._builder._build_from_paths(self._paths, self._overrides, self._ctx)
+            self.config = self._builder._make_result(config)
+            self._set_files(dependencies.files)
+            self._thread = threading.Thread(target=self._run, name="configtpl-watcher", daemon=True)
+            self._thread.start()
+        except BaseException:
+            self._backend.close()
+            raise
+
+    @property
+    def files(self) -> set[str]:
+        """
+        Returns the files which are watched
+        """
+        return set(self._files)
+
+    def subscribe(self, callback: Callable[[ConfigChange], None]) -> None:
+        """
+        Adds a callback which is called from watcher thread after the configuration is rebuilt
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def changes(self, timeout: float | None = None) -> Iterator[ConfigChange]:
+        """
+        Iterates over configuration changes. The iteration stops once the watcher is stopped
+        or no changes are received within timeout.
+        The changes are collected from the moment this method is called, even if the iteration starts later.
+        """
+        changes_queue: queue.Queue = queue.Queue()
+        with self._lock:
+            self._queues.append(changes_queue)
+        iterator = self._iter_changes(changes_queue, timeout)
+        # The queue is removed once the iteration is over or the iterator is discarded before it is started
+        weakref.finalize(iterator, self._remove_queue, changes_queue)
+        return iterator
+
+    def _iter_changes(self, changes_queue: queue.Queue, timeout: float | None) -> Iterator[ConfigChange]:
+        try:
+            while not self._stopped.is_set():
+                try:
+                    change = changes_queue.get(timeout=timeout)
+                except queue.Empty:
+                    return
+                if change is None:
+                    return
+                yield change
+        finally:
+            self._remove_queue(changes_queue)
+
+    def _remove_queue(self, changes_queue: queue.Queue) -> None:
+        with self._lock:
+            if changes_queue in self._queues:
+                self._queues.remove(changes_queue)
+
+    def stop(self) -> None:
+        """
+        Stops watching the files
+        """
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._backend.wakeup()
+        # A subscriber might stop the watcher from the watcher thread, which exits once the callback returns
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+        self._backend.close()
+        with self._lock:
+            for changes_queue in self._queues:
+                changes_queue.put(None)
+
+    def __enter__(self) -> "ConfigWatcher":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    def _set_files(self, files: dict[str, FileSignature | None]) -> None:
+        self._files = set(files)
+        self._backend.set_files(files)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            changed_files = self._backend.wait(None)
+            if not changed_files:
+                continue
+            # Debounce: wait until the files stop changing
+            while not self._stopped.is_set():
+                more_changes = self._backend.wait(self.debounce)
+                if not more_changes:
+                    break
+                changed_files |= more_changes
+            if not self._stopped.is_set():
+                self._rebuild(changed_files)
+
+    def _rebuild(self, changed_files: set[str]) -> None:
+        previous = self.config
+        try:
+            config, dependencies = self._builder._build_from_paths(self._paths, self._overrides, self._ctx)
+        except Exception as e:
+            self._publish(ConfigChange(config=previous, previous=previous, changed_files=changed_files, error=e))
+            return
+
+        self._set_files(dependencies.files)
+        config = self._builder._make_result(config)
+        diff = dict_diff(previous, config)
+        if not diff:
+            return
+        self.config = config
+        self._publish(ConfigChange(config=config, previous=previous, diff=diff, changed_files=changed_files))
+
+    def _publish(self, change: ConfigChange) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+            queues = list(self._queues)
+        # A failing subscriber must not stop the watcher thread or prevent the others from being notified
+        for changes_queue in queues:
+            try:
+                changes_queue.put(change)
+            except Exception:
+                logger.exception("Failed to put a configuration change into a queue")
+        for callback in subscribers:
+            try:
+                callback(change)
+            except Exception:
+                logger.exception("A subscriber of configuration changes has failed: %r", callback)
@@ -0,0 +1,31 @@
+import os
+import tempfile
+import time
+import unittest
+
+
+class TempDirTestCase(unittest.TestCase):
+    """
+    A test case with a temporary directory which is removed after each test
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.mtime_ns = time.time_ns()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp_dir.name, name)
+
+    def write(self, name: str, contents: str) -> str:
+        """
+        Writes a file into the temporary directory, creating its parent directories, and returns its path.
+        Each written file gets a later modification time, so the changes are detected even on file systems
+        with low time resolution
+        """
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(contents)
+        self.mtime_ns += 10 ** 9
+        os.utime(path, ns=(self.mtime_ns, self.mtime_ns))
+        return path
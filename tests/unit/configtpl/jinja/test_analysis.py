@@ -0,0 +1,32 @@
+import unittest
+
+import jinja2
+
+from configtpl.jinja.analysis import outline_template
+
+
+class TestOutlineTemplate(unittest.TestCase):
+    def outline(self, name: str, **templates: str):
+        env = jinja2.Environment(loader=jinja2.DictLoader(templates))
+        return outline_template(env, name)[0]
+
+    def test_keys_and_names(self):
+        outline = self.outline(
+            "main",
+            main="{% set name = 'x' %}\nserver:\n  port: {{ port }}\n\"quoted key\": 1\n{% include 'part' %}\n"
+                 "{% if debug %}\nextra: {{ name }}\n{% endif %}\nurl: http://example.com",
+            part="db:\n  user: {{ user }}",
+        )
+        self.assertEqual({"server", "quoted key", "db", "extra", "url"}, outline.keys)
+        self.assertEqual({"port", "user", "debug"}, outline.names)
+
+    def test_unknown_keys(self):
+        self.assertIsNone(self.outline("main", main="{{ section }}: 1").keys)
+        self.assertIsNone(self.outline("main", main="key_{{ env }}: 1").keys)
+        self.assertIsNone(self.outline("main", main="{% for i in items %}\nitem{{ i }}: 1\n{% endfor %}").keys)
+        self.assertIsNone(self.outline("main", main="{% macro m() %}\nq: 1\n{% endmacro %}\na: {{ m() }}").keys)
+        self.assertEqual({"z"}, self.outline("main", main="{% for i in items %}\n  - {{ i }}\n{% endfor %}\nz: 1").keys)
+
+        outline = self.outline("main", main="{% include name %}")
+        self.assertIsNone(outline.keys)
+        self.assertIsNone(outline.names)
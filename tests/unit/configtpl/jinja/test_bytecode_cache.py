@@ -0,0 +1,42 @@
+import asyncio
+import os
+from unittest.mock import patch
+
+import jinja2
+
+from configtpl.config_builder import ConfigBuilder
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+
+class TestBytecodeCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = self.path("cache")
+        self.cfg_path = self.write("config.cfg", "{% set name = 'John' %}\nuser: {{ name }}\n")
+
+    def test_compiled_templates_are_reused(self):
+        self.assertEqual({"user": "John"},
+                         ConfigBuilder(jinja_bytecode_cache=self.cache_dir).build_from_files(self.cfg_path))
+        self.assertEqual(1, len(os.listdir(self.cache_dir)))
+
+        # A new builder simulates a new process: the template must be loaded from cache without compilation
+        with patch.object(jinja2.Environment, "compile", side_effect=AssertionError("Template is compiled")):
+            self.assertEqual({"user": "John"},
+                             ConfigBuilder(jinja_bytecode_cache=self.cache_dir).build_from_files(self.cfg_path))
+
+    def test_changed_source_is_recompiled(self):
+        ConfigBuilder(jinja_bytecode_cache=self.cache_dir).build_from_files(self.cfg_path)
+        self.write("config.cfg", "user: Jane\n")
+        self.assertEqual({"user": "Jane"},
+                         ConfigBuilder(jinja_bytecode_cache=self.cache_dir).build_from_files(self.cfg_path))
+
+    def test_sync_and_async_entries(self):
+        self.assertEqual({"user": "John"},
+                         ConfigBuilder(jinja_bytecode_cache=self.cache_dir).build_from_files(self.cfg_path))
+        # The async build must not load the bytecode compiled for synchronous rendering
+        builder = ConfigBuilder(jinja_bytecode_cache=self.cache_dir)
+        self.assertEqual({"user": "John"}, asyncio.run(builder.build_from_files_async(self.cfg_path)))
+        self.assertEqual(2, len(os.listdir(self.cache_dir)))
+        self.assertEqual({"user": "John"}, ConfigBuilder(jinja_bytecode_cache=self.cache_dir).build_from_files(
+            self.cfg_path))
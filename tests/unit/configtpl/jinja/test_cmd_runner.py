@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+import subprocess
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from configtpl.config_builder import ConfigBuilder
+from configtpl.jinja.cmd_runner import CmdRunner, set_cmd_concurrency_limit
+
+
+class TestCmdRunner(unittest.TestCase):
+    @patch("subprocess.run", return_value=MagicMock(stdout="abc123"))
+    def test_memoized_during_build(self, mock_run):
+        builder = ConfigBuilder(jinja_globals={"cmd": CmdRunner()})
+        tpl = "a: {{ cmd('git rev-parse HEAD') }}\nb: {{ cmd('git rev-parse HEAD') }}\n"
+        self.assertEqual({"a": "abc123", "b": "abc123"}, builder.build_from_str(tpl))
+        self.assertEqual(1, mock_run.call_count)
+
+        # The memo is not shared between builds
+        builder.build_from_str(tpl)
+        self.assertEqual(2, mock_run.call_count)
+
+    @patch("subprocess.run", return_value=MagicMock(stdout="abc123"))
+    def test_cache_across_builds(self, mock_run):
+        runner = CmdRunner(cache_ttl=60)
+        builder = ConfigBuilder(jinja_globals={"cmd": runner})
+        builder.build_from_str("a: {{ cmd('git rev-parse HEAD') }}")
+        builder.build_from_str("a: {{ cmd('git rev-parse HEAD') }}")
+        self.assertEqual(1, mock_run.call_count)
+
+        runner.clear_cache()
+        builder.build_from_str("a: {{ cmd('git rev-parse HEAD') }}")
+        self.assertEqual(2, mock_run.call_count)
+
+    @patch("subprocess.run", return_value=MagicMock(stdout="out"))
+    def test_timeout(self, mock_run):
+        CmdRunner(timeout=5)("echo Hello")
+        mock_run.assert_called_once_with("echo Hello", shell=True, check=True, stdout=subprocess.PIPE,
+                                         stderr=subprocess.PIPE, text=True, timeout=5)
+
+    def test_timeout_expired(self):
+        with self.assertRaises(subprocess.TimeoutExpired):
+            CmdRunner(timeout=0.1)("exec sleep 5")
+
+    @patch("subprocess.run", return_value=MagicMock(stdout="out"))
+    def test_stats(self, _):
+        runner = CmdRunner()
+        ConfigBuilder(jinja_globals={"cmd": runner}).build_from_str("a: {{ cmd('a') }}\nb: {{ cmd('a') }}")
+        stats = runner.stats()["a"]
+        self.assertEqual((2, 1), (stats.calls, stats.executions))
+
+    def test_concurrency_limit(self):
+        running = 0
+        max_running = 0
+        lock = threading.Lock()
+
+        def run(*args, **kwargs):
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return MagicMock(stdout="out")
+
+        set_cmd_concurrency_limit(2)
+        try:
+            with patch("subprocess.run", side_effect=run), ThreadPoolExecutor(8) as pool:
+                runner = CmdRunner()
+                list(pool.map(runner, [f"cmd {i}" for i in range(16)]))
+        finally:
+            set_cmd_concurrency_limit(None)
+        self.assertEqual(2, max_running)
+
+    def test_concurrent_calls_are_deduplicated(self):
+        def run(*args, **kwargs):
+            time.sleep(0.05)
+            return MagicMock(stdout="out")
+
+        with patch("subprocess.run", side_effect=run) as mock_run, ThreadPoolExecutor(4) as pool:
+            runner = CmdRunner(cache_ttl=60)
+            self.assertEqual(["out"] * 4, list(pool.map(runner, ["same"] * 4)))
+        self.assertEqual(1, mock_run.call_count)
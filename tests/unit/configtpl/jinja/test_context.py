@@ -0,0 +1,20 @@
+import unittest
+
+from configtpl.jinja.context import LayeredContext
+
+
+class TestLayeredContext(unittest.TestCase):
+    def test_lookup(self):
+        user_ctx = {"a": "ctx"}
+        cfg = {"a": "cfg", "b": "cfg"}
+        ctx = LayeredContext(user_ctx, cfg)
+        self.assertEqual("ctx", ctx["a"])
+        self.assertEqual("cfg", ctx["b"])
+        self.assertNotIn("c", ctx)
+        self.assertIsNone(ctx.get("c"))
+        self.assertEqual(["a", "b"], list(ctx))
+        self.assertEqual(2, len(ctx))
+
+        # The layers are not copied
+        cfg["c"] = "cfg"
+        self.assertEqual("cfg", ctx["c"])
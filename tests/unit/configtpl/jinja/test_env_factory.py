@@ -0,0 +1,58 @@
+import pickle
+import threading
+import unittest
+
+from configtpl.jinja.env_factory import JinjaEnvFactory
+
+
+class TestJinjaEnvFactory(unittest.TestCase):
+    def test_cache(self):
+        factory = JinjaEnvFactory(env_cache_size=2)
+        env_a = factory.get_fs_jinja_environment("/a")
+        self.assertIs(env_a, factory.get_fs_jinja_environment("/a"))
+        self.assertIsNot(env_a, factory.get_fs_jinja_environment("/a", enable_async=True))
+        self.assertIs(env_a, factory.get_fs_jinja_environment("/a"))
+        factory.get_fs_jinja_environment("/b")  # evicts the least recently used async environment of '/a'
+        self.assertIs(env_a, factory.get_fs_jinja_environment("/a"))
+
+        info = factory.cache_info()
+        self.assertEqual((3, 3, 2, 2), (info.hits, info.misses, info.size, info.max_size))
+
+    def test_cached_environments_are_updated(self):
+        factory = JinjaEnvFactory(globals={"greet": lambda: "hi"}, filters={"shout": lambda s: s.upper()})
+        env = factory.get_fs_jinja_environment("/a")
+        tpl = env.from_string("{{ greet() | shout }}")
+        self.assertEqual("HI", tpl.render())
+        factory.set_global("greet", lambda: "hello")
+        factory.set_filter("shout", lambda s: s.upper() + "!")
+
+        self.assertIs(env, factory.get_fs_jinja_environment("/a"))
+        self.assertEqual("HELLO!", tpl.render())
+        self.assertIn("greet", factory.get_fs_jinja_environment("/b").globals)
+
+    def test_concurrent_access(self):
+        factory = JinjaEnvFactory(env_cache_size=4)
+        errors = []
+
+        def worker(n: int) -> None:
+            try:
+                for i in range(200):
+                    env = factory.get_fs_jinja_environment(f"/dir{(n + i) % 8}")
+                    self.assertIn("cmd", env.globals)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        self.assertEqual(4, factory.cache_info().size)
+
+    def test_pickle(self):
+        factory = JinjaEnvFactory(env_cache_size=4)
+        factory.get_fs_jinja_environment("/a")
+        copy = pickle.loads(pickle.dumps(factory))
+        self.assertEqual((0, 4), (copy.cache_info().size, copy.cache_info().max_size))
+        self.assertIn("cmd", copy.get_fs_jinja_environment("/a").globals)
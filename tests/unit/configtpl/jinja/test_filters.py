@@ -0,0 +1,26 @@
+import unittest
+
+import jinja2
+
+from configtpl.jinja.filters import (jinja_filter_base64, jinja_filter_base64_decode, jinja_filter_md5,
+                                     jinja_filter_sha256)
+
+
+class TestJinjaFilters(unittest.TestCase):
+    def test_bytes_and_str(self):
+        for value in ("value", b"value", bytearray(b"value"), memoryview(b"value")):
+            with self.subTest(value=value):
+                self.assertEqual("2063c1608d6e0baf80249c42e2be5804", jinja_filter_md5(value))
+                self.assertEqual("cd42404d52ad55ccfa9aca4adc828aa5800ad9d385a0671fbcbf724118320619",
+                                 jinja_filter_sha256(value))
+                self.assertEqual("dmFsdWU=", jinja_filter_base64(value))
+        self.assertEqual("value", jinja_filter_base64_decode(b"dmFsdWU="))
+
+    def test_other_types(self):
+        for value in (None, 1, {"a": 1}, ["value"]):
+            with self.subTest(value=value):
+                for jinja_filter in (jinja_filter_md5, jinja_filter_sha256, jinja_filter_base64):
+                    with self.assertRaises(TypeError):
+                        jinja_filter(value)
+        with self.assertRaisesRegex(jinja2.UndefinedError, "'missing' is undefined"):
+            jinja_filter_md5(jinja2.StrictUndefined(name="missing"))
@@ -1,8 +1,12 @@
+import hashlib
+import os
 import subprocess
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 
-from configtpl.jinja.globals import jinja_global_cmd, jinja_global_env
+from configtpl.jinja.globals import jinja_global_cmd, jinja_global_env, jinja_global_file_hash
+from configtpl.tracking import BuildTracker, tracking
 
 
 class TestJinjaGlobals(unittest.TestCase):
@@ -44,3 +48,24 @@ class TestJinjaGlobals(unittest.TestCase):
         self.assertEqual(mock_getenv.call_count, 2)
         mock_getenv.assert_any_call("TEST_VAR", "default_value")
         mock_getenv.assert_any_call("THIS_DOES_NOT_EXIST", "default_value")
+
+    def test_jinja_global_file_hash(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "bundle.pem")
+            with open(path, "wb") as f:
+                f.write(b"x" * 1000000)
+            tracker = BuildTracker()
+            with tracking(tracker):
+                self.assertEqual(hashlib.sha256(b"x" * 1000000).hexdigest(), jinja_global_file_hash(path))
+            self.assertIn(os.path.realpath(path), tracker.dependencies.files)
+            self.assertEqual(hashlib.md5(b"x" * 1000000).hexdigest(), jinja_global_file_hash(path, "md5"))
+
+            # The digest is memoized until the file is changed
+            with patch("hashlib.file_digest", side_effect=AssertionError("File is hashed")):
+                jinja_global_file_hash(path)
+            with open(path, "wb") as f:
+                f.write(b"y")
+            self.assertEqual(hashlib.sha256(b"y").hexdigest(), jinja_global_file_hash(path))
+
+            with self.assertRaises(ValueError):
+                jinja_global_file_hash(path, "unknown")
@@ -0,0 +1,108 @@
+import contextlib
+import io
+import os
+from unittest.mock import patch
+
+import jinja2
+
+from configtpl.cli import main
+from configtpl.config_builder import ConfigBuilder
+from configtpl.jinja.loader import PrecompiledLoader, StoreFileSystemLoader
+from configtpl.jinja.precompile import read_manifest
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+
+class PrecompileTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.configs = self.path("configs")
+        self.write("configs/base.cfg", "name: {{ name }}\n")
+        self.write("configs/sub/app.cfg", "{% include 'part.cfg' %}\nport: {{ 8000 + 80 }}\n")
+        self.write("configs/sub/part.cfg", "part: sub\n")
+        self.write("configs/broken.cfg", "{% if %}\n")
+        self.paths = [self.path("configs/base.cfg"), self.path("configs/sub/app.cfg")]
+        self.expected = {"name": "app", "part": "sub", "port": 8080}
+
+    def build(self, builder: ConfigBuilder) -> dict:
+        return builder.build_from_files(self.paths, ctx={"name": "app"})
+
+    def test_precompile(self):
+        for zip, target in ((None, self.path("compiled")), ("deflated", self.path("compiled.zip"))):
+            with self.subTest(zip=zip):
+                # The templates with syntax errors are skipped
+                self.assertEqual(3, ConfigBuilder().precompile_templates(self.configs, target, zip=zip))
+                self.assertNotIn("broken.cfg", read_manifest(target)["templates"])
+                self.assertEqual(3, len(read_manifest(target)["templates"]))
+
+                builder = ConfigBuilder(precompiled_templates={self.configs: target})
+                with patch.object(jinja2.Environment, "compile", side_effect=AssertionError("Template is compiled")):
+                    self.assertEqual(self.expected, self.build(builder))
+                env = builder.jinja_env_factory.get_fs_jinja_environment(self.path("configs/sub"))
+                self.assertIsInstance(env.loader, PrecompiledLoader)
+                tpl = env.get_template("app.cfg")
+                self.assertEqual(("app.cfg", self.path("configs/sub/app.cfg")), (tpl.name, tpl.filename))
+
+    def test_changed_source(self):
+        target = self.path("compiled")
+        ConfigBuilder().precompile_templates(self.configs, target)
+        builder = ConfigBuilder(precompiled_templates={self.configs: target})
+        self.assertEqual(self.expected, self.build(builder))
+        # The changed template is compiled from source, the unchanged ones are still loaded from the modules
+        self.write("configs/sub/part.cfg", "part: changed\n")
+        self.assertEqual({**self.expected, "part": "changed"}, self.build(builder))
+        self.assertEqual({**self.expected, "part": "changed"},
+                         self.build(ConfigBuilder(precompiled_templates={self.configs: target})))
+
+    def test_incompatible_environment(self):
+        target = self.path("compiled")
+        ConfigBuilder().precompile_templates(self.configs, target, pattern="*.cfg")
+        for builder, enable_async in ((ConfigBuilder(jinja_constructor_args={"keep_trailing_newline": True},
+                                                     precompiled_templates={self.configs: target}), False),
+                                      (ConfigBuilder(precompiled_templates={self.configs: target}), True),
+                                      (ConfigBuilder(precompiled_templates={self.configs: self.path("missing")}),
+                                       False)):
+            env = builder.jinja_env_factory.get_fs_jinja_environment(self.configs, enable_async=enable_async)
+            self.assertIs(StoreFileSystemLoader, type(env.loader))
+        self.assertEqual(self.expected, self.build(ConfigBuilder(jinja_constructor_args={"keep_trailing_newline": True},
+                                                                 precompiled_templates={self.configs: target})))
+
+    def test_autoescape_and_finalize(self):
+        self.write("configs/escape.cfg", 'a: "{{ x }}"\n')
+        target = self.path("compiled")
+        ConfigBuilder().precompile_templates(self.configs, target)
+        path = self.path("configs/escape.cfg")
+        for args, expected in (({"autoescape": True}, "&lt;b&gt;"),
+                               ({"finalize": lambda v: f"[{v}]"}, "[<b>]")):
+            with self.subTest(args=args):
+                builder = ConfigBuilder(jinja_constructor_args=args, precompiled_templates={self.configs: target})
+                self.assertEqual({"a": expected}, builder.build_from_files(path, ctx={"x": "<b>"}))
+                env = builder.jinja_env_factory.get_fs_jinja_environment(self.configs)
+                self.assertIs(StoreFileSystemLoader, type(env.loader))
+
+        # The modules compiled with the same settings are used
+        ConfigBuilder(jinja_constructor_args={"autoescape": True}).precompile_templates(self.configs, target)
+        builder = ConfigBuilder(jinja_constructor_args={"autoescape": True},
+                                precompiled_templates={self.configs: target})
+        with patch.object(jinja2.Environment, "compile", side_effect=AssertionError("Template is compiled")):
+            self.assertEqual({"a": "&lt;b&gt;"}, builder.build_from_files(path, ctx={"x": "<b>"}))
+
+    def test_filters_and_globals(self):
+        self.write("filters/app.cfg", "a: {{ 'x' | md5 }}\nb: {{ 'x' | shout }}\nc: {{ greet() }}\n")
+        configs, target = self.path("filters"), self.path("compiled")
+        builder = ConfigBuilder(jinja_filters={"shout": str.upper}, jinja_globals={"greet": lambda: "hi"},
+                                precompiled_templates={configs: target})
+        self.assertEqual(1, builder.precompile_templates(configs, target))
+        self.assertTrue(os.path.exists(os.path.join(target, jinja2.ModuleLoader.get_module_filename("app.cfg"))))
+        with patch.object(jinja2.Environment, "compile", side_effect=AssertionError("Template is compiled")):
+            self.assertEqual({"a": "9dd4e461268c8034f5c8564e155c67a6", "b": "X", "c": "hi"},
+                             builder.build_from_files(self.path("filters/app.cfg")))
+
+    def test_cli(self):
+        target = self.path("compiled.zip")
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(0, main(["precompile", self.configs, "-o", target, "--zip", "stored",
+                                      "--pattern", "app.cfg"]))
+        self.assertEqual({"sub/app.cfg"}, set(read_manifest(target)["templates"]))
+        builder = ConfigBuilder(precompiled_templates={self.configs: target})
+        self.assertEqual(self.expected, self.build(builder))
@@ -0,0 +1,43 @@
+import pickle
+
+from configtpl.config_builder import ConfigBuilder
+from configtpl.jinja.cmd_runner import CmdRunner
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+
+def str_rev(input: str) -> str:
+    return input[::-1]
+
+
+class BatchBuildTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("base.cfg", "tenant: {{ tenant }}\nreversed: {{ tenant | str_rev }}\n")
+        self.write("overlay.cfg", "url: https://{{ tenant }}.example.com\n{% if tenant == 'bad' %}{{ x }}{% endif %}\n")
+        self.paths = f"{self.path('base.cfg')}:{self.path('overlay.cfg')}"
+        self.builder = ConfigBuilder(jinja_filters={"str_rev": str_rev}, jinja_globals={"cmd": CmdRunner(timeout=5)})
+
+    def check(self, executor: str) -> None:
+        tenants = ["alpha", "bad", "gamma"] + [f"t{i}" for i in range(20)]
+        results = sorted(self.builder.build_many(self.paths, ({"tenant": t} for t in tenants), executor=executor,
+                                                 max_workers=2, overrides={"extra": 1}),
+                         key=lambda r: r.index)
+        self.assertEqual(list(range(len(tenants))), [r.index for r in results])
+        self.assertEqual({"tenant": "alpha", "reversed": "ahpla", "url": "https://alpha.example.com", "extra": 1},
+                         results[0].config)
+        self.assertFalse(results[1].ok)
+        self.assertIsNone(results[1].config)
+        self.assertEqual({"tenant": "bad"}, results[1].ctx)
+        self.assertTrue(all(r.ok for r in results if r.index != 1))
+
+    def test_threads(self):
+        self.check("thread")
+
+    def test_processes(self):
+        self.check("process")
+
+    def test_builder_is_picklable(self):
+        self.builder.build_from_files(self.paths, ctx={"tenant": "alpha"})
+        builder = pickle.loads(pickle.dumps(self.builder))
+        self.assertEqual("ahpla", builder.build_from_files(self.paths, ctx={"tenant": "alpha"})["reversed"])
@@ -0,0 +1,66 @@
+import contextlib
+import io
+import json
+import os
+
+import yaml
+
+from configtpl.cli import main
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+
+class RenderCommandTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("base.cfg", "name: app\nport: {{ port | default(80) }}\n")
+        self.write("prod.cfg", "env: prod\n")
+        self.chain = f"{self.path('base.cfg')}:{self.path('prod.cfg')}"
+
+    def render(self, *args: str) -> tuple[int, str, str]:
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            code = main(["render", *args])
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def test_stdout(self):
+        code, out, _ = self.render(self.chain, "--ctx", '{"port": 8080}')
+        self.assertEqual(0, code)
+        self.assertEqual({"name": "app", "port": 8080, "env": "prod"}, json.loads(out))
+
+        code, out, _ = self.render(self.chain, "-f", "yaml", "--overrides", '{"env": "dev"}')
+        self.assertEqual({"name": "app", "port": 80, "env": "dev"}, yaml.safe_load(out))
+
+    def test_many_targets(self):
+        code, out, _ = self.render(self.chain, self.path("base.cfg"))
+        self.assertEqual([{"name": "app", "port": 80, "env": "prod"}, {"name": "app", "port": 80}],
+                         [json.loads(line) for line in out.splitlines()])
+
+        code, out, _ = self.render(self.chain, self.path("base.cfg"), "-f", "yaml")
+        self.assertEqual([{"name": "app", "port": 80, "env": "prod"}, {"name": "app", "port": 80}],
+                         list(yaml.safe_load_all(out)))
+
+        output = self.path("out/prod.json")
+        code, out, _ = self.render(f"{output}={self.chain}", self.path("base.cfg"))
+        self.assertEqual({"name": "app", "port": 80}, json.loads(out))
+        with open(output) as f:
+            self.assertEqual({"name": "app", "port": 80, "env": "prod"}, json.load(f))
+
+    def test_errors(self):
+        code, out, err = self.render(self.path("missing.cfg"), self.chain)
+        self.assertEqual(1, code)
+        self.assertIn("missing.cfg", err)
+        # The other targets are rendered
+        self.assertEqual({"name": "app", "port": 80, "env": "prod"}, json.loads(out))
+
+    def test_cache_and_profile(self):
+        cache_dir = self.path("cache")
+        for _ in range(2):
+            code, out, err = self.render(self.chain, "--cache-dir", cache_dir, "--profile")
+            self.assertEqual(0, code)
+            self.assertEqual({"name": "app", "port": 80, "env": "prod"}, json.loads(out))
+            self.assertIn(f"target {self.chain}", err)
+        self.assertTrue(os.listdir(os.path.join(cache_dir, "templates")))
+        self.assertTrue(os.listdir(os.path.join(cache_dir, "results")))
+        # The second run takes the configuration from the result cache, so nothing is rendered
+        self.assertNotIn("render", err)
@@ -1,9 +1,12 @@
+import asyncio
 from copy import deepcopy
 from unittest import TestCase
 from unittest.mock import patch, mock_open
 
 from configtpl.config_builder import ConfigBuilder
 
+from tests.unit.configtpl.helpers import TempDirTestCase
+
 FILE_CONFIG_CONTENTS_SIMPLE = """\
 {% set name = "John" %}
 params:
@@ -69,3 +72,89 @@ class CompilerTest(TestCase):
 
 def get_instance() -> ConfigBuilder:
     return ConfigBuilder()
+
+
+class StrTemplateCacheTest(TestCase):
+    def test_compiled_template_is_reused(self) -> None:
+        builder = get_instance()
+        tpl = "value: {{ x }}"
+        with patch.object(builder.jinja_env_factory.get_fs_jinja_environment("/work"), "from_string",
+                          wraps=builder.jinja_env_factory.get_fs_jinja_environment("/work").from_string) as m:
+            self.assertDictEqual({"value": 1}, builder.build_from_str(tpl, work_dir="/work", ctx={"x": 1}))
+            self.assertDictEqual({"value": 2}, builder.build_from_str(tpl, work_dir="/work", ctx={"x": 2}))
+            self.assertEqual(1, m.call_count)
+
+        info = builder.str_template_cache_info()
+        self.assertEqual((1, 1, 1), (info.hits, info.misses, info.size))
+
+    def test_cache_is_keyed_by_template_and_work_dir(self) -> None:
+        builder = get_instance()
+        builder.build_from_str("a: 1", work_dir="/work")
+        builder.build_from_str("a: 1", work_dir="/other")
+        builder.build_from_str("a: 2", work_dir="/work")
+        self.assertEqual(3, builder.str_template_cache_info().size)
+
+        builder.clear_str_template_cache()
+        self.assertEqual(0, builder.str_template_cache_info().size)
+
+    def test_cache_disabled(self) -> None:
+        builder = ConfigBuilder(str_template_cache_size=0)
+        self.assertDictEqual({"a": 1}, builder.build_from_str("a: 1"))
+        self.assertIsNone(builder.str_template_cache_info())
+
+
+class ListMergeStrategyTest(TestCase):
+    def test_merge_by_key(self) -> None:
+        builder = ConfigBuilder(list_merge_strategy="merge_by_key", list_merge_key="name")
+        cfg = builder.build_from_str("users: [{name: a, id: 1}, {name: b, id: 2}]",
+                                     overrides={"users": [{"name": "b", "id": 3}]})
+        self.assertDictEqual({"users": [{"name": "a", "id": 1}, {"name": "b", "id": 3}]}, cfg)
+
+    def test_invalid_strategy(self) -> None:
+        with self.assertRaises(ValueError):
+            ConfigBuilder(list_merge_strategy="merge_by_key")
+
+
+class ContextPrecedenceTest(TempDirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.paths = [self.write("first.cfg", "a: first\n"), self.write("second.cfg", "a: second\nb: '{{ a }}'\n"),
+                      self.write("third.cfg", "c: '{{ a }}-{{ b }}'\n")]
+
+    def test_earlier_values_take_precedence(self) -> None:
+        # A key keeps the value it was defined with first in defaults or the earlier files
+        for builder in (ConfigBuilder(defaults={"a": "default"}),
+                        ConfigBuilder(defaults={"a": "default"}, incremental_cache_size=1)):
+            cfg = builder.build_from_files(self.paths)
+            self.assertDictEqual({"a": "second", "b": "default", "c": "default-default"}, cfg)
+        for builder in (ConfigBuilder(), ConfigBuilder(incremental_cache_size=1)):
+            cfg = builder.build_from_files(self.paths)
+            self.assertDictEqual({"a": "second", "b": "first", "c": "first-first"}, cfg)
+        cfg = ConfigBuilder(defaults={"a": "default"}).build_partial(self.paths, ["c"])
+        self.assertDictEqual({"c": "default-default"}, cfg)
+
+    def test_user_context_takes_precedence(self) -> None:
+        cfg = ConfigBuilder().build_from_files(self.paths, ctx={"a": "ctx"})
+        self.assertDictEqual({"a": "second", "b": "ctx", "c": "ctx-ctx"}, cfg)
+
+    def test_async(self) -> None:
+        cfg = asyncio.run(ConfigBuilder(defaults={"a": "default"}).build_from_files_async(self.paths))
+        self.assertDictEqual({"a": "second", "b": "default", "c": "default-default"}, cfg)
+
+    def test_nested_defaults(self) -> None:
+        # The nested dictionaries of defaults are not updated in place by the merges of later files
+        paths = [self.write("f1.cfg", "a: {y: 2}\n"), self.write("f2.cfg", 'c: "{{ a }}"\n')]
+        expected = {"a": {"x": 1, "y": 2}, "c": "{'x': 1}"}
+        for builder in (ConfigBuilder(defaults={"a": {"x": 1}}),
+                        ConfigBuilder(defaults={"a": {"x": 1}}, incremental_cache_size=1)):
+            self.assertDictEqual(expected, builder.build_from_files(paths))
+        builder = ConfigBuilder(defaults={"a": {"x": 1}})
+        self.assertDictEqual(expected, asyncio.run(builder.build_from_files_async(paths)))
+        self.assertDictEqual({"c": "{'x': 1}"}, builder.build_partial(paths, ["c"]))
+        self.assertEqual({"a": {"x": 1}}, builder.defaults)
+
+    def test_render_error(self) -> None:
+        self.write("third.cfg", "c: '{{ 1 / 0 }}'\n")
+        for builder in (ConfigBuilder(), ConfigBuilder(incremental_cache_size=1)):
+            with self.assertRaises(ZeroDivisionError):
+                builder.build_from_files(self.paths)
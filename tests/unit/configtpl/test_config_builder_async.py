@@ -0,0 +1,60 @@
+import asyncio
+import os
+
+from configtpl.config_builder import ConfigBuilder
+from configtpl.jinja.cmd_runner import CmdRunner
+from configtpl.result_cache import ResultCache
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+
+class AsyncBuildTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("base.cfg", "{% set name = 'John' %}\nuser: {{ name }}\n{% include 'part.cfg' %}\n")
+        self.write("part.cfg", "part: {{ file(snippet) | trim }}\n")
+        self.write("overlay.cfg", "greeting: Hello, {{ user }}!\ncommand: {{ cmd('echo out') | trim }}\n")
+        self.write("snippet.txt", "snippet\n")
+        self.paths = f"{self.path('base.cfg')}:{self.path('overlay.cfg')}"
+        self.ctx = {"snippet": self.path("snippet.txt")}
+
+    def test_same_result_as_sync(self):
+        builder = ConfigBuilder()
+        expected = builder.build_from_files(self.paths, ctx=self.ctx, overrides={"extra": 1})
+        self.assertEqual({"user": "John", "part": "snippet", "greeting": "Hello, John!", "command": "out",
+                          "extra": 1}, expected)
+        self.assertEqual(expected, asyncio.run(
+            builder.build_from_files_async(self.paths, ctx=self.ctx, overrides={"extra": 1})))
+
+    def test_build_from_str(self):
+        tpl = "a: {{ file(snippet) | trim }}\nb: {{ cmd('echo b') | trim }}\n{% include 'part.cfg' %}"
+        builder = ConfigBuilder()
+        self.assertEqual(builder.build_from_str(tpl, work_dir=self.tmp_dir.name, ctx=self.ctx),
+                         asyncio.run(builder.build_from_str_async(tpl, work_dir=self.tmp_dir.name, ctx=self.ctx)))
+
+    def test_commands_run_concurrently(self):
+        # The first command waits for the last one, so the build completes only if they are executed concurrently
+        marker = self.path("marker")
+        tpl = f"a: {{{{ cmd('while [ ! -e {marker} ]; do sleep 0.01; done; echo a') | trim }}}}\n" \
+              f"b: {{{{ cmd('echo b') | trim }}}}\nc: {{{{ cmd('touch {marker}; echo c') | trim }}}}\n"
+        builder = ConfigBuilder(jinja_globals={"cmd": CmdRunner(timeout=10)})
+        cfg = asyncio.run(builder.build_from_str_async(tpl))
+        self.assertEqual({"a": "a", "b": "b", "c": "c"}, cfg)
+
+    def test_conditional_calls_are_not_prefetched(self):
+        marker = self.path("marker")
+        tpl = f"{{% if false %}}a: {{{{ cmd('touch {marker}') }}}}{{% endif %}}\nb: 1\n"
+        self.assertEqual({"b": 1}, asyncio.run(ConfigBuilder().build_from_str_async(tpl)))
+        self.assertFalse(os.path.exists(marker))
+
+    def test_custom_cmd_runner(self):
+        runner = CmdRunner()
+        builder = ConfigBuilder(jinja_globals={"cmd": runner})
+        asyncio.run(builder.build_from_str_async("a: {{ cmd('echo a') }}\nb: {{ cmd('echo a') }}"))
+        self.assertEqual(1, runner.stats()["echo a"].executions)
+
+    def test_result_cache(self):
+        builder = ConfigBuilder(result_cache=ResultCache(allow_nondeterministic=True))
+        expected = asyncio.run(builder.build_from_files_async(self.paths, ctx=self.ctx))
+        self.assertEqual(expected, asyncio.run(builder.build_from_files_async(self.paths, ctx=self.ctx)))
+        self.assertEqual(1, builder.result_cache.info().hits)
@@ -0,0 +1,73 @@
+import asyncio
+
+from configtpl.config_builder import ConfigBuilder
+from configtpl.content_store import ContentStore
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+
+class ContentStoreTest(TempDirTestCase):
+    def test_read(self):
+        store = ContentStore()
+        path = self.write("a.txt", "first")
+        self.assertEqual("first", store.read(path))
+        self.assertEqual("first", store.read(path))
+        self.write("a.txt", "second")
+        self.assertEqual("second", store.read(path))
+
+        info = store.info()
+        self.assertEqual((1, 2, 1, 6), (info.hits, info.misses, info.files, info.bytes))
+        with self.assertRaises(FileNotFoundError):
+            store.read(self.path("missing.txt"))
+
+    def test_memory_cap(self):
+        store = ContentStore(max_bytes=10)
+        store.pin(self.write("pinned.txt", "x" * 8))
+        store.read(self.write("a.txt", "a" * 6))
+        store.read(self.write("b.txt", "b" * 6))  # evicts a.txt
+        store.read(self.write("big.txt", "c" * 11))  # exceeds the cap, not stored
+
+        info = store.info()
+        self.assertEqual((2, 14, 1), (info.files, info.bytes, info.pinned))
+        store.read(self.path("pinned.txt"))
+        store.read(self.path("b.txt"))
+        self.assertEqual(2, store.info().hits)
+
+    def test_preload(self):
+        self.write("snippets/a.pem", "a")
+        self.write("snippets/nested/b.pem", "b")
+        self.write("snippets/c.txt", "c")
+        store = ContentStore()
+        self.assertEqual(2, store.preload(self.path("snippets"), "*.pem", pin=True))
+        self.assertEqual((2, 2), (store.info().files, store.info().pinned))
+        self.assertEqual("b", store.read(self.path("snippets/nested/b.pem")))
+        self.assertEqual(1, store.info().hits)
+
+    def test_shared_by_builders(self):
+        self.write("part.cfg", "part: {{ file(snippet) }}\n")
+        self.write("snippet.txt", "snippet")
+        base = self.write("base.cfg", "{% include 'part.cfg' %}\nother: '{{ file(snippet) }}'\n")
+        store = ContentStore()
+        ctx = {"snippet": self.path("snippet.txt")}
+
+        expected = {"part": "snippet", "other": "snippet"}
+        self.assertEqual(expected, ConfigBuilder(content_store=store).build_from_files(base, ctx=ctx))
+        self.assertEqual(3, store.info().misses)
+        builder = ConfigBuilder(content_store=store)
+        self.assertEqual(expected, builder.build_from_files(base, ctx=ctx))
+        self.assertEqual(expected, asyncio.run(builder.build_from_files_async(base, ctx=ctx)))
+        self.assertEqual(3, builder.content_store_info().misses)
+
+        self.write("snippet.txt", "changed")
+        self.assertEqual({"part": "changed", "other": "changed"}, builder.build_from_files(base, ctx=ctx))
+
+    def test_no_store(self):
+        # The store is opt-in, so the builders do not keep the files in memory by default
+        self.write("part.cfg", "part: {{ file(snippet) }}\n")
+        self.write("snippet.txt", "snippet")
+        base = self.write("base.cfg", "{% include 'part.cfg' %}\n")
+        ctx = {"snippet": self.path("snippet.txt")}
+        builder = ConfigBuilder(low_memory=True)
+        self.assertIsNone(builder.content_store_info())
+        self.assertEqual({"part": "snippet"}, builder.build_from_files(base, ctx=ctx))
+        self.assertEqual({"part": "snippet"}, asyncio.run(builder.build_from_files_async(base, ctx=ctx)))
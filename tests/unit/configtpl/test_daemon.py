@@ -0,0 +1,116 @@
+import os
+import socket
+import stat
+import threading
+import unittest
+from unittest import mock
+
+from configtpl.config_builder import ConfigBuilder
+from configtpl.daemon import ConfigClient, ConfigDaemon, ConfigDaemonError
+from configtpl.frozen import FrozenConfig
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix domain sockets are not supported")
+class ConfigDaemonTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("base.cfg", "name: app\nport: {{ port | default(80) }}\n")
+        self.write("prod.cfg", "{% include 'part.cfg' %}\n")
+        self.write("part.cfg", "env: prod\n")
+        self.configs = {"app": f"{self.path('base.cfg')}:{self.path('prod.cfg')}"}
+        self.socket_path = self.path("configtpl.sock")
+
+    def test_serve(self):
+        with ConfigDaemon(ConfigBuilder(), self.configs, self.socket_path) as daemon, \
+                ConfigClient(self.socket_path) as client:
+            self.assertTrue(client.ping())
+            self.assertEqual({"name": "app", "port": 80, "env": "prod"}, client.get("app"))
+            self.assertEqual({"name": "app", "port": 8080, "env": "prod", "x": 1},
+                             client.get("app", ctx={"port": 8080}, overrides={"x": 1}))
+            self.assertEqual({"name": "app", "port": 80, "env": "prod"}, client.get("app"))
+            self.assertEqual((1, 2), (daemon.cache_info().hits, daemon.cache_info().misses))
+
+            # An included template is changed
+            self.write("part.cfg", "env: staging\n")
+            self.assertEqual({"name": "app", "port": 80, "env": "staging"}, client.get("app"))
+
+            with self.assertRaisesRegex(ConfigDaemonError, "Unknown configuration"):
+                client.get("unknown")
+
+    def test_concurrent_clients(self):
+        results = []
+        with ConfigDaemon(ConfigBuilder(), self.configs, self.socket_path), ConfigClient(self.socket_path) as client:
+            threads = [threading.Thread(target=lambda: results.append(client.get("app"))) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual([{"name": "app", "port": 80, "env": "prod"}] * 8, results)
+
+    def test_fallback(self):
+        client = ConfigClient(self.socket_path, fallback=ConfigBuilder(), configs=self.configs, frozen=True)
+        self.assertFalse(client.ping())
+        cfg = client.get("app")
+        self.assertIsInstance(cfg, FrozenConfig)
+        self.assertEqual({"name": "app", "port": 80, "env": "prod"}, cfg)
+
+        with self.assertRaises(ConfigDaemonError):
+            ConfigClient(self.socket_path).get("app")
+
+    def test_daemon_restart(self):
+        with ConfigClient(self.socket_path) as client:
+            with ConfigDaemon(ConfigBuilder(), self.configs, self.socket_path):
+                client.get("app")
+            with ConfigDaemon(ConfigBuilder(), self.configs, self.socket_path):
+                self.assertEqual({"name": "app", "port": 80, "env": "prod"}, client.get("app"))
+
+    def test_socket_in_use(self):
+        with ConfigDaemon(ConfigBuilder(), self.configs, self.socket_path), ConfigClient(self.socket_path) as client:
+            with self.assertRaisesRegex(ConfigDaemonError, "Another daemon"):
+                ConfigDaemon(ConfigBuilder(), self.configs, self.socket_path).start()
+            # The running daemon keeps serving
+            self.assertEqual({"name": "app", "port": 80, "env": "prod"}, client.get("app"))
+
+        self.write("configtpl.sock", "")
+        with self.assertRaisesRegex(ConfigDaemonError, "not a socket"):
+            ConfigDaemon(ConfigBuilder(), self.configs, self.socket_path).start()
+
+    def test_stale_socket(self):
+        # A socket file which is left by a killed daemon
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.socket_path)
+        sock.close()
+        with ConfigDaemon(ConfigBuilder(), self.configs, self.socket_path), ConfigClient(self.socket_path) as client:
+            self.assertEqual({"name": "app", "port": 80, "env": "prod"}, client.get("app"))
+
+    def test_socket_mode(self):
+        modes = []
+        chmod = os.chmod
+
+        def record_chmod(path, mode):
+            # The permissions of socket file before chmod
+            modes.append(stat.S_IMODE(os.stat(path).st_mode))
+            chmod(path, mode)
+
+        with mock.patch("os.chmod", side_effect=record_chmod), \
+                ConfigDaemon(ConfigBuilder(), self.configs, self.socket_path, socket_mode=0o660):
+            self.assertEqual(0o660, stat.S_IMODE(os.stat(self.socket_path).st_mode))
+        self.assertEqual([0], modes)
+
+    def test_timeout_is_not_retried(self):
+        # A daemon which accepts the connections, but does not respond
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(listener.close)
+        listener.bind(self.socket_path)
+        listener.listen()
+        with ConfigClient(self.socket_path, timeout=0.1) as client:
+            client._connect()
+            conn, _ = listener.accept()
+            self.addCleanup(conn.close)
+            self.assertFalse(client.ping())
+        # The client has not reconnected
+        listener.setblocking(False)
+        with self.assertRaises(BlockingIOError):
+            listener.accept()
@@ -0,0 +1,68 @@
+
+from configtpl.config_builder import ConfigBuilder
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+
+class DependencyGraphTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("base.cfg", "app:\n  name: myapp\nunrelated: 1\n")
+        self.write("middle.cfg", "{% include 'part.cfg' %}\nsnippet: {{ file(snippet_path) | trim }}\n")
+        self.write("part.cfg", "part: value\n")
+        self.write("snippet.txt", "snippet")
+        self.write("last.cfg", "title: {{ app.name }}-{{ suffix }}\n")
+        self.paths = [self.path("base.cfg"), self.path("middle.cfg"), self.path("last.cfg")]
+        self.ctx = {"suffix": "prod", "snippet_path": self.path("snippet.txt")}
+        self.builder = ConfigBuilder(incremental_cache_size=8)
+
+    def build(self, compare: bool = True) -> tuple[dict, list[int]]:
+        cfg = self.builder.build_from_files(self.paths, ctx=self.ctx)
+        if compare:
+            self.assertDictEqual(ConfigBuilder().build_from_files(self.paths, ctx=self.ctx), cfg)
+        return cfg, self.builder.get_dependency_graph(self.paths, ctx=self.ctx).rendered_stages
+
+    def test_graph(self):
+        self.assertIsNone(self.builder.get_dependency_graph(self.paths, ctx=self.ctx))
+        self.build()
+        graph = self.builder.get_dependency_graph(self.paths, ctx=self.ctx)
+        self.assertEqual({self.path(f) for f in ("base.cfg", "middle.cfg", "part.cfg", "snippet.txt", "last.cfg")},
+                         graph.files)
+        # User context is not tracked. Globals are tracked, because configuration keys would shadow them
+        self.assertEqual({"file"}, set(graph.stages[1].keys_read))
+        self.assertEqual({"app"}, set(graph.stages[2].keys_read))
+
+    def test_nothing_changed(self):
+        self.assertEqual([0, 1, 2], self.build()[1])
+        self.assertEqual([], self.build()[1])
+
+    def test_last_file_changed(self):
+        self.build()
+        self.write("last.cfg", "title: {{ app.name }}\n")
+        cfg, rendered = self.build()
+        self.assertEqual([2], rendered)
+        self.assertEqual("myapp", cfg["title"])
+
+    def test_included_file_changed(self):
+        self.build()
+        self.write("part.cfg", "part: changed\n")
+        self.assertEqual([1], self.build()[1])
+        self.write("snippet.txt", "changed")
+        self.assertEqual([1], self.build()[1])
+
+    def test_key_read_by_later_file_changed(self):
+        self.build()
+        self.write("base.cfg", "app:\n  name: otherapp\nunrelated: 1\n")
+        cfg, rendered = self.build()
+        self.assertEqual([0, 2], rendered)
+        self.assertEqual("otherapp-prod", cfg["title"])
+
+    def test_key_not_read_by_later_files_changed(self):
+        self.build()
+        self.write("base.cfg", "app:\n  name: myapp\nunrelated: 2\n")
+        self.assertEqual([0], self.build()[1])
+
+    def test_nondeterministic_file_is_always_rendered(self):
+        self.write("middle.cfg", "id: {{ uuid() }}\n")
+        self.build(compare=False)
+        self.assertEqual([1], self.build(compare=False)[1])
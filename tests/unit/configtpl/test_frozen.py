@@ -0,0 +1,59 @@
+import copy
+import pickle
+import unittest
+
+from configtpl.config_builder import ConfigBuilder
+from configtpl.frozen import FrozenConfig
+
+
+class FrozenConfigTest(unittest.TestCase):
+    def setUp(self):
+        self.data = {"server": {"host": "localhost", "port": 8080}, "servers": [{"host": "a"}, {"host": "b"}],
+                     "a.b": 1, "tags": {"x"}}
+        self.cfg = FrozenConfig(self.data)
+
+    def test_access(self):
+        self.assertEqual(8080, self.cfg["server"]["port"])
+        self.assertEqual(8080, self.cfg.server.port)
+        self.assertEqual(8080, self.cfg.get("server.port"))
+        self.assertEqual("b", self.cfg.get("servers.1.host"))
+        self.assertEqual("b", self.cfg.get("servers.-1.host"))
+        self.assertEqual(1, self.cfg.get("a.b"))
+        self.assertIsNone(self.cfg.get("servers.5.host"))
+        self.assertEqual("default", self.cfg.get("server.port.value", "default"))
+        with self.assertRaises(AttributeError):
+            self.cfg.missing
+
+    def test_immutable(self):
+        with self.assertRaises(TypeError):
+            self.cfg["server"] = {}
+        with self.assertRaises(TypeError):
+            self.cfg.server = {}
+        self.assertIsInstance(self.cfg.servers, tuple)
+        self.assertIsInstance(self.cfg.tags, frozenset)
+        self.assertIs(self.cfg, copy.deepcopy(self.cfg))
+        self.assertIs(self.cfg, copy.copy(self.cfg))
+
+    def test_hash_and_equality(self):
+        other = FrozenConfig(self.data)
+        self.assertEqual(self.cfg, other)
+        self.assertEqual(hash(self.cfg), hash(other))
+        self.assertEqual(self.cfg, self.data)
+        self.assertNotEqual(self.cfg, FrozenConfig({"server": {}}))
+        self.assertEqual(1, len({self.cfg, other}))
+
+    def test_to_dict(self):
+        d = self.cfg.to_dict()
+        self.assertEqual(self.data, d)
+        d["server"]["port"] = 1
+        self.assertEqual(8080, self.cfg.server.port)
+
+    def test_pickle(self):
+        self.assertEqual(self.cfg, pickle.loads(pickle.dumps(self.cfg)))
+
+
+class FrozenBuilderTest(unittest.TestCase):
+    def test_build_from_str(self):
+        cfg = ConfigBuilder(frozen=True).build_from_str("server:\n  port: 80", overrides={"server": {"host": "h"}})
+        self.assertIsInstance(cfg, FrozenConfig)
+        self.assertEqual({"server": {"port": 80, "host": "h"}}, cfg)
@@ -0,0 +1,55 @@
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from configtpl.config_builder import ConfigBuilder
+
+# The modules which are imported on demand: on the first build, rendering in a thread pool or asynchronous build
+DEFERRED_MODULES = {"jinja2", "yaml", "asyncio", "concurrent.futures", "subprocess", "uuid", "ctypes", "tempfile"}
+
+_IMPORT_TIME_RE = re.compile(r"^import time:\s+\d+ \|\s+\d+ \|\s+(\S+)$")
+
+
+def imported_modules(code: str) -> set[str]:
+    """
+    Runs the code in a new interpreter and returns the names of modules it imports
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                            check=True)
+    modules = set()
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME_RE.match(line)
+        if match is not None:
+            modules.add(match.group(1))
+    return modules
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_import_package(self):
+        modules = imported_modules("import configtpl")
+        self.assertEqual(set(), DEFERRED_MODULES & modules)
+
+    def test_import_builder(self):
+        modules = imported_modules("from configtpl.config_builder import ConfigBuilder; ConfigBuilder()")
+        self.assertIn("configtpl.config_builder", modules)
+        self.assertEqual(set(), DEFERRED_MODULES & modules)
+
+    def test_import_cli(self):
+        modules = imported_modules("from configtpl.cli import make_parser; make_parser()")
+        self.assertEqual(set(), DEFERRED_MODULES & modules)
+
+    def test_load_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "app.cfg")
+            with open(path, "w") as f:
+                f.write("name: {{ 'app' | upper }}\n")
+            snapshot_path = os.path.join(tmp_dir, "app.snapshot")
+            ConfigBuilder().save_snapshot(path, snapshot_path)
+
+            modules = imported_modules("from configtpl.config_builder import ConfigBuilder; "
+                                       f"assert ConfigBuilder().load_snapshot({path!r}, {snapshot_path!r}) == "
+                                       "{'name': 'APP'}")
+        self.assertEqual(set(), DEFERRED_MODULES & modules)
@@ -0,0 +1,65 @@
+import os
+import threading
+
+import jinja2
+
+from configtpl.config_builder import ConfigBuilder
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+
+class ParallelRenderingTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.threads = {}
+        self.barrier: threading.Barrier | None = None
+        self.write("base.cfg", "name: {{ thread('base.cfg') }}\nport: 80\n")
+        self.write("db.cfg", "{% include 'db_part.cfg' %}\n")
+        self.write("db_part.cfg", "db: {{ thread('db.cfg') }}-{{ env_name }}")
+        self.write("server.cfg", "server: {{ name }}:{{ port }}{{ thread('server.cfg') }}\n")
+        self.write("cache.cfg", "cache: {{ thread('cache.cfg') }}\nport: 81\n")
+        self.paths = [self.path(name) for name in ("base.cfg", "db.cfg", "server.cfg", "cache.cfg")]
+
+    def thread(self, name: str) -> str:
+        self.threads[name] = threading.current_thread()
+        if self.barrier is not None and threading.current_thread() is not threading.main_thread():
+            # Fails unless all files rendered by workers are being rendered at the same time
+            self.barrier.wait()
+        return ""
+
+    def make_builder(self, **kwargs) -> ConfigBuilder:
+        return ConfigBuilder(jinja_globals={"thread": self.thread}, defaults={"env_name": "dev"}, **kwargs)
+
+    def test_same_result(self):
+        ctx = {"env_name": "prod"}
+        expected = self.make_builder().build_from_files(self.paths, ctx=ctx)
+        self.assertDictEqual(expected, self.make_builder(parallel_workers=4).build_from_files(self.paths, ctx=ctx))
+        self.assertEqual({"env_name": "dev", "name": None, "port": 81, "db": "-prod", "server": "None:80",
+                          "cache": None}, expected)
+
+    def test_independent_files_are_rendered_concurrently(self):
+        self.barrier = threading.Barrier(3, timeout=10)
+        self.make_builder(parallel_workers=4).build_from_files(self.paths, ctx={"env_name": "prod"})
+        main_thread = threading.current_thread()
+        # server.cfg reads the values of base.cfg, so it is rendered in order
+        self.assertIs(main_thread, self.threads["server.cfg"])
+        for name in ("base.cfg", "db.cfg", "cache.cfg"):
+            self.assertIsNot(main_thread, self.threads[name])
+
+    def test_dependencies_of_workers(self):
+        _, dependencies = self.make_builder(parallel_workers=4)._build_from_paths(self.paths, None,
+                                                                                  {"env_name": "prod"})
+        self.assertIsNot(threading.current_thread(), self.threads["db.cfg"])
+        names = ("base.cfg", "db.cfg", "db_part.cfg", "server.cfg", "cache.cfg")
+        self.assertEqual({os.path.realpath(self.path(name)) for name in names}, set(dependencies.files))
+
+    def test_default_values_are_dependencies(self):
+        # db.cfg reads 'env_name' from defaults
+        self.make_builder(parallel_workers=4).build_from_files(self.paths)
+        self.assertIs(threading.current_thread(), self.threads["db.cfg"])
+
+    def test_context_functions_disable_concurrency(self):
+        builder = self.make_builder(parallel_workers=4)
+        builder.set_global("ctx_value", jinja2.pass_context(lambda context, key: context.get(key)))
+        builder.build_from_files(self.paths, ctx={"env_name": "prod"})
+        self.assertIs(threading.current_thread(), self.threads["cache.cfg"])
@@ -0,0 +1,46 @@
+
+from configtpl.config_builder import ConfigBuilder
+from configtpl.jinja.cmd_runner import CmdRunner
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+
+class PartialBuildTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("base.cfg", "app:\n  name: myapp\nlog_level: info\n")
+        self.write("server.cfg", "server:\n  host: {{ host }}\n"
+                                 "  port: {{ port | default(80) }}\n  name: {{ app.name }}\n")
+        self.write("db.cfg", "{% include 'db_part.cfg' %}\nreport: {{ cmd('echo slow') | trim }}\n")
+        self.write("db_part.cfg", "db:\n  url: postgres://{{ host }}")
+        self.paths = [self.path(name) for name in ("base.cfg", "server.cfg", "db.cfg")]
+        self.runner = CmdRunner()
+        self.builder = ConfigBuilder(jinja_globals={"cmd": self.runner})
+
+    def test_partial(self):
+        cfg = self.builder.build_partial(self.paths, ["server.port", "server.name", "missing"], ctx={"host": "h"})
+        self.assertDictEqual({"server": {"port": 80, "name": "myapp"}}, cfg)
+        # db.cfg is not rendered, so its command is not executed
+        self.assertEqual({}, self.runner.stats())
+
+    def test_included_keys(self):
+        cfg = self.builder.build_partial(self.paths, ["db.url"], ctx={"host": "h"}, overrides={"db": {"x": 1}})
+        self.assertDictEqual({"db": {"url": "postgres://h"}}, cfg)
+        self.assertEqual(["echo slow"], list(self.runner.stats()))
+
+    def test_dynamic_keys(self):
+        self.write("dynamic.cfg", "{{ section }}:\n  port: 8080\n")
+        paths = self.paths + [self.path("dynamic.cfg")]
+        cfg = self.builder.build_partial(paths, ["server.port"], ctx={"host": "h", "section": "server"})
+        self.assertDictEqual({"server": {"port": 8080}}, cfg)
+        self.assertDictEqual(self.builder.build_from_files(paths, ctx={"host": "h", "section": "server"})["server"],
+                             self.builder.build_partial(paths, ["server"], ctx={"host": "h", "section": "server"})
+                             ["server"])
+
+    def test_cmd_results(self):
+        # The templates receive the regular strings from the globals
+        self.write("cmd.cfg", "version: {{ cmd('echo 1.0') | tojson }}\n"
+                              "is_string: {{ cmd('echo 1.0') is string }}\n")
+        cfg = self.builder.build_partial(self.paths + [self.path("cmd.cfg")], ["version", "is_string"])
+        self.assertDictEqual({"version": "1.0\n", "is_string": True}, cfg)
+        self.assertEqual(["echo 1.0"], list(self.runner.stats()))
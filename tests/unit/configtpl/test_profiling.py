@@ -0,0 +1,81 @@
+import asyncio
+import json
+import pickle
+
+import jinja2
+
+from configtpl.config_builder import ConfigBuilder
+from configtpl.profiling import ProfileReport, instrument
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+
+def greet() -> str:
+    return "hello"
+
+
+class ProfilingTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cfg_path = self.write("app.cfg", "name: {{ cmd('echo app') | trim | md5 }}\nuser: {{ greet() }}\n")
+        self.report = ProfileReport()
+        self.builder = ConfigBuilder(jinja_globals={"greet": greet}, observer=self.report)
+
+    def test_build_from_files(self):
+        cfg = self.builder.build_from_files(self.cfg_path, overrides={"extra": 1})
+        self.assertEqual("hello", cfg["user"])
+
+        report = json.loads(self.report.to_json())
+        self.assertEqual({"compile", "render", "parse", "merge"}, set(report["stages"]))
+        render = report["stages"]["render"]["sources"]
+        self.assertEqual(self.cfg_path, render[0]["source"])
+        self.assertEqual(1, render[0]["count"])
+        self.assertEqual(len("name: d2a57dc1d883fd21fb9951699df71cc7\nuser: hello"), render[0]["total_size"])
+        self.assertEqual({self.cfg_path, "<overrides>"}, {s["source"] for s in report["stages"]["merge"]["sources"]})
+        calls = {(c["kind"], c["name"]): c["count"] for c in report["calls"]}
+        self.assertEqual({("global", "cmd"): 1, ("global", "greet"): 1, ("filter", "trim"): 1, ("filter", "md5"): 1},
+                         calls)
+
+        self.report.reset()
+        self.assertEqual({"stages": {}, "calls": []}, self.report.report())
+
+    def test_build_from_str_async(self):
+        asyncio.run(self.builder.build_from_str_async("a: {{ greet() }}"))
+        report = self.report.report()
+        self.assertEqual("<string>", report["stages"]["render"]["sources"][0]["source"])
+        self.assertEqual([("global", "greet")], [(c["kind"], c["name"]) for c in report["calls"]])
+
+    def test_detach(self):
+        self.builder.set_observer(None)
+        self.builder.build_from_files(self.cfg_path)
+        self.assertEqual({"stages": {}, "calls": []}, self.report.report())
+        # The original functions are restored
+        env = self.builder.jinja_env_factory.get_fs_jinja_environment(self.tmp_dir.name)
+        self.assertIs(jinja2.filters.do_trim, env.filters["trim"])
+
+    def test_classes_are_not_wrapped(self):
+        class Port(int):
+            DEFAULT = 80
+
+        self.builder.set_global("Port", Port)
+        self.builder.set_filter("is_instance", isinstance)
+        cfg = self.builder.build_from_str("keys: {{ dict.fromkeys(['a', 'b']) | list }}\nport: {{ Port.DEFAULT }}\n"
+                                          "is_port: {{ Port(8080) | is_instance(Port) }}\n"
+                                          "is_range: {{ range(2) | is_instance(range) }}\n")
+        self.assertEqual({"keys": ["a", "b"], "port": 80, "is_port": True, "is_range": True}, cfg)
+        self.assertEqual({("filter", "list"), ("filter", "is_instance")},
+                         {(c["kind"], c["name"]) for c in self.report.report()["calls"]})
+
+    def test_pickle(self):
+        builder = pickle.loads(pickle.dumps(self.builder))
+        self.assertEqual("hello", builder.build_from_files(self.cfg_path)["user"])
+
+    def test_instrument_keeps_jinja_attributes(self):
+        @jinja2.pass_context
+        def get_name(context):
+            return context["name"]
+
+        wrapped = instrument(get_name, "global", "get_name", self.report)
+        env = jinja2.Environment()
+        env.globals["get_name"] = wrapped
+        self.assertEqual("x", env.from_string("{{ get_name() }}").render(name="x"))
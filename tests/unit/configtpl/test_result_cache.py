@@ -0,0 +1,133 @@
+import os
+from unittest.mock import patch
+
+from configtpl.config_builder import ConfigBuilder
+from configtpl.result_cache import ResultCache
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+
+class ResultCacheTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("base.cfg", "{% include 'part.cfg' %}\nenv_value: {{ env('CONFIGTPL_TEST_VAR', 'none') }}\n")
+        self.write("part.cfg", "part: {{ name }}\n")
+        self.write("overlay.cfg", "overlay: {{ file(snippet) | trim }}\n")
+        self.write("snippet.txt", "snippet")
+        self.paths = [self.path("base.cfg"), self.path("overlay.cfg")]
+        self.ctx = {"name": "John", "snippet": self.path("snippet.txt")}
+
+    def build(self, builder: ConfigBuilder, **kwargs) -> dict:
+        return builder.build_from_files(self.paths, ctx=kwargs.pop("ctx", self.ctx), **kwargs)
+
+    def assert_cached(self, builder: ConfigBuilder, expected: dict) -> None:
+        with patch.object(builder, "_render_cfg_from_file", side_effect=AssertionError("Config is rendered")):
+            self.assertDictEqual(expected, self.build(builder))
+
+    def test_hit_does_not_render(self):
+        builder = ConfigBuilder(result_cache=ResultCache())
+        expected = {"part": "John", "env_value": "none", "overlay": "snippet"}
+        self.assertDictEqual(expected, self.build(builder))
+        self.assert_cached(builder, expected)
+
+    def test_hit_returns_copy(self):
+        builder = ConfigBuilder(result_cache=ResultCache())
+        self.build(builder)["part"] = "mutated"
+        self.build(builder)["part"] = "mutated"
+        self.assertEqual("John", self.build(builder)["part"])
+
+    def test_arguments_are_part_of_key(self):
+        builder = ConfigBuilder(result_cache=ResultCache())
+        self.build(builder)
+        self.assertEqual("Jane", self.build(builder, ctx={**self.ctx, "name": "Jane"})["part"])
+        self.assertEqual("x", self.build(builder, overrides={"part": "x"})["part"])
+
+    def test_list_merge_options_are_part_of_key(self):
+        self.write("list1.cfg", "items: [{name: a, v: 1}]\n")
+        self.write("list2.cfg", "items: [{name: a, v: 2}, {name: b, v: 3}]\n")
+        paths = [self.path("list1.cfg"), self.path("list2.cfg")]
+        cache = ResultCache(cache_dir=self.path("cache"))
+        results = [ConfigBuilder(result_cache=cache, list_merge_strategy=strategy, list_merge_key=key)
+                   .build_from_files(paths)["items"]
+                   for strategy, key in (("replace", None), ("append", None), ("merge_by_key", "name"))]
+        self.assertEqual([[{"name": "a", "v": 2}, {"name": "b", "v": 3}],
+                          [{"name": "a", "v": 1}, {"name": "a", "v": 2}, {"name": "b", "v": 3}],
+                          [{"name": "a", "v": 2}, {"name": "b", "v": 3}]], results)
+        # A builder with the same options reuses the entry on disk
+        builder = ConfigBuilder(result_cache=ResultCache(cache_dir=self.path("cache")), list_merge_strategy="append")
+        with patch.object(builder, "_render_cfg_from_file", side_effect=AssertionError("Config is rendered")):
+            self.assertEqual(results[1], builder.build_from_files(paths)["items"])
+
+    def test_changed_dependencies_invalidate_entry(self):
+        builder = ConfigBuilder(result_cache=ResultCache())
+        self.build(builder)
+
+        self.write("part.cfg", "part: changed\n")
+        self.assertEqual("changed", self.build(builder)["part"])
+
+        self.write("snippet.txt", "changed snippet")
+        self.assertEqual("changed snippet", self.build(builder)["overlay"])
+
+        with patch.dict(os.environ, {"CONFIGTPL_TEST_VAR": "set"}):
+            self.assertEqual("set", self.build(builder)["env_value"])
+
+    def test_content_hash(self):
+        builder = ConfigBuilder(result_cache=ResultCache(use_content_hash=True))
+        expected = self.build(builder)
+        self.write("part.cfg", "part: {{ name }}\n")  # touched, but not changed
+        self.assert_cached(builder, expected)
+
+    def test_nondeterministic_templates(self):
+        self.write("overlay.cfg", "overlay: {{ uuid() }}\n")
+        builder = ConfigBuilder(result_cache=ResultCache())
+        self.assertNotEqual(self.build(builder)["overlay"], self.build(builder)["overlay"])
+
+        builder = ConfigBuilder(result_cache=ResultCache(allow_nondeterministic=True))
+        self.assertEqual(self.build(builder)["overlay"], self.build(builder)["overlay"])
+
+    def test_disk_cache(self):
+        cache_dir = self.path("cache")
+        expected = self.build(ConfigBuilder(result_cache=ResultCache(cache_dir=cache_dir)))
+        self.assert_cached(ConfigBuilder(result_cache=ResultCache(cache_dir=cache_dir)), expected)
+
+        ResultCache(cache_dir=cache_dir).clear()
+        self.assertEqual([], os.listdir(cache_dir))
+
+    def test_globals_and_filters_are_part_of_key(self):
+        self.write("greet.cfg", "greeting: {{ greet() | shout }}\n")
+        builder = ConfigBuilder(result_cache=ResultCache(), jinja_globals={"greet": lambda: "hi"},
+                                jinja_filters={"shout": str.upper}, jinja_constructor_args={"autoescape": False})
+        path = self.path("greet.cfg")
+        self.assertEqual({"greeting": "HI"}, builder.build_from_files(path))
+        builder.set_global("greet", lambda: "hello")
+        self.assertEqual({"greeting": "HELLO"}, builder.build_from_files(path))
+        builder.set_filter("shout", str.title)
+        self.assertEqual({"greeting": "Hello"}, builder.build_from_files(path))
+        # Another builder with different Jinja settings does not reuse the entries on disk
+        for shout, expected in ((str.upper, "HI"), (str.lower, "hi")):
+            other = ConfigBuilder(result_cache=ResultCache(cache_dir=self.path("cache")),
+                                  jinja_globals={"greet": lambda: "Hi"}, jinja_filters={"shout": shout})
+            self.assertEqual({"greeting": expected}, other.build_from_files(path))
+
+    def test_key_types(self):
+        cache = ResultCache()
+        self.assertNotEqual(cache.make_key({1: "a"}), cache.make_key({"1": "a"}))
+        self.assertNotEqual(cache.make_key({True: "a"}), cache.make_key({1: "a"}))
+        self.assertNotEqual(cache.make_key([1, 2]), cache.make_key((1, 2)))
+        self.assertNotEqual(cache.make_key({"tuple": [1]}), cache.make_key((1,)))
+        self.assertEqual(cache.make_key({"a": 1, "b": 2}), cache.make_key({"b": 2, "a": 1}))
+        self.assertIsNone(cache.make_key({(1, 2): "a"}))
+
+    def test_private_cache_dir(self):
+        cache_dir = self.path("cache")
+        ResultCache(cache_dir=cache_dir)
+        self.assertEqual(0o700, os.stat(cache_dir).st_mode & 0o777)
+        os.chmod(cache_dir, 0o755)
+        with self.assertRaisesRegex(ValueError, "accessible by other users"):
+            ResultCache(cache_dir=cache_dir)
+
+    def test_unserializable_context_is_not_cached(self):
+        builder = ConfigBuilder(result_cache=ResultCache())
+        ctx = {**self.ctx, "obj": object()}
+        self.build(builder, ctx=ctx)
+        self.assertEqual(0, builder.result_cache.info().size)
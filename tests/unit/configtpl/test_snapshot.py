@@ -0,0 +1,103 @@
+import os
+from unittest.mock import patch
+
+from configtpl.cli import main
+from configtpl.config_builder import ConfigBuilder
+from configtpl.frozen import FrozenConfig
+from configtpl.result_cache import ResultCache
+from configtpl.snapshot import read_snapshot
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+
+class SnapshotTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("base.cfg", "{% include 'part.cfg' %}\nenv_value: {{ env('CONFIGTPL_TEST_VAR', 'none') }}\n")
+        self.write("part.cfg", "part: {{ name }}\n")
+        self.paths = [self.path("base.cfg")]
+        self.ctx = {"name": "John"}
+        self.snapshot_path = self.path("config.snapshot")
+        self.expected = {"part": "John", "env_value": "none"}
+
+    def load(self, builder: ConfigBuilder, **kwargs) -> dict:
+        return builder.load_snapshot(self.paths, self.snapshot_path, ctx=kwargs.pop("ctx", self.ctx), **kwargs)
+
+    def assert_loaded(self, builder: ConfigBuilder, expected: dict) -> None:
+        with patch.object(builder, "_render_cfg_from_file", side_effect=AssertionError("Config is rendered")):
+            self.assertEqual(expected, self.load(builder))
+
+    def test_formats(self):
+        for format in ("pickle", "marshal"):
+            with self.subTest(format=format):
+                builder = ConfigBuilder()
+                self.assertEqual(self.expected,
+                                 builder.save_snapshot(self.paths, self.snapshot_path, ctx=self.ctx, format=format))
+                self.assert_loaded(builder, self.expected)
+
+        with self.assertRaises(ValueError):
+            ConfigBuilder().save_snapshot(self.paths, self.snapshot_path, format="unknown")
+
+    def test_fallback(self):
+        builder = ConfigBuilder()
+        # No snapshot yet
+        self.assertEqual(self.expected, self.load(builder))
+        builder.save_snapshot(self.paths, self.snapshot_path, ctx=self.ctx)
+
+        # Different arguments
+        self.assertEqual({"part": "Jane", "env_value": "none"}, self.load(builder, ctx={"name": "Jane"}))
+        self.assertEqual({**self.expected, "x": 1}, self.load(builder, overrides={"x": 1}))
+        self.assertEqual({**self.expected, "d": 1}, ConfigBuilder(defaults={"d": 1}).load_snapshot(
+            self.paths, self.snapshot_path, ctx=self.ctx))
+        self.assert_loaded(builder, self.expected)
+
+        # Changed environment and included template
+        with patch.dict(os.environ, {"CONFIGTPL_TEST_VAR": "set"}):
+            self.assertEqual({**self.expected, "env_value": "set"}, self.load(builder))
+        self.write("part.cfg", "part: changed\n")
+        self.assertEqual({**self.expected, "part": "changed"}, self.load(builder, update=True))
+        self.assert_loaded(builder, {**self.expected, "part": "changed"})
+
+    def test_corrupted_snapshot(self):
+        with open(self.snapshot_path, "wb") as f:
+            f.write(b"garbage")
+        self.assertIsNone(read_snapshot(self.snapshot_path))
+        self.assertEqual(self.expected, self.load(ConfigBuilder()))
+
+    def test_nondeterministic(self):
+        self.write("uuid.cfg", "id: '{{ uuid() }}'\n")
+        self.paths = [self.path("uuid.cfg")]
+        builder = ConfigBuilder()
+        with self.assertRaises(ValueError):
+            builder.save_snapshot(self.paths, self.snapshot_path)
+        cfg = builder.save_snapshot(self.paths, self.snapshot_path, allow_nondeterministic=True)
+        self.assertEqual(["uuid"], read_snapshot(self.snapshot_path).nondeterministic)
+        self.assertEqual(cfg, builder.load_snapshot(self.paths, self.snapshot_path))
+
+    def test_result_cache(self):
+        # A cached configuration is built again, so the calls of non-deterministic functions are detected
+        self.write("uuid.cfg", "id: '{{ uuid() }}'\n")
+        paths = [self.path("uuid.cfg")]
+        builder = ConfigBuilder(result_cache=ResultCache(allow_nondeterministic=True))
+        builder.build_from_files(paths)
+        with self.assertRaisesRegex(ValueError, "non-deterministic"):
+            builder.save_snapshot(paths, self.snapshot_path)
+
+        builder = ConfigBuilder(result_cache=ResultCache())
+        builder.build_from_files(self.paths, ctx=self.ctx)
+        self.load(builder, update=True, use_content_hash=True)
+        files = read_snapshot(self.snapshot_path).dependencies.files
+        self.assertTrue(all(signature.digest is not None for signature in files.values()))
+
+    def test_frozen(self):
+        ConfigBuilder().save_snapshot(self.paths, self.snapshot_path, ctx=self.ctx)
+        cfg = self.load(ConfigBuilder(frozen=True))
+        self.assertIsInstance(cfg, FrozenConfig)
+        self.assertEqual(self.expected, cfg)
+
+    def test_cli(self):
+        self.assertEqual(0, main(["snapshot", *self.paths, "-o", self.snapshot_path, "--ctx", '{"name": "John"}']))
+        self.assert_loaded(ConfigBuilder(), self.expected)
+        self.write("uuid.cfg", "id: '{{ uuid() }}'\n")
+        with patch("sys.stderr"):
+            self.assertEqual(1, main(["snapshot", self.path("uuid.cfg"), "-o", self.snapshot_path]))
@@ -0,0 +1,148 @@
+import threading
+import unittest
+
+from configtpl.config_builder import ConfigBuilder
+from configtpl.frozen import FrozenConfig
+from configtpl.watch import ConfigChange, InotifyBackend, _get_libc, make_watch_backend
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+
+class WatchTest(TempDirTestCase):
+    backend = "poll"
+
+    def setUp(self):
+        super().setUp()
+        self.write("config.cfg", "{% include 'part.cfg' %}\nserver:\n  port: 80\n")
+        self.write("part.cfg", "name: first\n")
+
+    def watch(self, **kwargs):
+        return ConfigBuilder().watch(self.path("config.cfg"), debounce=0.05, backend=self.backend,
+                                     poll_interval=0.02, **kwargs)
+
+    def test_watched_files(self):
+        with self.watch() as watcher:
+            self.assertEqual({"name": "first", "server": {"port": 80}}, watcher.config)
+            self.assertEqual({self.path("config.cfg"), self.path("part.cfg")}, watcher.files)
+
+    def test_included_file_changed(self):
+        received: list[ConfigChange] = []
+        event = threading.Event()
+
+        def callback(change: ConfigChange) -> None:
+            received.append(change)
+            event.set()
+
+        with self.watch(callback=callback) as watcher:
+            self.write("part.cfg", "name: second\nextra: 1\n")
+            self.assertTrue(event.wait(5))
+            self.assertEqual({"name": "second", "extra": 1, "server": {"port": 80}}, watcher.config)
+
+        change = received[0]
+        self.assertEqual(["extra"], change.diff.added)
+        self.assertEqual(["name"], change.diff.changed)
+        self.assertEqual({self.path("part.cfg")}, change.changed_files)
+
+    def test_changes_iterator(self):
+        with self.watch() as watcher:
+            self.write("config.cfg", "server:\n  port: 8080\n")
+            change = next(watcher.changes(timeout=5))
+            self.assertEqual(["server.port"], change.diff.changed)
+            self.assertEqual(["name"], change.diff.removed)
+            # The included file is not used anymore
+            self.assertEqual({self.path("config.cfg")}, watcher.files)
+
+    def test_changes_before_iteration(self):
+        event = threading.Event()
+        with self.watch(callback=lambda change: event.set()) as watcher:
+            changes = watcher.changes(timeout=5)
+            self.write("part.cfg", "name: second\n")
+            self.assertTrue(event.wait(5))
+            # The change is received, though the iteration has started after it
+            self.assertEqual(["name"], next(changes).diff.changed)
+
+    def test_initial_build_error(self):
+        backend = make_watch_backend(self.backend, poll_interval=0.02)
+        closed = threading.Event()
+        close = backend.close
+        backend.close = lambda: (closed.set(), close())
+        self.write("config.cfg", "server: {{ undefined_var }}\n")
+        with self.assertRaises(Exception):
+            ConfigBuilder().watch(self.path("config.cfg"), backend=backend)
+        self.assertTrue(closed.is_set())
+
+    def test_stop_from_callback(self):
+        stopped = threading.Event()
+
+        def callback(change: ConfigChange) -> None:
+            watcher.stop()
+            stopped.set()
+
+        watcher = self.watch(callback=callback)
+        self.write("part.cfg", "name: second\n")
+        self.assertTrue(stopped.wait(5))
+        watcher._thread.join(5)
+        self.assertFalse(watcher._thread.is_alive())
+
+    def test_build_error(self):
+        with self.watch() as watcher:
+            self.write("config.cfg", "server: {{ undefined_var }}\n")
+            change = next(watcher.changes(timeout=5))
+            self.assertIsNotNone(change.error)
+            self.assertEqual({"name": "first", "server": {"port": 80}}, watcher.config)
+
+    def test_frozen(self):
+        builder = ConfigBuilder(frozen=True)
+        with builder.watch(self.path("config.cfg"), debounce=0.05, backend=self.backend,
+                           poll_interval=0.02) as watcher:
+            self.assertIsInstance(watcher.config, FrozenConfig)
+            self.write("config.cfg", "server:\n  port: 8080\n")
+            change = next(watcher.changes(timeout=5))
+            self.assertIsInstance(change.config, FrozenConfig)
+            self.assertIsInstance(change.previous, FrozenConfig)
+            self.assertIs(change.config, watcher.config)
+            self.assertEqual(["server.port"], change.diff.changed)
+
+    def test_failing_subscriber(self):
+        received: list[ConfigChange] = []
+        event = threading.Event()
+
+        def failing_callback(change: ConfigChange) -> None:
+            raise RuntimeError("subscriber error")
+
+        def callback(change: ConfigChange) -> None:
+            received.append(change)
+            event.set()
+
+        with self.watch(callback=failing_callback) as watcher:
+            watcher.subscribe(callback)
+            with self.assertLogs("configtpl.watch", "ERROR"):
+                self.write("part.cfg", "name: second\n")
+                self.assertTrue(event.wait(5))
+            event.clear()
+            # The watcher keeps running after the failure
+            self.assertTrue(watcher._thread.is_alive())
+            with self.assertLogs("configtpl.watch", "ERROR"):
+                self.write("part.cfg", "name: third\n")
+                self.assertTrue(event.wait(5))
+        self.assertEqual(["second", "third"], [change.config["name"] for change in received])
+
+
+@unittest.skipIf(_get_libc() is None, "inotify is not available")
+class InotifyWatchTest(WatchTest):
+    backend = "inotify"
+
+    def test_backend(self):
+        with self.watch() as watcher:
+            self.assertIsInstance(watcher._backend, InotifyBackend)
+
+    def test_missing_directory(self):
+        # The directories which cannot be watched are polled
+        path = self.path("missing/file.cfg")
+        backend = InotifyBackend(poll_interval=0.02)
+        try:
+            backend.set_files({path: None})
+            self.write("missing/file.cfg", "a: 1\n")
+            self.assertEqual({path}, backend.wait(5))
+        finally:
+            backend.close()
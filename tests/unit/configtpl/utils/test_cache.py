@@ -0,0 +1,27 @@
+import unittest
+
+from configtpl.utils.cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_eviction(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(1, cache.get("a"))  # "b" becomes the least recently used item
+        cache.set("c", 3)
+        self.assertNotIn("b", cache)
+        self.assertEqual(1, cache.get("a"))
+        self.assertEqual(3, cache.get("c"))
+
+    def test_stats(self):
+        cache = LRUCache(max_size=None)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(1, cache.get_or_create("a", lambda: 1))
+        self.assertEqual(1, cache.get_or_create("a", lambda: 2))
+        info = cache.info()
+        self.assertEqual((1, 2, 1), (info.hits, info.misses, info.size))
+        self.assertAlmostEqual(1 / 3, info.hit_rate)
+
+        cache.clear()
+        self.assertEqual((0, 0, 0), (cache.info().hits, cache.info().misses, len(cache)))
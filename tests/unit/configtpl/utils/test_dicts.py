@@ -0,0 +1,68 @@
+import unittest
+
+from configtpl.frozen import FrozenConfig
+from configtpl.utils.dicts import DictMerger, dict_deep_merge, dict_diff, dict_select
+
+
+class TestDictDeepMerge(unittest.TestCase):
+    def test_merge(self):
+        d1 = {"a": {"b": 1, "c": {"d": 2}}, "e": [1, 2], "f": {"g": 3}}
+        d2 = {"a": {"c": {"x": 4}}, "e": [3]}
+        result = dict_deep_merge(d1, d2)
+        self.assertEqual({"a": {"b": 1, "c": {"d": 2, "x": 4}}, "e": [3], "f": {"g": 3}}, result)
+        # Inputs are not modified
+        self.assertEqual({"a": {"b": 1, "c": {"d": 2}}, "e": [1, 2], "f": {"g": 3}}, d1)
+        self.assertEqual({"a": {"c": {"x": 4}}, "e": [3]}, d2)
+        # Unchanged subtrees are shared, changed ones are copied
+        self.assertIs(d1["f"], result["f"])
+        self.assertIsNot(d1["a"], result["a"])
+
+    def test_shared_subtree_is_copied_on_update(self):
+        shared = {"x": 1}
+        merger = DictMerger()
+        merger.merge({"a": shared})
+        merger.merge({"a": {"y": 2}})
+        self.assertEqual({"a": {"x": 1, "y": 2}}, merger.result)
+        self.assertEqual({"x": 1}, shared)
+
+    def test_adopt_aliases(self):
+        alias = {"x": 1}
+        merger = DictMerger()
+        merger.adopt({"a": alias, "b": alias, "c": {"z": 0}})
+        merger.merge({"a": {"y": 2}, "c": {"z": 1}})
+        self.assertEqual({"a": {"x": 1, "y": 2}, "b": {"x": 1}, "c": {"z": 1}}, merger.result)
+
+    def test_list_strategies(self):
+        d1 = {"l": [{"name": "a", "v": 1}, {"name": "b", "v": 2}]}
+        d2 = {"l": [{"name": "b", "v": 3}, {"name": "c", "v": 4}]}
+        self.assertEqual(d2, dict_deep_merge(d1, d2))
+        self.assertEqual({"l": d1["l"] + d2["l"]}, dict_deep_merge(d1, d2, list_strategy="append"))
+        self.assertEqual({"l": [{"name": "a", "v": 1}, {"name": "b", "v": 3}, {"name": "c", "v": 4}]},
+                         dict_deep_merge(d1, d2, list_strategy="merge_by_key", list_merge_key="name"))
+        self.assertEqual({"name": "b", "v": 2}, d1["l"][1])
+
+        with self.assertRaises(ValueError):
+            DictMerger(list_strategy="merge_by_key")
+        with self.assertRaises(ValueError):
+            DictMerger(list_strategy="unknown")
+
+
+class TestDictDiff(unittest.TestCase):
+    def test_diff(self):
+        diff = dict_diff({"a": {"b": 1, "c": 2}, "d": 1}, {"a": {"b": 1, "c": 3}, "e": 1})
+        self.assertEqual(["e"], diff.added)
+        self.assertEqual(["d"], diff.removed)
+        self.assertEqual(["a.c"], diff.changed)
+        self.assertFalse(dict_diff({"a": 1}, {"a": 1}))
+
+    def test_frozen(self):
+        diff = dict_diff(FrozenConfig({"a": {"b": [1], "c": 2}}), FrozenConfig({"a": {"b": [1], "c": 3}}))
+        self.assertEqual(["a.c"], diff.changed)
+        self.assertFalse(dict_diff(FrozenConfig({"a": {"b": [1]}}), FrozenConfig({"a": {"b": [1]}})))
+
+
+class TestDictSelect(unittest.TestCase):
+    def test_select(self):
+        d = {"server": {"host": "h", "port": 80}, "db": {"url": "u"}, "list": [1]}
+        self.assertEqual({"server": {"port": 80}, "db": {"url": "u"}},
+                         dict_select(d, ["server.port", "db", "missing", "list.0"]))
@@ -0,0 +1,58 @@
+import unittest
+
+import yaml
+
+from configtpl.config_builder import ConfigBuilder
+from configtpl.utils.yaml_loaders import get_yaml_loader, is_libyaml_available
+
+YAML_DOCUMENT = """\
+defaults: &defaults
+  timeout: 30
+  retries: 3
+server:
+  <<: *defaults
+  host: example.com
+  port: 8080
+  ratio: 0.5
+  enabled: yes
+  created: 2024-01-02
+  tags: [a, b, "c d"]
+  empty: null
+multiline: |
+  first line
+  second line
+"""
+
+
+class TestYamlLoaders(unittest.TestCase):
+    def test_loader_class_passthrough(self):
+        self.assertIs(yaml.SafeLoader, get_yaml_loader(yaml.SafeLoader))
+
+    def test_pure_python_loaders(self):
+        self.assertIs(yaml.FullLoader, get_yaml_loader("full", use_libyaml=False))
+        self.assertIs(yaml.SafeLoader, get_yaml_loader("safe", use_libyaml=False))
+
+    def test_unknown_loader(self):
+        with self.assertRaises(ValueError):
+            get_yaml_loader("unknown")
+
+    @unittest.skipUnless(is_libyaml_available(), "PyYAML is built without libyaml")
+    def test_libyaml_loaders(self):
+        self.assertIs(yaml.CFullLoader, get_yaml_loader("full"))
+        self.assertIs(yaml.CSafeLoader, get_yaml_loader("safe", use_libyaml=True))
+
+    @unittest.skipUnless(is_libyaml_available(), "PyYAML is built without libyaml")
+    def test_libyaml_and_python_results_match(self):
+        for family in ("full", "safe"):
+            self.assertEqual(
+                yaml.load(YAML_DOCUMENT, Loader=get_yaml_loader(family, use_libyaml=False)),
+                yaml.load(YAML_DOCUMENT, Loader=get_yaml_loader(family, use_libyaml=True)),
+            )
+
+    @unittest.skipUnless(is_libyaml_available(), "PyYAML is built without libyaml")
+    def test_builder_results_match(self):
+        template = "{% set port = 8080 %}\n" + YAML_DOCUMENT.replace("8080", "{{ port }}")
+        self.assertEqual(
+            ConfigBuilder(yaml_use_libyaml=False).build_from_str(template),
+            ConfigBuilder(yaml_use_libyaml=True).build_from_str(template),
+        )
@@ -0,0 +1,111 @@
+import unittest
+
+import yaml
+
+from configtpl.config_builder import ConfigBuilder
+from configtpl.utils.yaml_stream import ChunkReader, load_yaml_stream
+
+from tests.unit.configtpl.helpers import TempDirTestCase
+
+DOCUMENTS = [
+    "",
+    "a: 1\nb: [1, 2.5, true, null, ~, '3', 2001-12-14]\nc: {d: e}\n",
+    "base: &b {x: 1, y: 2}\nother:\n  <<: *b\n  y: 3\nlist: &l [1, 2]\nref: *l\n",
+    "a: &a {p: 1}\nb: &b {p: 2, q: 2}\nc:\n  <<: [*a, *b]\n  r: 3\nd:\n  <<: *a\n  <<: *b\n",
+    "s: !!set {a, b}\no: !!omap [a: 1, b: 2]\nbin: !!binary aGVsbG8=\nx: !!str 123\n=: v\n",
+    "- &anchor {k: v}\n- !!set {q}\n- *anchor\n- &s scalar\n- !!omap [a: *s]\n",
+    "r: &r [1, *r]\n",
+]
+INVALID_DOCUMENTS = ["a: *undefined\n", "? [1]\n: v\n", "<<: 5\n", "a: 1\n---\nb: 2\n", "a: [1\n"]
+
+
+class YamlStreamTest(unittest.TestCase):
+    def test_same_as_load(self):
+        for loader in (yaml.FullLoader, yaml.SafeLoader, getattr(yaml, "CFullLoader", yaml.FullLoader)):
+            for document in DOCUMENTS:
+                with self.subTest(loader=loader.__name__, document=document):
+                    expected = yaml.load(document, Loader=loader)
+                    chunks = [document[i:i + 3] for i in range(0, len(document), 3)]
+                    self.assertEqual(repr(expected), repr(load_yaml_stream(ChunkReader(chunks), loader)))
+
+            for document in INVALID_DOCUMENTS:
+                with self.subTest(loader=loader.__name__, document=document):
+                    with self.assertRaises(yaml.YAMLError):
+                        load_yaml_stream(document, loader)
+
+    def test_tags(self):
+        self.assert_same_as_safe_load("s: !!set {a, b}\no: !!omap [a: 1, b: 2]\nbin: !!binary aGVsbG8=\n"
+                                      "x: !!str 123\ny: !!int '7'\nz: !!float 1\nm: !!map {k: !!seq [1]}\n")
+
+    def test_anchors_and_aliases(self):
+        self.assert_same_as_safe_load("a: &a {k: [1, 2]}\nb: *a\nl: &l [&s x, *s]\nm: {*s : *l}\n"
+                                      "t: !!set {? *s }\n")
+
+    def test_merge_keys(self):
+        self.assert_same_as_safe_load("a: &a {p: 1, q: 1}\nb: &b {q: 2, r: 2}\nc:\n  <<: *a\n  p: 3\n"
+                                      "d:\n  <<: [*b, *a]\n  s: 4\ne: {<<: {x: 1}, x: 2}\n")
+
+    def test_timestamps(self):
+        self.assert_same_as_safe_load("date: 2001-12-14\nutc: 2001-12-14t21:59:43.10Z\n"
+                                      "offset: 2001-12-14 21:59:43.10 -5\nlocal: 2001-12-15 2:59:43.10\n"
+                                      "list: [2002-12-14, !!timestamp 2001-12-14]\n")
+
+    def assert_same_as_safe_load(self, document: str) -> None:
+        expected = yaml.safe_load(document)
+        for loader in (yaml.SafeLoader, getattr(yaml, "CSafeLoader", yaml.SafeLoader)):
+            with self.subTest(loader=loader.__name__):
+                chunks = [document[i:i + 3] for i in range(0, len(document), 3)]
+                self.assertEqual(expected, load_yaml_stream(ChunkReader(chunks), loader))
+
+    def test_streaming(self):
+        # The values are constructed while the document is still being read
+        for base in (yaml.SafeLoader, getattr(yaml, "CSafeLoader", yaml.SafeLoader)):
+            with self.subTest(loader=base.__name__):
+                log = []
+
+                class Loader(base):
+                    pass
+
+                Loader.add_constructor("!mark", lambda loader, node: log.append(("value", node.value)))
+
+                def chunks():
+                    for i in range(2000):
+                        log.append(("chunk", i))
+                        yield f"- !mark item{i}\n"
+
+                self.assertEqual([None] * 2000, load_yaml_stream(ChunkReader(chunks()), Loader))
+                self.assertLess(log.index(("value", "item0")), log.index(("chunk", 1999)))
+
+    def test_unsupported_loader(self):
+        self.assertEqual({"a": "1"}, load_yaml_stream(ChunkReader(["a: ", "1"]), yaml.BaseLoader))
+
+    def test_chunk_reader(self):
+        reader = ChunkReader(iter(["ab", "cdé", "f"]))
+        self.assertEqual("abc", reader.read(3))
+        self.assertEqual("dé", reader.read(2))
+        self.assertEqual("f", reader.read())
+        self.assertEqual("", reader.read(10))
+        self.assertEqual(7, reader.size)
+
+
+class LowMemoryBuildTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cfg_path = self.write("routes.cfg", "routes:\n{% for i in range(count) %}\n"
+                                   "  - {name: 'route{{ i }}', port: {{ 8000 + i }}}\n{% endfor %}\n"
+                                   "first: &first {{ '{' }}name: route0{{ '}' }}\ncopy: {<<: *first, port: 1}\n")
+
+    def test_low_memory(self):
+        expected = ConfigBuilder().build_from_files(self.cfg_path, ctx={"count": 2000})
+        cfg = ConfigBuilder(low_memory=True).build_from_files(self.cfg_path, ctx={"count": 2000})
+        self.assertEqual(expected, cfg)
+        self.assertEqual({"name": "route0", "port": 1}, cfg["copy"])
+
+    def test_render_error(self):
+        # The errors of rendering are raised from the parser like in the regular mode
+        errors = []
+        for builder in (ConfigBuilder(), ConfigBuilder(low_memory=True)):
+            with self.assertRaises(Exception) as e:
+                builder.build_from_files(self.cfg_path)
+            errors.append(type(e.exception))
+        self.assertEqual(errors[0], errors[1])